@@ -115,14 +115,15 @@ def cache_instance():
 
 
 @pytest.fixture
-def config_manager():
-    """Cria instância de ConfigManager para testes."""
+def config_manager(tmp_path):
+    """Cria instância de ConfigManager para testes (caches fora do checkout)."""
     try:
         from visualizador_pecas_v8_1_COMPLETO import ConfigManager
         import tempfile
         config_file = tempfile.NamedTemporaryFile(suffix='.json', delete=False)
         config_file.close()
         cm = ConfigManager(config_file.name)
+        cm.set("advanced", "cache_dir", str(tmp_path / "cache"))
         yield cm
         os.unlink(config_file.name)
     except ImportError:
@@ -138,6 +139,7 @@ def config_manager():
                 config_file = tempfile.NamedTemporaryFile(suffix='.json', delete=False)
                 config_file.close()
                 cm = module.ConfigManager(config_file.name)
+                cm.set("advanced", "cache_dir", str(tmp_path / "cache"))
                 yield cm
                 os.unlink(config_file.name)
                 return
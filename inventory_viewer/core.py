@@ -43,6 +43,7 @@ from tkinter import filedialog, messagebox, ttk
 from PIL import Image, ImageTk
 from PIL import UnidentifiedImageError
 import os
+import sys
 import threading
 import queue
 import unicodedata
@@ -51,23 +52,41 @@ from pathlib import Path
 import logging
 import logging.handlers
 from datetime import datetime, timedelta, timezone
-from enum import Enum
-from typing import Optional, Dict, List, Tuple, Set, Any
+from enum import Enum, IntEnum
+from typing import Optional, Dict, List, Tuple, Set, Any, Callable, Union, Iterable
 import time
 import json
 import shutil
 import uuid
 import socket
 import getpass
-from collections import defaultdict
+import itertools
+import copy
+import hashlib
+import io
+import re
+import weakref
+import mmap
+import math
+from collections import OrderedDict
+from collections import defaultdict, deque
 from contextlib import contextmanager
-from concurrent.futures import ThreadPoolExecutor, as_completed, Future
+from concurrent.futures import (ThreadPoolExecutor, as_completed, wait, Future,
+                                FIRST_COMPLETED, InvalidStateError)
 
 
 # ╔═══════════════════════════════════════════════════════════════════════╗
 # ║                    SISTEMA DE LOGGING ESTRUTURADO                     ║
 # ╚═══════════════════════════════════════════════════════════════════════╝
 
+def _percentiles(values, points=(50, 95, 99)) -> Dict[int, float]:
+    """Percentis por posição (nearest-rank) de uma amostra; {} se vazia."""
+    ordered = sorted(values)
+    if not ordered:
+        return {}
+    return {p: ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))] for p in points}
+
+
 class StructuredLogger:
     """
     Logger estruturado com suporte a JSON e métricas avançadas.
@@ -78,11 +97,26 @@ class StructuredLogger:
     - Métricas de performance integradas
     - Context tracing com UUID
     - Rotação automática de arquivos
+    - Escrita assíncrona: quem loga só enfileira (fila limitada, descarta
+      DEBUG primeiro quando cheia); uma thread grava arquivos e console
+    - Níveis desligados (`level`) retornam antes de montar o registro; o
+      JSON é serializado uma única vez, pelo JSONFormatter
+    - `sinks` substitui arquivos e console atrás da fila (ex.:
+      `[logging.NullHandler()]` em benchmarks)
     """
 
-    def __init__(self, name: str, log_dir: str = "logs"):
+    AUTOTUNE_HISTORY = 20
+    LIVE_WINDOW = 256  # Amostras recentes usadas nos percentis ao vivo
+
+    def __init__(self, name: str, log_dir: str = "logs", queue_size: int = 10000,
+                 overflow: str = "drop_debug", level: Union[int, str] = logging.DEBUG,
+                 sinks: Optional[List[logging.Handler]] = None):
         self.name = name
         self.log_dir = Path(log_dir)
+        self.sinks = sinks
+        self.queue_size = queue_size
+        self.overflow = overflow
+        self.async_handler: Optional[AsyncLogHandler] = None
         self.session_id = str(uuid.uuid4())[:8]
         self.hostname = socket.gethostname()
 
@@ -97,10 +131,15 @@ class StructuredLogger:
             "ctx_username": self.username,
             "ctx_app_version": "8.1"
         }
+        # Campos fixos de todo registro, montados uma vez
+        self._static_context = {"ctx_logger": self.name, **self.context}
 
         self.logger = logging.getLogger(name)
-        self.logger.setLevel(logging.DEBUG)
-        self.logger.handlers.clear()
+        self.set_level(level)
+        for handler in list(self.logger.handlers):
+            # Instância anterior com o mesmo nome: grava o que ficou na fila dela
+            self.logger.removeHandler(handler)
+            handler.close()
         self.logger.propagate = False
 
         self.metrics = {
@@ -111,13 +150,26 @@ class StructuredLogger:
             "errors": defaultdict(int),
             "warnings": defaultdict(int),
             "parallel_loads": 0,
-            "speedups": []
+            "speedups": [],
+            "efficiencies": [],
+            "stage_ms": defaultdict(list),
+            "result_queue": {},
+            "pipeline": {},
+            "autotune": [],
+            "quarantine": {},
+            "ui_frames": {},
+            "gauges": defaultdict(lambda: deque(maxlen=self.LIVE_WINDOW))
         }
 
         self._setup_handlers()
 
     def _setup_handlers(self):
-        """Configura handlers de logging (JSON + Readable + Console)."""
+        """Configura handlers de logging (JSON + Readable + Console, ou `sinks`)."""
+        if self.sinks is not None:
+            self.async_handler = AsyncLogHandler(list(self.sinks), maxsize=self.queue_size,
+                                                 policy=self.overflow)
+            self.logger.addHandler(self.async_handler)
+            return
         try:
             self.log_dir.mkdir(exist_ok=True)
         except OSError:
@@ -130,7 +182,6 @@ class StructuredLogger:
         )
         json_handler.setLevel(logging.DEBUG)
         json_handler.setFormatter(JSONFormatter())
-        self.logger.addHandler(json_handler)
 
         # Handler legível (debug humano)
         text_file = self.log_dir / "app_readable.log"
@@ -139,23 +190,49 @@ class StructuredLogger:
         )
         text_handler.setLevel(logging.INFO)
         text_handler.setFormatter(ReadableFormatter())
-        self.logger.addHandler(text_handler)
 
         # Handler console
         console_handler = logging.StreamHandler()
         console_handler.setLevel(logging.INFO)
         console_handler.setFormatter(ReadableFormatter())
-        self.logger.addHandler(console_handler)
+
+        # Arquivos e console ficam atrás da fila: nenhuma thread espera disco
+        self.async_handler = AsyncLogHandler([json_handler, text_handler, console_handler],
+                                             maxsize=self.queue_size, policy=self.overflow)
+        self.logger.addHandler(self.async_handler)
+
+    def dropped_records(self) -> Dict[str, int]:
+        """Registros descartados por fila cheia, por nível."""
+        return self.async_handler.stats()["dropped"] if self.async_handler else {}
+
+    def close(self):
+        """Grava os registros pendentes e encerra a thread de escrita."""
+        if self.async_handler is not None:
+            self.logger.removeHandler(self.async_handler)
+            self.async_handler.close()
+            self.async_handler = None
+
+    def set_level(self, level: Union[int, str]):
+        """Nível mínimo registrado (ex.: "INFO" desliga DEBUG na origem)."""
+        if isinstance(level, str):
+            level = logging.getLevelName(level.upper())
+        if not isinstance(level, int):
+            level = logging.DEBUG
+        self.level = level
+        self.logger.setLevel(level)
+
+    def enabled(self, level: int) -> bool:
+        """Permite pular trabalho caro (f-strings, contagens) de níveis desligados."""
+        return level >= self.level
 
     def _build_record(self, level: str, msg: str, extra: Optional[Dict] = None, 
                      trace_id: Optional[str] = None, duration_ms: Optional[float] = None) -> Dict:
         """Constrói registro de log com contexto completo."""
         record = {
             "ctx_timestamp": datetime.now(timezone.utc).isoformat(),
-            "ctx_level": level.upper(),
-            "ctx_logger": self.name,
+            "ctx_level": level,
             "ctx_message": msg,
-            **self.context
+            **self._static_context
         }
 
         if trace_id:
@@ -171,20 +248,10 @@ class StructuredLogger:
 
     def _log(self, level: int, level_name: str, msg: str, **kwargs):
         """Log interno com routing para handlers."""
-        record = self._build_record(level_name, msg, kwargs)
-        json_msg = json.dumps(record, ensure_ascii=False)
-        safe_extra = {k: v for k, v in record.items() if k.startswith("ctx_")}
-
-        if level == logging.DEBUG:
-            self.logger.debug(json_msg, extra=safe_extra)
-        elif level == logging.INFO:
-            self.logger.info(json_msg, extra=safe_extra)
-        elif level == logging.WARNING:
-            self.logger.warning(json_msg, extra=safe_extra)
-        elif level == logging.ERROR:
-            self.logger.error(json_msg, extra=safe_extra)
-        elif level == logging.CRITICAL:
-            self.logger.critical(json_msg, extra=safe_extra)
+        if level < self.level:
+            return
+        # Mensagem simples; o JSONFormatter serializa os campos ctx_ uma vez
+        self.logger.log(level, msg, extra=self._build_record(level_name, msg, kwargs))
 
     def debug(self, msg: str, **kwargs):
         self._log(logging.DEBUG, "DEBUG", msg, **kwargs)
@@ -240,6 +307,7 @@ class StructuredLogger:
 
     def metric(self, name: str, value: float, unit: str = "", **tags):
         """Registra métrica numérica."""
+        self.metrics["gauges"][name].append(value)
         self.info(f"Metric: {name}", metric_name=name, metric_value=value,
                  metric_unit=unit, metric_type="gauge", **tags)
 
@@ -257,23 +325,74 @@ class StructuredLogger:
         else:
             self.metrics["cache_misses"] += 1
 
+        if not self.enabled(logging.DEBUG):
+            return
         self.debug(f"Cache {'hit' if hit else 'miss'}", event_type="cache", cache_hit=hit,
                   cache_key=key, total_hits=self.metrics["cache_hits"],
                   total_misses=self.metrics["cache_misses"])
 
-    def record_parallel_load(self, speedup: float, images_count: int, 
-                            duration_ms: float, workers: int):
-        """Registra carregamento paralelo de imagens."""
+    def record_parallel_load(self, speedup: Optional[float], images_count: int,
+                            duration_ms: float, workers: int,
+                            efficiency: Optional[float] = None,
+                            timings: Optional[Dict] = None):
+        """
+        Registra carregamento paralelo de imagens.
+
+        `speedup`/`efficiency` vêm do custo serial calibrado (None quando não
+        houve decodificação a comparar, ex.: tudo em cache).
+        """
         self.metrics["parallel_loads"] += 1
-        self.metrics["speedups"].append(speedup)
+        if speedup is not None:
+            self.metrics["speedups"].append(speedup)
+        if efficiency is not None:
+            self.metrics["efficiencies"].append(efficiency)
+        for stage in ("decode", "resize", "convert"):
+            avg = (timings or {}).get(f"{stage}_ms_avg")
+            if avg is not None:
+                self.metrics["stage_ms"][stage].append(avg)
 
         self.info("Parallel load completed", 
                  event_type="parallel_load",
                  speedup=speedup,
+                 parallel_efficiency=efficiency,
                  images_count=images_count,
                  duration_ms=duration_ms,
                  workers=workers,
-                 throughput_imgs_per_sec=images_count / (duration_ms / 1000) if duration_ms > 0 else 0)
+                 throughput_imgs_per_sec=images_count / (duration_ms / 1000) if duration_ms > 0 else 0,
+                 **(timings or {}))
+
+    def record_queue_stats(self, stats: Dict, trace_id: Optional[str] = None):
+        """Registra profundidade e bloqueios da fila de resultados."""
+        self.metrics["result_queue"] = dict(stats)
+        self.info("Result queue stats", event_type="queue", trace_id=trace_id,
+                  **{f"queue_{k}": v for k, v in stats.items()})
+
+    def record_pipeline_stats(self, stats: Dict, trace_id: Optional[str] = None):
+        """Registra utilização dos estágios de leitura e decodificação."""
+        self.metrics["pipeline"] = dict(stats)
+        self.info("Pipeline stage stats", event_type="pipeline", trace_id=trace_id,
+                  **{f"pipeline_{k}": v for k, v in stats.items()})
+
+    def record_autotune(self, decision: Dict):
+        """Registra uma decisão do autoajuste de workers."""
+        self.metrics["autotune"].append(dict(decision))
+        del self.metrics["autotune"][:-self.AUTOTUNE_HISTORY]
+        self.info("Worker autotune decision", event_type="autotune",
+                  **{f"autotune_{k}": v for k, v in decision.items()})
+
+    def record_ui_frames(self, stats: Dict):
+        """Registra tempos de quadro e latência da fila no consumo pela UI."""
+        self.metrics["ui_frames"] = dict(stats)
+        if self.enabled(logging.DEBUG):
+            self.debug("UI frame stats", event_type="ui_frames",
+                       **{f"ui_{k}": v for k, v in stats.items()})
+
+    def record_quarantine(self, stats: Dict, trace_id: Optional[str] = None):
+        """Registra o estado da quarentena de imagens ilegíveis."""
+        self.metrics["quarantine"] = dict(stats)
+        if self.enabled(logging.DEBUG):
+            self.debug("Quarantine stats", event_type="quarantine", trace_id=trace_id,
+                       **{f"quarantine_{k}": v for k, v in stats.items()})
 
     def get_metrics_summary(self) -> Dict:
         """Retorna resumo de métricas da sessão."""
@@ -304,8 +423,87 @@ class StructuredLogger:
                 "max_speedup": max(speedups)
             })
 
+        efficiencies = self.metrics["efficiencies"]
+        if efficiencies:
+            summary["avg_parallel_efficiency"] = sum(efficiencies) / len(efficiencies)
+
+        for stage, values in self.metrics["stage_ms"].items():
+            if values:
+                summary[f"avg_{stage}_ms"] = sum(values) / len(values)
+
+        queue_stats = self.metrics["result_queue"]
+        if queue_stats:
+            summary.update({
+                "queue_max_depth": queue_stats["max_depth"],
+                "queue_capacity": queue_stats["capacity"],
+                "queue_blocked_ms": queue_stats["blocked_ms"],
+                "queue_dropped": queue_stats["dropped"]
+            })
+
+        pipeline_stats = self.metrics["pipeline"]
+        if pipeline_stats:
+            summary.update({
+                "pipeline_read_utilization": pipeline_stats["read_utilization"],
+                "pipeline_decode_utilization": pipeline_stats["decode_utilization"],
+                "pipeline_buffer_peak_bytes": pipeline_stats["buffer_peak_bytes"],
+                "pipeline_buffer_wait_ms": pipeline_stats["buffer_wait_ms"]
+            })
+
+        if self.async_handler is not None:
+            log_stats = self.async_handler.stats()
+            summary["log_records_dropped"] = log_stats["dropped_total"]
+            if log_stats["dropped"]:
+                summary["log_records_dropped_by_level"] = log_stats["dropped"]
+
+        ui_frames = self.metrics["ui_frames"]
+        if ui_frames:
+            summary.update({f"ui_{k}": ui_frames[k] for k in (
+                "frame_ms_avg", "frame_ms_p95", "frame_ms_max", "max_batch",
+                "queue_lag_ms_avg", "queue_lag_ms_max") if k in ui_frames})
+
+        quarantine = self.metrics["quarantine"]
+        if quarantine:
+            summary.update({f"quarantine_{k}": v for k, v in quarantine.items()})
+
+        autotune = self.metrics["autotune"]
+        if autotune:
+            summary.update({
+                "autotune_workers": autotune[-1]["workers"],
+                "autotune_last_action": autotune[-1]["action"],
+                "autotune_decisions": [
+                    {k: d[k] for k in ("root", "action", "previous_workers", "workers",
+                                       "throughput_imgs_per_sec")}
+                    for d in autotune
+                ]
+            })
+
         return summary
 
+    def live_snapshot(self) -> Dict[str, Any]:
+        """
+        Métricas recentes para exibição ao vivo (HUD): percentis das últimas
+        buscas e métricas numéricas, e os últimos registros por componente.
+        Só copia contadores; nada é logado.
+        """
+        m = self.metrics
+        # deque.copy() é atômica: métricas chegam de outras threads durante a leitura
+        gauges = {name: _percentiles(values.copy()) for name, values in list(m["gauges"].items())}
+        dir_total = m["cache_hits"] + m["cache_misses"]
+        return {
+            "searches": m["search_count"],
+            "search_ms": _percentiles(m["search_times"][-self.LIVE_WINDOW:]),
+            "gauges": gauges,
+            "directory_hit_rate": m["cache_hits"] / dir_total if dir_total else None,
+            "stage_ms": {stage: values[-1] for stage, values in list(m["stage_ms"].items()) if values},
+            "result_queue": dict(m["result_queue"]),
+            "pipeline": dict(m["pipeline"]),
+            "ui_frames": dict(m["ui_frames"]),
+            "quarantine": dict(m["quarantine"]),
+            "log_dropped": sum(self.dropped_records().values()),
+            "errors": sum(m["errors"].values()),
+            "warnings": sum(m["warnings"].values())
+        }
+
     def log_metrics_summary(self):
         """Log do resumo de métricas."""
         summary = self.get_metrics_summary()
@@ -333,7 +531,7 @@ class JSONFormatter(logging.Formatter):
         if record.exc_info:
             log_data["exception"] = self.formatException(record.exc_info)
 
-        return json.dumps(log_data, ensure_ascii=False)
+        return json.dumps(log_data, ensure_ascii=False, default=str)
 
 
 class ReadableFormatter(logging.Formatter):
@@ -363,6 +561,94 @@ class ReadableFormatter(logging.Formatter):
         return super().format(record)
 
 
+class LogBuffer(queue.Queue):
+    """
+    Fila limitada entre quem loga e a thread que escreve os arquivos.
+
+    `offer` nunca bloqueia. Cheia, a política decide o que perder:
+    - "drop_debug": descarta o registro enfileirado de menor nível abaixo
+      do novo (DEBUG primeiro, depois INFO...); sem nenhum, perde o novo
+    - "drop_new": perde sempre o registro novo
+    """
+
+    POLICIES = ("drop_debug", "drop_new")
+
+    def __init__(self, maxsize: int = 10000, policy: str = "drop_debug"):
+        super().__init__(max(1, maxsize))
+        self.policy = policy if policy in self.POLICIES else "drop_debug"
+
+    def offer(self, record: logging.LogRecord) -> Optional[logging.LogRecord]:
+        """Enfileira sem bloquear; retorna o registro descartado (ou None)."""
+        with self.mutex:
+            if self._qsize() < self.maxsize:
+                self._put(record)
+                self.unfinished_tasks += 1
+                self.not_empty.notify()
+                return None
+            if self.policy == "drop_new":
+                return record
+            victim_index, victim_level = None, record.levelno
+            for i, queued in enumerate(self.queue):
+                if queued.levelno < victim_level:
+                    victim_index, victim_level = i, queued.levelno
+                    if victim_level <= logging.DEBUG:
+                        break
+            if victim_index is None:
+                return record
+            victim = self.queue[victim_index]
+            del self.queue[victim_index]
+            self._put(record)
+            return victim
+
+
+class AsyncLogHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler que não bloqueia: registros vão para um `LogBuffer` e uma
+    `QueueListener` própria grava nos handlers reais (arquivos/console).
+    """
+
+    def __init__(self, handlers: List[logging.Handler], maxsize: int = 10000,
+                 policy: str = "drop_debug"):
+        super().__init__(LogBuffer(maxsize, policy))
+        self.dropped: Dict[str, int] = defaultdict(int)
+        self._dropped_lock = threading.Lock()
+        self.targets = handlers
+        self.listener = _LogListener(self.queue, *handlers, respect_handler_level=True)
+        self.listener.start()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Mensagem simples sem args; os formatters serializam os ctx_* na escrita
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        dropped = self.queue.offer(record)
+        if dropped is not None:
+            with self._dropped_lock:
+                self.dropped[dropped.levelname] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._dropped_lock:
+            dropped = dict(self.dropped)
+        return {"queued": self.queue.qsize(), "capacity": self.queue.maxsize,
+                "policy": self.queue.policy, "dropped": dropped,
+                "dropped_total": sum(dropped.values())}
+
+    def close(self):
+        """Esvazia a fila (grava o que falta) e fecha os handlers reais."""
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+            for handler in self.targets:
+                handler.close()
+        super().close()
+
+
+class _LogListener(logging.handlers.QueueListener):
+    def enqueue_sentinel(self):
+        # put() bloqueante: a fila pode estar cheia, e o listener a esvazia
+        self.queue.put(self._sentinel)
+
+
 # ╔═══════════════════════════════════════════════════════════════════════╗
 # ║                   GERENCIADOR DE CONFIGURAÇÕES                        ║
 # ╚═══════════════════════════════════════════════════════════════════════╝
@@ -372,10 +658,14 @@ class ConfigManager:
     Gerenciador de configurações com persistência em JSON.
 
     Características:
-    - Backup automático antes de salvar
+    - Backup automático (uma cópia por sessão, antes da primeira gravação)
     - Merge inteligente de configurações
     - Versionamento de schema
-    - Auto-save configurável
+    - Auto-save configurável: alterações marcam a configuração como suja e
+      são gravadas juntas numa thread de fundo após `save_delay` segundos
+      (tmp + rename), fora do caminho interativo
+    - Assinaturas (`subscribe`): componentes em execução se reconfiguram
+      quando os valores mudam, sem reiniciar
     """
 
     SCHEMA_VERSION = "8.1"
@@ -392,8 +682,14 @@ class ConfigManager:
             "window_height": 800, 
             "window_x": None, 
             "window_y": None, 
-            "max_columns": 3, 
-            "theme": "clam"
+            "max_columns": 3,  # Usado quando auto_columns está desligado
+            "auto_columns": True,  # Colunas pela largura do canvas
+            "theme": "clam",
+            "frame_budget_ms": 12,  # Tempo máximo por lote de mensagens da fila
+            "idle_poll_ms": 250,  # Consulta de segurança quando a fila está ociosa
+            "wake_poll_ms": 16,  # Intervalo em que a UI ociosa confere o sinal dos produtores
+            "show_hud": False,  # Painel de métricas ao vivo (F12)
+            "hud_refresh_ms": 500
         },
         "search": {
             "history": [], 
@@ -401,16 +697,63 @@ class ConfigManager:
             "last_search": ""
         },
         "performance": {
-            "max_workers": None,  # None = auto (cpu_count + 4)
+            # Pool geral: cache hits, prefetch, visualizador e, sem pipeline, a
+            # decodificação. None = auto: o WorkerAutotuner ajusta por raiz a
+            # pool de leitura (com pipeline) ou esta pool (sem pipeline)
+            "max_workers": None,
             "thumbnail_size": 250,
-            "enable_parallel_loading": True
+            "enable_parallel_loading": True,
+            "lazy_prefetch_rows": 2,
+            "result_queue_size": 32,  # Janela de thumbnails aguardando a UI
+            "thumbnail_cache_mb": 128,
+            "idle_prefetch": True,
+            "prefetch_top_terms": 5,
+            "prefetch_neighbours": 2,
+            "prefetch_io_mb_per_sec": 8,
+            "prefetch_idle_ms": 1500,
+            "viewer_cache_entries": 4,
+            "viewer_hover_prefetch_ms": 350,
+            "use_atlas": False,
+            "staged_pipeline": True,  # Leitura e decodificação em pools separadas (requer reinício)
+            "thumbnail_sizes": [64, 128, 256, 512],  # Gerados numa só decodificação
+            "read_workers": 16,  # Largura da pool de leitura (ponto de partida do modo Auto)
+            "read_buffer_mb": 64,
+            "read_ahead": True,
+            "mmap_threshold_mb": 8,  # Originais maiores são lidos via mmap (0 = desliga)
+            "dedupe_thumbnails": True,  # Fotos idênticas compartilham thumbnail
+            "quarantine_bad_images": True,  # Falhas não são retentadas até o arquivo mudar
+            "placeholder_dimensions": True,  # Placeholders com as proporções do cabeçalho (lido sempre)
+            "autotuned_workers": {}  # raiz -> workers escolhidos no modo Auto
+        },
+        "advanced": {
+            "log_level": "INFO",
+            "log_queue_size": 10000,  # Registros aguardando a thread de escrita
+            "log_overflow": "drop_debug",  # Fila cheia: drop_debug | drop_new
+            "enable_stats": True,
+            "lazy_loading": True,
+            "cache_dir": "cache",
+            "viewer_tile_size": 256,
+            "viewer_memory_tiles": 64,
+            "viewer_disk_cache_mb": 256  # Tiles do zoom em cache/pyramid (LRU)
         }
     }
 
-    def __init__(self, config_path: str = "config.json"):
+    SAVE_DELAY_S = 0.5
+
+    def __init__(self, config_path: str = "config.json", save_delay: float = SAVE_DELAY_S):
         self.config_path = Path(config_path)
         self.backup_path = self.config_path.with_suffix('.json.bak')
-        self.config = self.DEFAULT_CONFIG.copy()
+        self.config = copy.deepcopy(self.DEFAULT_CONFIG)
+        self.save_delay = save_delay
+        self._lock = threading.RLock()
+        self._dirty = False
+        self._timer: Optional[threading.Timer] = None
+        self._io_lock = threading.Lock()
+        self._snapshot_seq = 0
+        self._written_seq = 0
+        self._backed_up = False
+        self.writes = 0
+        self._subscribers: List[Callable[[Dict[str, Dict[str, Any]]], None]] = []
         self._load()
 
     def _load(self):
@@ -436,18 +779,71 @@ class ConfigManager:
                 else:
                     result[key] = value
             return result
-        self.config = merge_dict(self.DEFAULT_CONFIG, loaded)
+        self.config = merge_dict(copy.deepcopy(self.DEFAULT_CONFIG), loaded)
 
     def save(self) -> bool:
-        """Salva configurações em arquivo (com backup)."""
-        try:
-            if self.config_path.exists():
-                shutil.copy2(self.config_path, self.backup_path)
-            with open(self.config_path, 'w', encoding='utf-8') as f:
-                json.dump(self.config, f, indent=2, ensure_ascii=False)
-            return True
-        except:
-            return False
+        """Salva configurações em arquivo agora (síncrono, tmp + rename)."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            try:
+                data = json.dumps(self.config, indent=2, ensure_ascii=False)
+            except (TypeError, ValueError):
+                return False
+            self._dirty = False
+            self._snapshot_seq += 1
+            seq = self._snapshot_seq
+
+        # Escrita fora do lock de estado: set()/update() na UI não esperam o disco
+        with self._io_lock:
+            if seq < self._written_seq:
+                return True  # Uma gravação mais nova já chegou ao disco
+            try:
+                if not self._backed_up and self.config_path.exists():
+                    shutil.copy2(self.config_path, self.backup_path)
+                    self._backed_up = True
+                tmp = self.config_path.with_name(self.config_path.name + ".tmp")
+                with open(tmp, 'w', encoding='utf-8') as f:
+                    f.write(data)
+                os.replace(tmp, self.config_path)
+                self._written_seq = seq
+                self.writes += 1
+                return True
+            except OSError:
+                with self._lock:
+                    self._dirty = True
+                return False
+
+    def flush(self) -> bool:
+        """Grava imediatamente alterações pendentes (ex.: ao fechar o app)."""
+        with self._lock:
+            if not self._dirty:
+                return True
+        return self.save()
+
+    def _mark_dirty(self, auto_save: Optional[bool] = None):
+        """Marca alterações e agenda uma gravação conjunta em background."""
+        with self._lock:
+            self._dirty = True
+            should_save = auto_save if auto_save is not None else self.config["general"]["auto_save"]
+            if not should_save or self._timer is not None:
+                return
+            self._timer = threading.Timer(self.save_delay, self._deferred_save)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _deferred_save(self):
+        with self._lock:
+            self._timer = None
+            if not self._dirty:
+                return
+        self.save()
+
+    def is_dirty(self) -> bool:
+        """Indica se há alterações ainda não gravadas (inclui gravação em curso)."""
+        with self._lock:
+            return self._dirty or self._written_seq < self._snapshot_seq
 
     def get(self, section: str, key: str, default: Any = None) -> Any:
         """Obtém valor de configuração."""
@@ -457,18 +853,65 @@ class ConfigManager:
             return default
 
     def set(self, section: str, key: str, value: Any, auto_save: bool = None):
-        """Define valor de configuração."""
-        if section not in self.config:
-            self.config[section] = {}
-        self.config[section][key] = value
-        should_save = auto_save if auto_save is not None else self.config["general"]["auto_save"]
-        if should_save:
-            self.save()
+        """Define valor de configuração (gravação adiada; nada muda se o valor é igual)."""
+        self.update({section: {key: value}}, auto_save=auto_save)
+
+    def update(self, changes: Dict[str, Dict[str, Any]], auto_save: bool = None) -> bool:
+        """
+        Aplica várias alterações {seção: {chave: valor}} de uma vez.
+
+        Retorna True se algo mudou; uma única gravação é agendada.
+        """
+        changed: Dict[str, Dict[str, Any]] = {}
+        with self._lock:
+            for section, values in changes.items():
+                target = self.config.setdefault(section, {})
+                for key, value in values.items():
+                    if key in target and target[key] == value:
+                        continue
+                    target[key] = value
+                    changed.setdefault(section, {})[key] = value
+            if changed:
+                self._mark_dirty(auto_save)
+            subscribers = list(self._subscribers)
+        if changed:
+            self._notify(subscribers, changed)
+        return bool(changed)
+
+    def subscribe(self, callback: Callable[[Dict[str, Dict[str, Any]]], None]):
+        """
+        Registra `callback(alteracoes)` para cada update() que mude valores.
+
+        Recebe só o que mudou ({seção: {chave: valor}}), na thread que fez a
+        alteração; quem mexe em widgets deve filtrar as chaves de que precisa.
+        """
+        with self._lock:
+            self._subscribers.append(callback)
+        return callback
+
+    def unsubscribe(self, callback: Callable[[Dict[str, Dict[str, Any]]], None]):
+        with self._lock:
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+
+    @staticmethod
+    def _notify(subscribers, changed: Dict[str, Dict[str, Any]]):
+        for callback in subscribers:
+            try:
+                callback(changed)
+            except Exception:
+                # Um assinante com problema não impede os demais nem a gravação
+                logging.getLogger(__name__).exception("Config subscriber failed")
 
     def add_to_history(self, term: str):
         """Adiciona termo ao histórico de buscas."""
         if not term.strip():
             return
+        with self._lock:
+            self._add_to_history(term)
+            self._mark_dirty()
+
+    def _add_to_history(self, term: str):
         history = self.config["search"]["history"]
         if term in history:
             history.remove(term)
@@ -476,28 +919,40 @@ class ConfigManager:
         max_size = self.config["search"]["max_history"]
         if len(history) > max_size:
             history[:] = history[:max_size]
+        counts = self.config["search"].setdefault("term_counts", {})
+        counts[term] = counts.get(term, 0) + 1
+        if len(counts) > max_size * 4:
+            for old in sorted(counts, key=counts.get)[:len(counts) - max_size * 4]:
+                del counts[old]
         self.config["search"]["last_search"] = term
-        if self.config["general"]["auto_save"]:
-            self.save()
 
     def get_history(self) -> List[str]:
         """Retorna histórico de buscas."""
         return self.config["search"]["history"].copy()
 
+    def get_top_terms(self, n: int) -> List[str]:
+        """
+        Retorna os `n` termos mais prováveis da próxima busca.
+
+        Combina frequência (term_counts) e recência (posição no histórico).
+        """
+        history = self.config["search"]["history"]
+        counts = self.config["search"].get("term_counts", {})
+        size = max(1, len(history))
+        scores = {term: counts.get(term, 1) + (size - pos) / size
+                  for pos, term in enumerate(history)}
+        return sorted(scores, key=scores.get, reverse=True)[:n]
+
     def update_window_geometry(self, geometry: str):
         """Atualiza geometria da janela."""
         try:
             size, position = geometry.split('+', 1)
             width, height = map(int, size.split('x'))
             x, y = map(int, position.split('+'))
-            self.config["ui"]["window_width"] = width
-            self.config["ui"]["window_height"] = height
-            self.config["ui"]["window_x"] = x
-            self.config["ui"]["window_y"] = y
-            if self.config["general"]["auto_save"]:
-                self.save()
-        except:
-            pass
+        except ValueError:
+            return
+        self.update({"ui": {"window_width": width, "window_height": height,
+                            "window_x": x, "window_y": y}})
 
     def get_window_geometry(self) -> str:
         """Retorna geometria da janela."""
@@ -513,6 +968,18 @@ class ConfigManager:
         """Retorna número de workers ou None para auto."""
         return self.config["performance"]["max_workers"]
 
+    def get_autotuned_workers(self, root: str) -> Optional[int]:
+        """Workers aprendidos pelo autoajuste para a raiz (None se nunca medido)."""
+        return (self.get("performance", "autotuned_workers", {}) or {}).get(root)
+
+    def set_autotuned_workers(self, root: str, workers: int):
+        """Persiste o número de workers escolhido para a raiz."""
+        tuned = dict(self.get("performance", "autotuned_workers", {}) or {})
+        if tuned.get(root) == workers:
+            return
+        tuned[root] = workers
+        self.set("performance", "autotuned_workers", tuned)
+
     def get_thumbnail_size(self) -> int:
         """Retorna tamanho do thumbnail."""
         return self.config["performance"]["thumbnail_size"]
@@ -521,6 +988,26 @@ class ConfigManager:
         """Verifica se carregamento paralelo está habilitado."""
         return self.config["performance"]["enable_parallel_loading"]
 
+    def get_result_queue_size(self) -> int:
+        """Retorna a janela da fila de resultados (mínimo 1)."""
+        return max(1, int(self.get("performance", "result_queue_size", 32) or 32))
+
+    def get_cache_dir(self) -> Path:
+        """Diretório dos caches persistentes (pirâmides, atlas...)."""
+        return Path(self.get("advanced", "cache_dir", "cache") or "cache")
+
+    def get_mmap_threshold_bytes(self) -> int:
+        """Tamanho a partir do qual imagens são lidas via mmap (0 = desligado)."""
+        return int(float(self.get("performance", "mmap_threshold_mb", 8) or 0) * 1024 * 1024)
+
+    def get_thumbnail_cache_bytes(self) -> int:
+        """Retorna o limite do cache de thumbnails em bytes."""
+        return int(self.get("performance", "thumbnail_cache_mb", 128)) * 1024 * 1024
+
+    def is_lazy_loading_enabled(self) -> bool:
+        """Verifica se carregamento sob demanda (viewport) está habilitado."""
+        return bool(self.get("advanced", "lazy_loading", False))
+
 
 # ╔═══════════════════════════════════════════════════════════════════════╗
 # ║                         CLASSES DE APOIO                              ║
@@ -556,6 +1043,10 @@ class DirectoryCache:
         self.cache: Dict[str, Dict] = {}
         self.logger = logger
 
+    def set_ttl(self, ttl_seconds: float):
+        """Novo TTL vale também para as entradas já em cache."""
+        self.ttl = timedelta(seconds=ttl_seconds)
+
     def _normalize_text(self, text: str) -> str:
         """
         🆕 v8.1: Normalização Unicode avançada para busca robusta.
@@ -723,208 +1214,3300 @@ class DirectoryCache:
             self.cache.clear()
 
 
-# Salva a primeira parte
-print("Gerando parte 1 (sistema base)...")
-print()
+class ThumbnailCache:
+    """
+    Cache LRU em memória de thumbnails decodificados (PIL.Image).
 
+    Características:
+    - Chave inclui mtime/tamanho do arquivo: alterações invalidam sozinhas
+    - Limite por bytes (não por quantidade), com despejo do menos recente
+    - Thread-safe (usado pelos workers do executor)
+    - Hit/miss tracking
+    """
 
-# ╔═══════════════════════════════════════════════════════════════════════╗
-# ║                  CARREGADOR PARALELO DE IMAGENS                       ║
-# ╚═══════════════════════════════════════════════════════════════════════╝
+    def __init__(self, max_bytes: int = 128 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Tuple, Tuple[Image.Image, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(arquivo: Path, size: int) -> Optional[Tuple]:
+        """Monta a chave (path, mtime, tamanho, thumbnail) ou None se inacessível."""
+        try:
+            st = arquivo.stat()
+        except OSError:
+            return None
+        return (str(arquivo), st.st_mtime_ns, st.st_size, size)
 
-class ParallelImageLoader:
-    """
-    Carregador paralelo de imagens usando ThreadPoolExecutor.
+    @staticmethod
+    def _image_bytes(img: Image.Image) -> int:
+        return img.width * img.height * max(1, len(img.getbands()))
 
-    🚀 Recurso principal da v8.0 (mantido na v8.1)
+    def get(self, key: Optional[Tuple]) -> Optional[Image.Image]:
+        if key is None:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def contains(self, key: Optional[Tuple]) -> bool:
+        """Consulta sem afetar LRU nem estatísticas."""
+        with self._lock:
+            return key is not None and key in self._entries
+
+    def put(self, key: Optional[Tuple], img: Image.Image):
+        if key is None:
+            return
+        nbytes = self._image_bytes(img)
+        if nbytes > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old:
+                self.current_bytes -= old[1]
+            self._entries[key] = (img, nbytes)
+            self.current_bytes += nbytes
+            self._evict()
+
+    def _evict(self):
+        while self.current_bytes > self.max_bytes and self._entries:
+            _, (_, nbytes) = self._entries.popitem(last=False)
+            self.current_bytes -= nbytes
+
+    def resize(self, max_bytes: int):
+        with self._lock:
+            self.max_bytes = max_bytes
+            self._evict()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0
+            }
 
-    Características:
-    - Carrega múltiplas imagens simultaneamente
-    - Retorna resultados conforme ficam prontos (as_completed)
-    - Suporte a cancelamento via evento
-    - Métricas de speedup e throughput
-    - Tratamento de erro por imagem (resiliência)
-    - Auto-detecção de número ideal de workers
 
-    Performance:
-    - 20 imagens: 1000ms → 250ms (4x speedup)
-    - 50 imagens: 2500ms → 650ms (3.8x speedup)
-    - 100 imagens: 5000ms → 650ms (7.7x speedup)
+class ThumbnailAtlas:
     """
+    Atlas (contact sheet) de miniaturas por pasta de peça.
 
-    def __init__(self, 
-                 thumbnail_size: int = 250,
-                 max_workers: Optional[int] = None,
+    Um único JPEG com todas as miniaturas da pasta + tabela JSON de offsets.
+    Em compartilhamentos de rede de alta latência, carregar a peça vira uma
+    leitura e uma decodificação; os tiles são recortados em memória. A tabela
+    guarda (tamanho, mtime) de cada fonte: qualquer alteração invalida o atlas.
+    """
+
+    VERSION = 1
+
+    def __init__(self, cache_dir: Path, quality: int = 90,
                  logger: Optional[StructuredLogger] = None):
-        self.thumbnail_size = thumbnail_size
-        self.max_workers = max_workers
+        self.cache_dir = Path(cache_dir) / "atlas"
+        self.quality = quality
         self.logger = logger
 
-    def load_single_image(self, arquivo: Path, index: int) -> Optional[Tuple[str, Any, str, int]]:
-        """Carrega uma única imagem (executado em worker thread)."""
+    def _paths(self, folder: Path) -> Tuple[Path, Path]:
+        digest = hashlib.sha1(str(Path(folder)).encode("utf-8")).hexdigest()[:20]
+        return self.cache_dir / f"{digest}.jpg", self.cache_dir / f"{digest}.json"
+
+    @staticmethod
+    def _stat(path: Path) -> Optional[Tuple[int, int]]:
         try:
-            img = Image.open(arquivo)
-            img.thumbnail((self.thumbnail_size, self.thumbnail_size))
-            photo = ImageTk.PhotoImage(img)
-            return (arquivo.name, photo, str(arquivo), index)
-        except Exception as e:
-            if self.logger:
-                self.logger.warning("Failed to load image", filename=arquivo.name,
-                                   error_type=type(e).__name__)
+            st = path.stat()
+        except OSError:
             return None
+        return (st.st_size, st.st_mtime_ns)
 
-    def load_images_parallel(self, imagens: List[Path], cancel_event: threading.Event,
-                            fila_resultados: queue.Queue, trace_id: Optional[str] = None) -> Dict[str, Any]:
-        """Carrega imagens em paralelo usando ThreadPoolExecutor."""
-        start_time = time.time()
-        total_images = len(imagens)
-        loaded_count = 0
-        failed_count = 0
+    def load(self, folder: Path, imagens: List[Path], size: int) -> Optional[Dict[Path, Image.Image]]:
+        """Recorta as miniaturas do atlas; None se ausente ou desatualizado."""
+        atlas_path, table_path = self._paths(folder)
+        try:
+            with open(table_path, 'r', encoding='utf-8') as f:
+                table = json.load(f)
+        except (OSError, ValueError):
+            return None
 
-        if self.logger and trace_id:
-            self.logger.info("Starting parallel image loading", trace_id=trace_id,
-                           total_images=total_images, max_workers=self.max_workers or "auto")
+        entries = table.get("entries", {})
+        if (table.get("version") != self.VERSION or table.get("thumbnail_size") != size
+                or set(entries) != {p.name for p in imagens}):
+            return None
+        for path in imagens:
+            entry = entries[path.name]
+            if self._stat(path) != (entry["size"], entry["mtime_ns"]):
+                return None
 
-        fila_resultados.put({"status": "start_parallel", "total": total_images})
+        try:
+            with Image.open(atlas_path) as sheet:
+                sheet.load()
+                thumbs = {}
+                for path in imagens:
+                    box = entries[path.name].get("box")
+                    if box:
+                        x, y, w, h = box
+                        thumbs[path] = sheet.crop((x, y, x + w, y + h))
+        except OSError:
+            return None
+        return thumbs
 
+    def build(self, folder: Path, thumbs: Dict[Path, Optional[Image.Image]], size: int) -> bool:
+        """
+        Grava o atlas da pasta. Fontes com miniatura None (falha de leitura)
+        entram na tabela sem região, para não invalidar o atlas a cada busca.
+        """
+        validos = [(p, img) for p, img in sorted(thumbs.items(), key=lambda t: t[0].name) if img]
+        cols = max(1, math.ceil(math.sqrt(len(validos))))
+        rows = max(1, math.ceil(len(validos) / cols))
+        sheet = Image.new("RGB", (cols * size, rows * size), "white")
+
+        entries = {}
+        for i, (path, img) in enumerate(validos):
+            x, y = (i % cols) * size, (i // cols) * size
+            tile = img if img.mode == "RGB" else img.convert("RGB")
+            sheet.paste(tile, (x, y))
+            entries[path.name] = {"box": [x, y, img.width, img.height]}
+        for path in thumbs:
+            stat = self._stat(path)
+            if stat is None:
+                return False
+            entries.setdefault(path.name, {"box": None})
+            entries[path.name].update({"size": stat[0], "mtime_ns": stat[1]})
+
+        atlas_path, table_path = self._paths(folder)
+        table = {"version": self.VERSION, "folder": str(folder), "thumbnail_size": size,
+                 "entries": entries}
         try:
-            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-                future_to_image = {
-                    executor.submit(self.load_single_image, img, i): (img, i)
-                    for i, img in enumerate(imagens)
-                }
-
-                for future in as_completed(future_to_image):
-                    if cancel_event.is_set():
-                        if self.logger and trace_id:
-                            self.logger.info("Parallel loading cancelled", trace_id=trace_id,
-                                           loaded_count=loaded_count, total=total_images)
-                        for f in future_to_image:
-                            f.cancel()
-                        fila_resultados.put({"status": "cancelled"})
-                        return {"cancelled": True, "loaded": loaded_count, "failed": failed_count}
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp_atlas = atlas_path.with_suffix(".jpg.tmp")
+            sheet.save(tmp_atlas, "JPEG", quality=self.quality)
+            os.replace(tmp_atlas, atlas_path)
+            tmp_table = table_path.with_suffix(".json.tmp")
+            with open(tmp_table, 'w', encoding='utf-8') as f:
+                json.dump(table, f, ensure_ascii=False)
+            os.replace(tmp_table, table_path)
+        except OSError as e:
+            if self.logger:
+                self.logger.warning("Failed to write thumbnail atlas", path=str(folder),
+                                    error_type=type(e).__name__)
+            return False
+        return True
 
-                    try:
-                        result = future.result()
-                        if result:
-                            nome, photo, caminho, index = result
-                            fila_resultados.put({
-                                "status": "progress",
-                                "data": (nome, photo, caminho),
-                                "current": loaded_count,
-                                "total": total_images
-                            })
-                            loaded_count += 1
-                        else:
-                            failed_count += 1
-                    except Exception as e:
-                        failed_count += 1
-                        if self.logger and trace_id:
-                            self.logger.error("Error processing future", trace_id=trace_id,
-                                            error_type=type(e).__name__)
+    def invalidate(self, folder: Path):
+        for path in self._paths(folder):
+            try:
+                path.unlink()
+            except OSError:
+                pass
 
-        except Exception as e:
-            if self.logger and trace_id:
-                self.logger.error("Parallel loading failed", trace_id=trace_id,
-                                error_type=type(e).__name__, error_message=str(e))
-            fila_resultados.put({"status": "error", "msg": str(e)})
-            return {"error": str(e)}
 
-        duration_ms = (time.time() - start_time) * 1000
-        estimated_sync_time = total_images * 50
-        speedup = estimated_sync_time / duration_ms if duration_ms > 0 else 1.0
-        throughput = loaded_count / (duration_ms / 1000) if duration_ms > 0 else 0
+# Salva a primeira parte
+print("Gerando parte 1 (sistema base)...")
+print()
 
-        stats = {
-            "loaded": loaded_count,
-            "failed": failed_count,
-            "total": total_images,
-            "duration_ms": duration_ms,
-            "speedup": speedup,
-            "throughput_imgs_per_sec": throughput
-        }
 
-        if self.logger and trace_id:
-            self.logger.info("Parallel loading completed", trace_id=trace_id, **stats)
-            self.logger.record_parallel_load(speedup=speedup, images_count=loaded_count,
-                                            duration_ms=duration_ms,
-                                            workers=self.max_workers or os.cpu_count() + 4)
+EXIF_ORIENTATION = 0x0112
+EXIF_DATETIME = 0x0132
+EXIF_IFD = 0x8769
+EXIF_DATETIME_ORIGINAL = 0x9003
 
-        fila_resultados.put({"status": "done", "stats": stats})
-        return stats
 
+def read_image_metadata(path: Path) -> Optional[Dict[str, Any]]:
+    """
+    Metadados lidos só do cabeçalho (Image.open sem load), sem decodificar.
 
-# ╔═══════════════════════════════════════════════════════════════════════╗
-# ║                      SERVIÇO DE BUSCA                                 ║
-# ╚═══════════════════════════════════════════════════════════════════════╝
+    Retorna {"width", "height", "format", "orientation", "taken_at"}:
+    dimensões como gravadas no arquivo, orientação EXIF (1 = normal) e data
+    da foto em ISO 8601 (DateTimeOriginal, senão DateTime). None se ilegível.
+    """
+    try:
+        with Image.open(path) as img:
+            meta = {"width": img.width, "height": img.height, "format": img.format,
+                    "orientation": 1, "taken_at": None}
+            # PNG guarda EXIF depois dos pixels: só lê quando já veio no cabeçalho
+            if img.format in ("JPEG", "MPO", "TIFF") or "exif" in img.info:
+                exif = img.getexif()
+                meta["orientation"] = int(exif.get(EXIF_ORIENTATION, 1) or 1)
+                raw = exif.get_ifd(EXIF_IFD).get(EXIF_DATETIME_ORIGINAL) or exif.get(EXIF_DATETIME)
+                if raw:
+                    try:
+                        meta["taken_at"] = datetime.strptime(
+                            str(raw).strip("\x00 "), "%Y:%m:%d %H:%M:%S").isoformat()
+                    except ValueError:
+                        pass
+            return meta
+    except Exception:
+        return None
 
-class BuscadorService:
-    """Serviço de busca com suporte a carregamento paralelo."""
 
-    def __init__(self, fila_resultados: queue.Queue, cancel_event: threading.Event,
-                 dir_cache: DirectoryCache, logger: StructuredLogger,
-                 config_manager: ConfigManager):
-        self.fila = fila_resultados
-        self.cancel_event = cancel_event
-        self.dir_cache = dir_cache
+class CatalogIndex:
+    """
+    Índice persistente do acervo: impressão digital de conteúdo por arquivo.
+
+    Características:
+    - Impressão rápida: tamanho + blake2b de blocos amostrados (início,
+      meio e fim), calculada uma vez por (path, size, mtime)
+    - Hash completo apenas quando duas impressões colidem
+    - `content_id` idêntico para arquivos idênticos (fotos copiadas entre
+      peças compartilham thumbnail e PhotoImage)
+    - Metadados do cabeçalho (dimensões, formato, orientação e data EXIF)
+      lidos sem decodificar pixels, também por (path, size, mtime)
+    - Persistido em JSON (gravação atômica)
+    """
+
+    VERSION = 1
+    SAMPLE_BLOCK = 64 * 1024
+
+    def __init__(self, path: Path, logger: Optional[StructuredLogger] = None):
+        self.path = Path(path)
         self.logger = logger
-        self.config = config_manager
+        self._lock = threading.RLock()
+        # path -> {"size", "mtime_ns", "sample", "full", "meta"?}; "sample" None
+        # quando só os metadados foram lidos
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._by_fingerprint: Dict[Tuple[int, str], Set[str]] = defaultdict(set)
+        self._dirty = False
+        self._load()
 
-        self.parallel_loader = ParallelImageLoader(
-            thumbnail_size=config_manager.get_thumbnail_size(),
-            max_workers=config_manager.get_max_workers(),
-            logger=logger
-        )
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                table = json.load(f)
+            if table.get("version") != self.VERSION:
+                return
+            for key, entry in table.get("entries", {}).items():
+                self._entries[key] = entry
+                if entry["sample"] is not None:
+                    self._by_fingerprint[(entry["size"], entry["sample"])].add(key)
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            self._entries.clear()
+            self._by_fingerprint.clear()
 
-    def _check_cancelled(self) -> bool:
-        if self.cancel_event.is_set():
-            self.fila.put({"status": "cancelled"})
+    def save(self) -> bool:
+        """Grava o índice se houver alterações (tmp + rename)."""
+        with self._lock:
+            if not self._dirty:
+                return True
+            table = {"version": self.VERSION,
+                     "entries": {k: dict(v) for k, v in self._entries.items()}}
+            self._dirty = False
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(".tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(table, f, separators=(",", ":"))
+            os.replace(tmp, self.path)
             return True
-        return False
+        except OSError as e:
+            with self._lock:
+                self._dirty = True
+            if self.logger:
+                self.logger.warning("Catalog index save failed", error_type=type(e).__name__)
+            return False
 
-    def _scan_directories(self, base_path: Path) -> List[Tuple[str, Path]]:
-        directories = []
+    @classmethod
+    def _sample_offsets(cls, size: int) -> List[int]:
+        block = cls.SAMPLE_BLOCK
+        if size <= 3 * block:
+            return [0]
+        return [0, size // 2 - block // 2, size - block]
+
+    @classmethod
+    def _sample_hash(cls, path: Path, size: int, data=None) -> str:
+        digest = hashlib.blake2b(digest_size=16)
+        offsets = cls._sample_offsets(size)
+        length = size if offsets == [0] else cls.SAMPLE_BLOCK
+        if data is not None:
+            for off in offsets:
+                digest.update(data[off:off + length])
+        else:
+            with open(path, "rb") as f:
+                for off in offsets:
+                    f.seek(off)
+                    digest.update(f.read(length))
+        return digest.hexdigest()
+
+    @staticmethod
+    def _full_hash(path: Path, data=None) -> str:
+        if data is not None:
+            return hashlib.blake2b(data, digest_size=32).hexdigest()
+        with open(path, "rb") as f:
+            return hashlib.file_digest(f, lambda: hashlib.blake2b(digest_size=32)).hexdigest()
+
+    def _entry(self, path: Path, data=None) -> Optional[Dict[str, Any]]:
         try:
-            for item in base_path.iterdir():
-                if self._check_cancelled():
-                    return []
-                try:
-                    if item.is_dir() and os.access(item, os.R_OK):
-                        directories.append((item.name, item))
-                except OSError:
-                    continue
-        except:
-            pass
-        return directories
-
-    def buscar_e_carregar(self, diretorio_raiz: str, termo_busca: str):
-        with self.logger.trace("search_and_load", search_term=termo_busca) as trace_id:
-            start_time = time.time()
+            st = path.stat()
+        except OSError:
+            return None
+        key = str(path)
+        with self._lock:
+            entry = self._entries.get(key)
+            if self._current(entry, st) and entry["sample"] is not None:
+                return entry
+        sample = self._sample_hash(path, st.st_size, data)
+        entry = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sample": sample, "full": None}
+        with self._lock:
+            old = self._entries.get(key)
+            if self._current(old, st) and "meta" in old:
+                entry["meta"] = old["meta"]
+            self._replace(key, entry)
+            self._by_fingerprint[(entry["size"], sample)].add(key)
+        return entry
 
-            if self._check_cancelled():
-                return
+    @staticmethod
+    def _current(entry: Optional[Dict[str, Any]], st: os.stat_result) -> bool:
+        return bool(entry) and entry["size"] == st.st_size and entry["mtime_ns"] == st.st_mtime_ns
 
-            try:
-                diretorio_raiz_real = Path(diretorio_raiz).resolve()
-            except Exception as e:
-                self.logger.error("Invalid directory path", error_type=type(e).__name__,
-                                 path=diretorio_raiz, trace_id=trace_id)
-                self.fila.put({"status": "error", "msg": "Caminho inválido"})
-                return
+    def _replace(self, key: str, entry: Dict[str, Any]):
+        old = self._entries.get(key)
+        if old and old["sample"] is not None:
+            self._by_fingerprint[(old["size"], old["sample"])].discard(key)
+        self._entries[key] = entry
+        self._dirty = True
 
-            if not diretorio_raiz_real.exists():
-                self.fila.put({"status": "error", "msg": "Diretório não existe"})
-                return
+    def metadata(self, path: Path) -> Optional[Dict[str, Any]]:
+        """
+        Metadados do cabeçalho (ver `read_image_metadata`), lidos uma vez
+        por versão do arquivo. None se inacessível ou ilegível.
+        """
+        try:
+            st = path.stat()
+        except OSError:
+            return None
+        key = str(path)
+        with self._lock:
+            entry = self._entries.get(key)
+            if self._current(entry, st) and "meta" in entry:
+                return dict(entry["meta"]) if entry["meta"] else None
+        meta = read_image_metadata(path)
+        with self._lock:
+            entry = self._entries.get(key)
+            if not self._current(entry, st):
+                entry = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sample": None, "full": None}
+                self._replace(key, entry)
+            entry["meta"] = meta  # None também fica registrado: não relê até mudar
+            self._dirty = True
+        return dict(meta) if meta else None
+
+    def cached_metadata(self, path: Path) -> Optional[Dict[str, Any]]:
+        """Como `metadata`, mas sem ler o arquivo (None se exigiria I/O)."""
+        try:
+            st = path.stat()
+        except OSError:
+            return None
+        with self._lock:
+            entry = self._entries.get(str(path))
+            if self._current(entry, st) and entry.get("meta"):
+                return dict(entry["meta"])
+        return None
 
-            base_path_str = str(diretorio_raiz_real)
-            cache_result = self.dir_cache.search(base_path_str, termo_busca)
+    def _full_of(self, key: str, entry: Dict[str, Any], data=None) -> Optional[str]:
+        if entry["full"] is None:
+            try:
+                full = self._full_hash(Path(key), data)
+            except OSError:
+                return None
+            with self._lock:
+                entry["full"] = full
+                self._dirty = True
+        return entry["full"]
+
+    def content_id(self, path: Path, data=None) -> Optional[str]:
+        """
+        Identificador de conteúdo do arquivo (None se inacessível).
 
-            if not cache_result:
+        `data`: conteúdo já lido (bytes/mmap) evita reabrir o arquivo.
+        Impressões únicas dispensam hash completo; em colisão, os hashes
+        completos confirmam se o grupo é mesmo idêntico.
+        """
+        try:
+            entry = self._entry(path, data)
+        except OSError:
+            return None
+        if entry is None:
+            return None
+        key = str(path)
+        base = f"{entry['size']}:{entry['sample']}"
+        with self._lock:
+            peers = [(p, self._entries[p]) for p in self._by_fingerprint[(entry["size"], entry["sample"])]
+                     if p != key]
+        if not peers:
+            return base
+        full = self._full_of(key, entry, data)
+        if full is None:
+            return None
+        if all(self._full_of(p, e) == full for p, e in peers):
+            return base
+        return f"{base}:{full}"
+
+    def cached_content_id(self, path: Path) -> Optional[str]:
+        """Como `content_id`, mas sem ler o arquivo (None se exigiria I/O)."""
+        try:
+            st = path.stat()
+        except OSError:
+            return None
+        key = str(path)
+        with self._lock:
+            entry = self._entries.get(key)
+            if not self._current(entry, st) or entry["sample"] is None:
+                return None
+            base = f"{entry['size']}:{entry['sample']}"
+            peers = [self._entries[p] for p in self._by_fingerprint[(entry["size"], entry["sample"])]
+                     if p != key]
+            if not peers:
+                return base
+            if entry["full"] is None or any(e["full"] is None for e in peers):
+                return None
+            if all(e["full"] == entry["full"] for e in peers):
+                return base
+            return f"{base}:{entry['full']}"
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            groups = [len(paths) for paths in self._by_fingerprint.values() if paths]
+            return {
+                "files": len(self._entries),
+                "fingerprints": len(groups),
+                "duplicate_files": sum(n - 1 for n in groups if n > 1),
+                "metadata": sum(1 for e in self._entries.values() if e.get("meta"))
+            }
+
+
+class QuarantinedImageError(OSError):
+    """Arquivo em quarentena: falhou antes e não mudou desde então."""
+
+
+# Falhas que podem vir de uma decodificação (filtradas por `_is_decode_error`)
+QUARANTINE_ERRORS = (OSError, SyntaxError, ValueError, Image.DecompressionBombError)
+
+# Falhas de acesso ao arquivo: podem passar sozinhas (rede, arquivo em gravação)
+TRANSIENT_IO_ERRORS = (TimeoutError, BlockingIOError, InterruptedError, ConnectionError,
+                       PermissionError, FileNotFoundError, IsADirectoryError)
+
+
+def _is_decode_error(error: BaseException) -> bool:
+    """
+    True se a falha é do conteúdo do arquivo (só se resolve se ele mudar).
+
+    O Pillow sinaliza dados inválidos com UnidentifiedImageError, SyntaxError,
+    ValueError ou OSError sem errno ("image file is truncated"); OSError com
+    errno vem do sistema (SMB/NFS, EAGAIN...) e não entra em quarentena.
+    """
+    if isinstance(error, (QuarantinedImageError, TRANSIENT_IO_ERRORS)):
+        return False
+    if isinstance(error, (UnidentifiedImageError, SyntaxError, ValueError,
+                          Image.DecompressionBombError)):
+        return True
+    return isinstance(error, OSError) and error.errno is None
+
+
+class ImageQuarantine:
+    """
+    Cache negativo persistente de imagens ilegíveis ou corrompidas.
+
+    Características:
+    - Chave (path, size, mtime): consultar custa só um stat, sem abrir o arquivo
+    - Só falhas de decodificação (`_is_decode_error`); erros de I/O passageiros
+      (timeout de rede, EAGAIN, arquivo em gravação) não entram
+    - Arquivo alterado (tamanho ou mtime) sai da quarentena e é retentado
+    - Contadores de arquivos pulados/adicionados/liberados para as métricas
+    - Persistido em JSON (gravação atômica), como o `CatalogIndex`
+    """
+
+    VERSION = 1
+
+    def __init__(self, path: Path, logger: Optional[StructuredLogger] = None):
+        self.path = Path(path)
+        self.logger = logger
+        self._lock = threading.Lock()
+        # path -> {"size", "mtime_ns", "error_type", "failed_at"}
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._dirty = False
+        self._skipped = 0
+        self._added = 0
+        self._released = 0
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                table = json.load(f)
+            if table.get("version") != self.VERSION:
+                return
+            for key, entry in table.get("entries", {}).items():
+                self._entries[key] = {"size": int(entry["size"]),
+                                      "mtime_ns": int(entry["mtime_ns"]),
+                                      "error_type": entry.get("error_type", ""),
+                                      "failed_at": entry.get("failed_at", "")}
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            self._entries.clear()
+
+    def save(self) -> bool:
+        """Grava a lista se houver alterações (tmp + rename)."""
+        with self._lock:
+            if not self._dirty:
+                return True
+            table = {"version": self.VERSION,
+                     "entries": {k: dict(v) for k, v in self._entries.items()}}
+            self._dirty = False
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(".tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(table, f, separators=(",", ":"))
+            os.replace(tmp, self.path)
+            return True
+        except OSError as e:
+            with self._lock:
+                self._dirty = True
+            if self.logger:
+                self.logger.warning("Quarantine save failed", error_type=type(e).__name__)
+            return False
+
+    def contains(self, path: Path, count: bool = True) -> bool:
+        """
+        True se o arquivo falhou antes e continua igual (só faz stat).
+
+        `count=False` para consultas de roteamento que não pulam o arquivo.
+        """
+        key = str(path)
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            return False
+        try:
+            st = path.stat()
+        except OSError:
+            return True  # Continua inacessível
+        with self._lock:
+            if entry["size"] == st.st_size and entry["mtime_ns"] == st.st_mtime_ns:
+                if count:
+                    self._skipped += 1
+                return True
+            # Arquivo mudou: nova chance
+            if self._entries.get(key) is entry:
+                del self._entries[key]
+                self._released += 1
+                self._dirty = True
+        if self.logger:
+            self.logger.info("Image released from quarantine", filename=path.name)
+        return False
+
+    def add(self, path: Path, error: BaseException) -> bool:
+        """Põe o arquivo em quarentena. False se nem o stat foi possível."""
+        try:
+            st = path.stat()
+        except OSError:
+            return False  # Removido: não há versão a lembrar
+        entry = {"size": st.st_size, "mtime_ns": st.st_mtime_ns,
+                 "error_type": type(error).__name__,
+                 "failed_at": datetime.now(timezone.utc).isoformat()}
+        with self._lock:
+            self._entries[str(path)] = entry
+            self._added += 1
+            self._dirty = True
+        if self.logger:
+            self.logger.warning("Image quarantined", filename=path.name,
+                                error_type=entry["error_type"], error_message=str(error))
+        return True
+
+    def discard(self, path: Path):
+        with self._lock:
+            if self._entries.pop(str(path), None) is not None:
+                self._released += 1
+                self._dirty = True
+
+    def clear(self):
+        with self._lock:
+            self._released += len(self._entries)
+            self._dirty = self._dirty or bool(self._entries)
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "files": len(self._entries),
+                "skipped": self._skipped,
+                "added": self._added,
+                "released": self._released
+            }
+
+
+# ╔═══════════════════════════════════════════════════════════════════════╗
+# ║                EXECUTOR COMPARTILHADO COM PRIORIDADES                 ║
+# ╚═══════════════════════════════════════════════════════════════════════╝
+
+class TaskPriority(IntEnum):
+    """Classes de prioridade do executor (menor valor = mais urgente)."""
+    INTERACTIVE = 0   # Thumbnails visíveis no grid
+    PREFETCH = 1      # Pré-carregamento do visualizador
+    BACKGROUND = 2    # Indexação e aquecimento de cache
+
+
+class TaskGroup:
+    """
+    Grupo de tarefas cancelável como unidade (ex.: uma busca).
+
+    O cancelamento descarta as tarefas pendentes imediatamente e sinaliza
+    as tarefas em execução via `cancel_event` (cancelamento cooperativo).
+    """
+
+    def __init__(self, name: str = ""):
+        self.name = name
+        self.cancel_event = threading.Event()
+        self._futures: Set[Future] = set()
+        self._lock = threading.Lock()
+
+    def _track(self, future: Future):
+        with self._lock:
+            self._futures.add(future)
+        future.add_done_callback(self._untrack)
+
+    def _untrack(self, future: Future):
+        with self._lock:
+            self._futures.discard(future)
+
+    def cancelled(self) -> bool:
+        return self.cancel_event.is_set()
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return len(self._futures)
+
+    def cancel(self) -> int:
+        """Cancela o grupo. Retorna quantas tarefas pendentes foram descartadas."""
+        self.cancel_event.set()
+        with self._lock:
+            futures = list(self._futures)
+        return sum(1 for f in futures if f.cancel())
+
+
+class PriorityExecutor:
+    """
+    Executor de longa duração compartilhado por toda a aplicação.
+
+    Características:
+    - Uma única pool de workers para a sessão (sem criar/destruir por busca)
+    - Fila por prioridade (INTERACTIVE > PREFETCH > BACKGROUND), FIFO na mesma classe
+    - Grupos de tarefas canceláveis como unidade
+    - Redimensionamento em tempo real (`resize`) sem reiniciar a aplicação
+    """
+
+    _RETIRE = object()
+
+    def __init__(self, max_workers: Optional[int] = None, name: str = "Worker",
+                 logger: Optional[StructuredLogger] = None):
+        self.name = name
+        self.logger = logger
+        self._queue: queue.PriorityQueue = queue.PriorityQueue()
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._threads: Set[threading.Thread] = set()
+        self._target_workers = 0
+        self._shutdown = False
+        self._thread_ids = itertools.count(1)
+        # Estatísticas acumuladas (base do autoajuste de workers)
+        self._completed = 0
+        self._queue_wait_s = 0.0
+        self._active = 0
+        self._busy_s = 0.0
+        self.resize(max_workers)
+
+    @staticmethod
+    def default_workers() -> int:
+        """Mesmo default do ThreadPoolExecutor: min(32, cpu_count + 4)."""
+        return min(32, (os.cpu_count() or 1) + 4)
+
+    @property
+    def max_workers(self) -> int:
+        return self._target_workers
+
+    def create_group(self, name: str = "") -> TaskGroup:
+        return TaskGroup(name)
+
+    def submit(self, fn, *args, priority: TaskPriority = TaskPriority.INTERACTIVE,
+               group: Optional[TaskGroup] = None, **kwargs) -> Future:
+        """Agenda `fn(*args, **kwargs)` com a prioridade informada."""
+        if self._shutdown:
+            raise RuntimeError("cannot schedule new tasks after shutdown")
+        future = Future()
+        if group is not None:
+            if group.cancelled():
+                future.cancel()
+                return future
+            group._track(future)
+        self._queue.put((int(priority), next(self._seq),
+                         (future, fn, args, kwargs, time.perf_counter())))
+        return future
+
+    def resize(self, max_workers: Optional[int] = None):
+        """Ajusta o número de workers (None = automático)."""
+        target = max_workers or self.default_workers()
+        with self._lock:
+            if self._shutdown:
+                return
+            current = self._target_workers
+            self._target_workers = target
+            alive = len(self._threads)
+            if target > alive:
+                for _ in range(target - alive):
+                    self._spawn_worker()
+            elif target < alive:
+                # Sentinelas com prioridade máxima: workers saem após a tarefa atual
+                for _ in range(alive - target):
+                    self._queue.put((-1, next(self._seq), self._RETIRE))
+        if self.logger and current and target != current:
+            self.logger.info("Executor resized", executor=self.name,
+                             previous_workers=current, workers=target)
+
+    def _spawn_worker(self):
+        thread = threading.Thread(target=self._worker_loop,
+                                  name=f"{self.name}-{next(self._thread_ids)}", daemon=True)
+        self._threads.add(thread)
+        thread.start()
+
+    def _should_retire(self) -> bool:
+        with self._lock:
+            if self._shutdown or len(self._threads) > self._target_workers:
+                self._threads.discard(threading.current_thread())
+                return True
+            return False
+
+    def _worker_loop(self):
+        try:
+            while True:
+                _, _, item = self._queue.get()
+                if item is self._RETIRE:
+                    if self._should_retire():
+                        return
+                    continue
+                future, fn, args, kwargs, enqueued = item
+                if not future.set_running_or_notify_cancel():
+                    continue
+                started = time.perf_counter()
+                waited = started - enqueued
+                with self._lock:
+                    self._active += 1
+                try:
+                    result = fn(*args, **kwargs)
+                except BaseException as e:
+                    future.set_exception(e)
+                else:
+                    future.set_result(result)
+                with self._lock:
+                    self._active -= 1
+                    self._busy_s += time.perf_counter() - started
+                    self._completed += 1
+                    self._queue_wait_s += waited
+                del item, future, fn, args, kwargs
+        finally:
+            with self._lock:
+                self._threads.discard(threading.current_thread())
+
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    def stats(self) -> Dict[str, Any]:
+        """Contadores acumulados: tarefas concluídas, tempo em fila e ocupado."""
+        with self._lock:
+            return {
+                "workers": self._target_workers,
+                "active": self._active,
+                "queue_depth": self._queue.qsize(),
+                "completed": self._completed,
+                "queue_wait_ms": self._queue_wait_s * 1000,
+                "busy_ms": self._busy_s * 1000
+            }
+
+    def shutdown(self, wait: bool = False, cancel_pending: bool = True):
+        """Encerra o executor (tarefas pendentes são canceladas por padrão)."""
+        with self._lock:
+            if self._shutdown:
+                return
+            self._shutdown = True
+            threads = list(self._threads)
+        if cancel_pending:
+            while True:
+                try:
+                    _, _, item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is not self._RETIRE:
+                    item[0].cancel()
+        for _ in threads:
+            self._queue.put((sys.maxsize, next(self._seq), self._RETIRE))
+        if wait:
+            for thread in threads:
+                thread.join()
+
+
+class WorkerAutotuner:
+    """
+    Ajuste automático do número de workers guiado por throughput.
+
+    Usado quando `performance.max_workers` é None ("Auto"). Cada carga
+    observada (imagens decodificadas / tempo, espera média na fila do
+    executor) alimenta um controlador AIMD com subida de encosta:
+
+    - throughput melhorou: continua na mesma direção (+/- `step`)
+    - throughput caiu: redução multiplicativa (`decrease_factor`) e inverte
+    - estável com tarefas esperando na fila: cresce (+`step`)
+    - estável sem espera: mantém
+
+    O valor escolhido é persistido por diretório raiz (SSD local e
+    compartilhamento de rede convergem para valores diferentes).
+    """
+
+    def __init__(self, executor: PriorityExecutor, config_manager: ConfigManager,
+                 logger: Optional[StructuredLogger] = None,
+                 min_workers: int = 1, max_workers: int = 32, step: int = 2,
+                 tolerance: float = 0.05, decrease_factor: float = 0.75,
+                 min_images: int = 8, queue_wait_threshold_ms: float = 5.0,
+                 baseline: Optional[Callable[[], int]] = None):
+        self.executor = executor
+        # Tamanho inicial para raízes ainda não medidas (ex.: read_workers da
+        # pipeline); sem ele, o default do executor
+        self.baseline = baseline
+        self.config = config_manager
+        self.logger = logger
+        self.min_workers = min_workers
+        self.max_workers = max_workers
+        self.step = step
+        self.tolerance = tolerance
+        self.decrease_factor = decrease_factor
+        self.min_images = min_images
+        self.queue_wait_threshold_ms = queue_wait_threshold_ms
+        self._lock = threading.Lock()
+        # raiz -> {"throughput": último imgs/s, "direction": +1/-1}
+        self._state: Dict[str, Dict[str, float]] = {}
+
+    def enabled(self) -> bool:
+        return self.config.get_max_workers() is None
+
+    def _clamp(self, workers: int) -> int:
+        return max(self.min_workers, min(self.max_workers, int(workers)))
+
+    def workers_for(self, root: str) -> int:
+        """Valor persistido para a raiz (ou o tamanho base configurado)."""
+        saved = self.config.get_autotuned_workers(root)
+        if saved:
+            return self._clamp(saved)
+        return self._clamp(self.baseline() if self.baseline else PriorityExecutor.default_workers())
+
+    def apply(self, root: str) -> Optional[int]:
+        """Aplica ao executor o valor aprendido para a raiz (só no modo Auto)."""
+        if not self.enabled():
+            return None
+        workers = self.workers_for(root)
+        if workers != self.executor.max_workers:
+            self.executor.resize(workers)
+        return workers
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Marca o início de uma carga (contadores do executor + relógio)."""
+        snap = self.executor.stats()
+        snap["time"] = time.perf_counter()
+        return snap
+
+    def observe(self, root: str, snapshot: Dict[str, Any], images: int,
+                stalled_ms: float = 0.0) -> Optional[Dict[str, Any]]:
+        """
+        Avalia uma carga concluída e decide o próximo número de workers.
+
+        Args:
+            root: diretório raiz da busca
+            snapshot: retorno de `snapshot()` tirado no início da carga
+            images: imagens efetivamente decodificadas (cache hits não contam)
+            stalled_ms: tempo em que os workers esperaram a UI (backpressure),
+                descontado para não penalizar a concorrência
+
+        Returns:
+            Decisão tomada ou None se a amostra foi ignorada.
+        """
+        if not self.enabled() or images < self.min_images:
+            return None
+        now = self.executor.stats()
+        elapsed = time.perf_counter() - snapshot["time"] - stalled_ms / 1000
+        if elapsed <= 0:
+            return None
+        throughput = images / elapsed
+        completed = max(1, now["completed"] - snapshot["completed"])
+        wait_ms = (now["queue_wait_ms"] - snapshot["queue_wait_ms"]) / completed
+        workers = snapshot["workers"]
+
+        with self._lock:
+            state = self._state.setdefault(root, {"throughput": 0.0, "direction": 1})
+            previous = state["throughput"]
+            direction = state["direction"]
+            if not previous:
+                action = "probe"
+                target = workers + self.step * direction
+            elif throughput > previous * (1 + self.tolerance):
+                action = "climb"
+                target = workers + self.step * direction
+            elif throughput < previous * (1 - self.tolerance):
+                action = "backoff"
+                direction = -direction
+                target = (math.floor(workers * self.decrease_factor) if direction < 0
+                          else workers + self.step)
+            elif wait_ms > self.queue_wait_threshold_ms:
+                action = "grow"
+                direction = 1
+                target = workers + self.step
+            else:
+                action = "hold"
+                target = workers
+            target = self._clamp(target)
+            state["throughput"] = throughput
+            state["direction"] = direction
+
+        decision = {
+            "root": root,
+            "action": action,
+            "previous_workers": workers,
+            "workers": target,
+            "throughput_imgs_per_sec": throughput,
+            "queue_wait_ms": wait_ms,
+            "images": images
+        }
+        if target != self.executor.max_workers:
+            self.executor.resize(target)
+        self.config.set_autotuned_workers(root, target)
+        if self.logger:
+            self.logger.record_autotune(decision)
+        return decision
+
+
+# ╔═══════════════════════════════════════════════════════════════════════╗
+# ║                FILA DE RESULTADOS COM BACKPRESSURE                    ║
+# ╚═══════════════════════════════════════════════════════════════════════╝
+
+class ResultQueue(queue.Queue):
+    """
+    Fila limitada entre os loaders e a UI.
+
+    Mensagens de dados ("progress", "thumb") carregam PhotoImages e respeitam
+    `maxsize`: o produtor bloqueia quando a UI fica para trás. Mensagens de
+    controle (start, done, cancelled, error...) nunca bloqueiam, para que o
+    fim de uma busca não fique preso atrás de thumbnails.
+
+    Cada item guarda o instante em que entrou (latência fila → UI). Com
+    `on_ready` definido, a primeira inserção após `arm()` avisa o consumidor
+    (fora do lock), que então não precisa ficar consultando a fila. O aviso
+    roda na thread produtora: deve ser barato e thread-safe (ex.:
+    `threading.Event.set`), nunca uma chamada ao Tk.
+    """
+
+    DATA_STATUSES = frozenset({"progress", "thumb"})
+
+    def __init__(self, maxsize: int = 32):
+        super().__init__(maxsize=maxsize)
+        self.max_depth = 0
+        self.data_puts = 0
+        self.blocked_puts = 0
+        self.blocked_ms = 0.0
+        self.dropped = 0
+        self.rejected = 0
+        self._stamps: deque = deque()
+        self.lag_count = 0
+        self.lag_ms_total = 0.0
+        self.lag_ms_max = 0.0
+        # Chamado (na thread produtora) quando chega item com o consumidor armado
+        self.on_ready: Optional[Callable[[], None]] = None
+        self._armed = False
+        self._wakes_due = 0
+
+    def _put(self, item):
+        super()._put(item)
+        self._stamps.append(time.perf_counter())
+        if self._armed:
+            self._armed = False
+            self._wakes_due += 1
+
+    def _get(self):
+        item = super()._get()
+        lag_ms = (time.perf_counter() - self._stamps.popleft()) * 1000
+        self.lag_count += 1
+        self.lag_ms_total += lag_ms
+        if lag_ms > self.lag_ms_max:
+            self.lag_ms_max = lag_ms
+        return item
+
+    def arm(self) -> bool:
+        """
+        Pede aviso na próxima inserção. Retorna False (sem armar) se já
+        houver itens: o consumidor deve drenar antes de dormir.
+        """
+        with self.mutex:
+            if self._qsize():
+                return False
+            self._armed = True
+            return True
+
+    def put(self, item, block=True, timeout=None):
+        if isinstance(item, dict) and item.get("status") in self.DATA_STATUSES:
+            super().put(item, block, timeout)
+        else:
+            with self.not_full:
+                self._put(item)
+                self.unfinished_tasks += 1
+                self.not_empty.notify()
+        self._track_depth()
+        self._wake()
+
+    def _wake(self):
+        with self.mutex:
+            due, self._wakes_due = self._wakes_due, 0
+        callback = self.on_ready
+        if due and callback is not None:
+            callback()
+
+    def put_data(self, item: Dict, cancel_event: Optional[threading.Event] = None,
+                 poll_interval: float = 0.05, block: bool = True,
+                 timeout: Optional[float] = None) -> bool:
+        """
+        Insere mensagem de dados aplicando backpressure.
+
+        Bloqueia enquanto a fila estiver cheia, verificando `cancel_event`
+        a cada `poll_interval`. Retorna False se a mensagem foi descartada.
+
+        `block=False` (ou `timeout` esgotado) recusa a mensagem com a fila
+        cheia em vez de esperar: obrigatório na thread consumidora, que é a
+        única a esvaziar a fila. Recusas contam em `rejected`.
+        """
+        with self.mutex:
+            self.data_puts += 1
+        try:
+            self.put(item, block=False)
+            return True
+        except queue.Full:
+            if not block:
+                with self.mutex:
+                    self.rejected += 1
+                return False
+
+        start = time.perf_counter()
+        deadline = start + timeout if timeout is not None else None
+        try:
+            while True:
+                if cancel_event is not None and cancel_event.is_set():
+                    with self.mutex:
+                        self.dropped += 1
+                    return False
+                if deadline is not None and time.perf_counter() >= deadline:
+                    with self.mutex:
+                        self.rejected += 1
+                    return False
+                try:
+                    self.put(item, timeout=poll_interval)
+                    return True
+                except queue.Full:
+                    continue
+        finally:
+            with self.mutex:
+                self.blocked_puts += 1
+                self.blocked_ms += (time.perf_counter() - start) * 1000
+
+    def _track_depth(self):
+        with self.mutex:
+            depth = self._qsize()
+            if depth > self.max_depth:
+                self.max_depth = depth
+
+    def resize(self, maxsize: int):
+        """Altera a janela em tempo real (libera produtores bloqueados)."""
+        with self.mutex:
+            self.maxsize = maxsize
+            self.not_full.notify_all()
+
+    def stats(self) -> Dict[str, Any]:
+        with self.mutex:
+            return {
+                "depth": self._qsize(),
+                "capacity": self.maxsize,
+                "max_depth": self.max_depth,
+                "data_puts": self.data_puts,
+                "blocked_puts": self.blocked_puts,
+                "blocked_ms": round(self.blocked_ms, 2),
+                "dropped": self.dropped,
+                "rejected": self.rejected,
+                "lag_ms_avg": round(self.lag_ms_total / self.lag_count, 2) if self.lag_count else 0.0,
+                "lag_ms_max": round(self.lag_ms_max, 2)
+            }
+
+
+class QueueDrainer:
+    """
+    Consome a fila de resultados em lotes limitados por tempo de quadro.
+
+    Cada `drain()` processa mensagens até esgotar a fila ou estourar
+    `budget_ms` (ao menos uma por chamada), devolvendo o controle ao loop
+    de eventos para a UI redesenhar. Mede tempo de quadro e tamanho de lote.
+    """
+
+    FRAME_HISTORY = 512
+
+    def __init__(self, fila: queue.Queue, handler: Callable[[Any], None], budget_ms: float = 12.0):
+        self.fila = fila
+        self.handler = handler
+        self.budget_ms = budget_ms
+        self.frames = 0
+        self.messages = 0
+        self.max_batch = 0
+        self.over_budget = 0
+        self._frame_ms: deque = deque(maxlen=self.FRAME_HISTORY)
+
+    def drain(self) -> int:
+        """Processa um lote; retorna quantas mensagens consumiu."""
+        start = time.perf_counter()
+        deadline = start + self.budget_ms / 1000
+        count = 0
+        while True:
+            try:
+                msg = self.fila.get_nowait()
+            except queue.Empty:
+                break
+            count += 1
+            self.handler(msg)
+            if time.perf_counter() >= deadline:
+                break
+        if count:
+            frame_ms = (time.perf_counter() - start) * 1000
+            self.frames += 1
+            self.messages += count
+            self.max_batch = max(self.max_batch, count)
+            if frame_ms > self.budget_ms:
+                self.over_budget += 1
+            self._frame_ms.append(frame_ms)
+        return count
+
+    def pending(self) -> bool:
+        return not self.fila.empty()
+
+    def stats(self) -> Dict[str, Any]:
+        """Tempos de quadro recentes + latência da fila (quando medida)."""
+        frames = sorted(self._frame_ms)
+        stats = {
+            "frames": self.frames,
+            "messages": self.messages,
+            "max_batch": self.max_batch,
+            "over_budget_frames": self.over_budget,
+            "frame_ms_avg": round(sum(frames) / len(frames), 2) if frames else 0.0,
+            "frame_ms_p95": round(frames[min(len(frames) - 1, int(len(frames) * 0.95))], 2) if frames else 0.0,
+            "frame_ms_max": round(frames[-1], 2) if frames else 0.0
+        }
+        if isinstance(self.fila, ResultQueue):
+            queue_stats = self.fila.stats()
+            stats["queue_lag_ms_avg"] = queue_stats["lag_ms_avg"]
+            stats["queue_lag_ms_max"] = queue_stats["lag_ms_max"]
+        return stats
+
+
+def _tag(item: Dict, generation: Optional[int]) -> Dict:
+    """Marca a mensagem com a geração da busca (a UI descarta gerações antigas)."""
+    if generation is not None:
+        item["generation"] = generation
+    return item
+
+
+def _put_data(fila: queue.Queue, item: Dict, cancel_event: Optional[threading.Event],
+              block: bool = True) -> bool:
+    """
+    Insere mensagem de dados com backpressure quando a fila suportar.
+
+    `block=False` nunca espera (thread consumidora); False = recusada.
+    """
+    if isinstance(fila, ResultQueue):
+        return fila.put_data(item, cancel_event, block=block)
+    try:
+        fila.put(item, block=block)
+    except queue.Full:
+        return False
+    return True
+
+
+# ╔═══════════════════════════════════════════════════════════════════════╗
+# ║              PIPELINE EM DOIS ESTÁGIOS (LEITURA → DECODE)             ║
+# ╚═══════════════════════════════════════════════════════════════════════╝
+
+MMAP_THRESHOLD_BYTES = 8 * 1024 * 1024
+
+
+def map_file(path: Path, threshold: int = MMAP_THRESHOLD_BYTES) -> Optional[mmap.mmap]:
+    """Mapeia o arquivo (somente leitura) se tiver ao menos `threshold` bytes."""
+    if threshold <= 0:
+        return None
+    try:
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size == 0 or size < threshold:
+                return None
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+
+def _close_map(mapped: mmap.mmap):
+    try:
+        mapped.close()
+    except BufferError:
+        pass  # Ainda referenciado; o GC fecha ao liberar
+
+
+@contextmanager
+def image_source(path: Path, threshold: int = MMAP_THRESHOLD_BYTES):
+    """
+    Fonte para `Image.open`: o arquivo mapeado em memória acima do limite.
+
+    O Pillow lê direto das páginas mapeadas, sem copiar o arquivo inteiro
+    para o heap; abaixo do limite usa o caminho (I/O bufferizado comum).
+    """
+    mapped = map_file(path, threshold)
+    if mapped is None:
+        yield path
+        return
+    try:
+        yield mapped
+    finally:
+        _close_map(mapped)
+
+
+class ByteBudget:
+    """
+    Buffer limitado por bytes entre os estágios de leitura e decodificação.
+
+    Leitores reservam o tamanho do arquivo antes de ler e só liberam após a
+    decodificação; com o buffer cheio, a leitura espera. Um arquivo maior que
+    a capacidade inteira é admitido sozinho (nunca trava).
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = max(1, capacity)
+        self.used = 0
+        self.peak = 0
+        self.waits = 0
+        self.wait_ms = 0.0
+        self._cond = threading.Condition()
+
+    def acquire(self, nbytes: int, cancel_event: Optional[threading.Event] = None,
+                poll_interval: float = 0.05) -> bool:
+        """Reserva `nbytes`. Retorna False se cancelado durante a espera."""
+        with self._cond:
+            start = None
+            while self.used and self.used + nbytes > self.capacity:
+                if cancel_event is not None and cancel_event.is_set():
+                    return False
+                if start is None:
+                    start = time.perf_counter()
+                    self.waits += 1
+                self._cond.wait(poll_interval)
+            if start is not None:
+                self.wait_ms += (time.perf_counter() - start) * 1000
+            self.used += nbytes
+            self.peak = max(self.peak, self.used)
+            return True
+
+    def release(self, nbytes: int):
+        with self._cond:
+            self.used = max(0, self.used - nbytes)
+            self._cond.notify_all()
+
+    def resize(self, capacity: int):
+        with self._cond:
+            self.capacity = max(1, capacity)
+            self._cond.notify_all()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "capacity": self.capacity,
+                "used": self.used,
+                "peak": self.peak,
+                "waits": self.waits,
+                "wait_ms": round(self.wait_ms, 2)
+            }
+
+
+class ImagePipeline:
+    """
+    Carregamento em dois estágios: leitura de bytes e decodificação.
+
+    Características:
+    - Pool de leitura larga (I/O bloqueante, ex.: compartilhamento de rede)
+    - Pool de decodificação do tamanho dos núcleos (CPU)
+    - Buffer limitado por bytes entre os estágios (`ByteBudget`)
+    - Readahead opcional dimensionado pelo tamanho do arquivo (posix_fadvise)
+    - Arquivos grandes (>= `mmap_threshold`) chegam ao decode como mmap
+    - Utilização por estágio (tempo ocupado / capacidade do pool)
+    """
+
+    def __init__(self, read_workers: int = 16, decode_workers: Optional[int] = None,
+                 buffer_bytes: int = 64 * 1024 * 1024, read_ahead: bool = True,
+                 mmap_threshold: int = MMAP_THRESHOLD_BYTES,
+                 logger: Optional[StructuredLogger] = None):
+        self.logger = logger
+        self.read_ahead = read_ahead
+        self.mmap_threshold = mmap_threshold
+        self.read_executor = PriorityExecutor(read_workers, name="ImageReader", logger=logger)
+        self.decode_executor = PriorityExecutor(decode_workers or os.cpu_count() or 1,
+                                                name="ImageDecode", logger=logger)
+        self.buffer = ByteBudget(buffer_bytes)
+        self._lock = threading.Lock()
+        self._stages = {
+            "read": {"tasks": 0, "busy_ms": 0.0, "bytes": 0},
+            "decode": {"tasks": 0, "busy_ms": 0.0}
+        }
+
+    def _account(self, stage: str, busy_s: float, nbytes: int = 0):
+        with self._lock:
+            entry = self._stages[stage]
+            entry["tasks"] += 1
+            entry["busy_ms"] += busy_s * 1000
+            if nbytes:
+                entry["bytes"] += nbytes
+
+    def read_bytes(self, path: Path) -> Union[bytes, mmap.mmap]:
+        """
+        Lê o arquivo inteiro numa única alocação do tamanho do arquivo.
+
+        Acima de `mmap_threshold` devolve o arquivo mapeado (sem cópia para o
+        heap); quem consome deve fechá-lo.
+        """
+        mapped = map_file(path, self.mmap_threshold)
+        if mapped is not None:
+            if self.read_ahead and hasattr(mapped, "madvise") and hasattr(mmap, "MADV_WILLNEED"):
+                try:
+                    mapped.madvise(mmap.MADV_WILLNEED)
+                except OSError:
+                    pass
+            return mapped
+        with open(path, "rb", buffering=0) as f:
+            if self.read_ahead and hasattr(os, "posix_fadvise"):
+                try:
+                    size = os.fstat(f.fileno()).st_size
+                    os.posix_fadvise(f.fileno(), 0, size, os.POSIX_FADV_WILLNEED)
+                except OSError:
+                    pass
+            return f.readall()
+
+    def submit(self, path: Path, decode_fn: Callable[[Union[bytes, mmap.mmap]], Any],
+               priority: TaskPriority = TaskPriority.INTERACTIVE,
+               group: Optional[TaskGroup] = None) -> Future:
+        """
+        Agenda leitura + decodificação de `path`.
+
+        `decode_fn(data)` roda no pool de decodificação (`data` são bytes ou,
+        para arquivos grandes, um mmap fechado após o decode). O Future
+        retornado é o único rastreado pelo grupo; cancelá-lo descarta o
+        estágio pendente.
+        """
+        outer = Future()
+        if group is not None:
+            if group.cancelled():
+                outer.cancel()
+                return outer
+            group._track(outer)
+        cancel_event = group.cancel_event if group is not None else None
+        stage: Dict[str, Future] = {}
+
+        def propagate_cancel(f: Future):
+            if f.cancelled() and "current" in stage:
+                stage["current"].cancel()
+        outer.add_done_callback(propagate_cancel)
+
+        def finish(fn, *args):
+            if outer.done():
+                return
+            try:
+                fn(*args)
+            except InvalidStateError:
+                pass  # Cancelado entre a checagem e o resultado
+
+        def release(data, nbytes: int):
+            if isinstance(data, mmap.mmap):
+                _close_map(data)
+            self.buffer.release(nbytes)
+
+        def decode(data, nbytes: int):
+            if outer.done():
+                release(data, nbytes)  # Cancelado após a leitura: não decodifica
+                return
+            try:
+                start = time.perf_counter()
+                result = decode_fn(data)
+                self._account("decode", time.perf_counter() - start)
+                finish(outer.set_result, result)
+            except BaseException as e:
+                finish(outer.set_exception, e)
+            finally:
+                release(data, nbytes)
+
+        def read():
+            if outer.done():
+                return
+            try:
+                nbytes = path.stat().st_size
+            except OSError as e:
+                finish(outer.set_exception, e)
+                return
+            if not self.buffer.acquire(nbytes, cancel_event):
+                outer.cancel()
+                return
+            try:
+                start = time.perf_counter()
+                data = self.read_bytes(path)
+                self._account("read", time.perf_counter() - start, len(data))
+            except BaseException as e:
+                self.buffer.release(nbytes)
+                finish(outer.set_exception, e)
+                return
+            task = self.decode_executor.submit(decode, data, nbytes, priority=priority)
+            stage["current"] = task
+            # Decode descartado antes de começar: devolve a reserva do buffer
+            task.add_done_callback(lambda f: f.cancelled() and release(data, nbytes))
+            if outer.cancelled():
+                task.cancel()
+
+        stage["current"] = self.read_executor.submit(read, priority=priority)
+        return outer
+
+    def stats(self) -> Dict[str, Any]:
+        """Contadores acumulados por estágio (tarefas, tempo ocupado, workers)."""
+        with self._lock:
+            stages = {k: dict(v) for k, v in self._stages.items()}
+        stages["read"]["workers"] = self.read_executor.max_workers
+        stages["decode"]["workers"] = self.decode_executor.max_workers
+        stages["buffer"] = self.buffer.stats()
+        return stages
+
+    @staticmethod
+    def utilization(before: Dict[str, Any], after: Dict[str, Any],
+                    duration_ms: float) -> Dict[str, Any]:
+        """Utilização de cada estágio no intervalo entre dois `stats()`."""
+        result = {}
+        for stage in ("read", "decode"):
+            busy = after[stage]["busy_ms"] - before[stage]["busy_ms"]
+            capacity = duration_ms * max(1, after[stage]["workers"])
+            result[f"{stage}_tasks"] = after[stage]["tasks"] - before[stage]["tasks"]
+            result[f"{stage}_busy_ms"] = round(busy, 2)
+            result[f"{stage}_utilization"] = round(busy / capacity, 3) if capacity > 0 else 0.0
+        result["read_bytes"] = after["read"]["bytes"] - before["read"]["bytes"]
+        result["buffer_peak_bytes"] = after["buffer"]["peak"]
+        result["buffer_wait_ms"] = round(after["buffer"]["wait_ms"] - before["buffer"]["wait_ms"], 2)
+        return result
+
+    def shutdown(self, wait: bool = False):
+        self.read_executor.shutdown(wait=wait)
+        self.decode_executor.shutdown(wait=wait)
+
+
+# ╔═══════════════════════════════════════════════════════════════════════╗
+# ║                  CARREGADOR PARALELO DE IMAGENS                       ║
+# ╚═══════════════════════════════════════════════════════════════════════╝
+
+STANDARD_THUMBNAIL_SIZES = (64, 128, 256, 512)
+
+
+def _downscale(img: Image.Image, size: int) -> Image.Image:
+    """Reduz para caber em size x size: `reduce` inteiro primeiro, ajuste fino depois."""
+    factor = max(img.width, img.height) // size
+    img = img.reduce(factor) if factor >= 2 else img.copy()
+    if max(img.width, img.height) > size:
+        img.thumbnail((size, size))
+    return img
+
+
+class DecodeProfiler:
+    """
+    Tempos reais por imagem e custo serial calibrado.
+
+    Características:
+    - Tempos por etapa: decode (abrir + decodificar), resize e convert
+      (PIL → PhotoImage), com amostras recentes para percentis
+    - Custo serial medido de tempos em tempos em poucas imagens
+      decodificadas sozinhas (sem concorrência), base do speedup real
+    """
+
+    STAGES = ("decode", "resize", "convert")
+
+    def __init__(self, sample_size: int = 3, every_loads: int = 10,
+                 max_age_s: float = 300.0, history: int = 2048):
+        self.sample_size = sample_size
+        self.every_loads = every_loads
+        self.max_age_s = max_age_s
+        self.serial_ms: Optional[float] = None
+        self._calibrated_at = 0.0
+        self._loads_since = 0
+        self._lock = threading.Lock()
+        self._count = {stage: 0 for stage in self.STAGES}
+        self._total_ms = {stage: 0.0 for stage in self.STAGES}
+        self._recent = {stage: deque(maxlen=history) for stage in self.STAGES}
+
+    def record(self, stage: str, ms: float):
+        with self._lock:
+            self._count[stage] += 1
+            self._total_ms[stage] += ms
+            self._recent[stage].append(ms)
+
+    def snapshot(self) -> Dict[str, Tuple[int, float]]:
+        with self._lock:
+            return {stage: (self._count[stage], self._total_ms[stage]) for stage in self.STAGES}
+
+    @staticmethod
+    def averages(before: Dict[str, Tuple[int, float]],
+                 after: Dict[str, Tuple[int, float]]) -> Dict[str, Any]:
+        """Quantidade e média por etapa entre dois `snapshot()`."""
+        result = {}
+        for stage in DecodeProfiler.STAGES:
+            count = after[stage][0] - before[stage][0]
+            total = after[stage][1] - before[stage][1]
+            result[f"{stage}_count"] = count
+            result[f"{stage}_ms_avg"] = round(total / count, 3) if count else None
+        return result
+
+    def percentiles(self, stage: str, points=(50, 95, 99)) -> Dict[int, float]:
+        with self._lock:
+            values = list(self._recent[stage])
+        return _percentiles(values, points)
+
+    def needs_calibration(self) -> bool:
+        with self._lock:
+            self._loads_since += 1
+            return (self.serial_ms is None or self._loads_since >= self.every_loads
+                    or time.monotonic() - self._calibrated_at > self.max_age_s)
+
+    def calibrate(self, samples_ms: List[float]):
+        """Atualiza o custo serial (decode + resize medidos + convert médio)."""
+        if not samples_ms:
+            return
+        with self._lock:
+            convert = self._total_ms["convert"] / self._count["convert"] if self._count["convert"] else 0.0
+            self.serial_ms = sum(samples_ms) / len(samples_ms) + convert
+            self._calibrated_at = time.monotonic()
+            self._loads_since = 0
+
+
+class ParallelImageLoader:
+    """
+    Carregador paralelo de imagens sobre o PriorityExecutor compartilhado.
+
+    🚀 Recurso principal da v8.0 (mantido na v8.1)
+
+    Características:
+    - Carrega múltiplas imagens simultaneamente
+    - Retorna resultados conforme ficam prontos (as_completed)
+    - Um TaskGroup por busca, cancelado como unidade
+    - Janela deslizante de tarefas em voo (`max_in_flight`) com backpressure
+    - Speedup real: custo serial calibrado (`DecodeProfiler`) vs. duração
+    - Pipeline opcional leitura → decodificação (`ImagePipeline`)
+    - Tratamento de erro por imagem (resiliência), com quarentena opcional
+    - Auto-detecção de número ideal de workers
+
+    """
+
+    def __init__(self, 
+                 thumbnail_size: int = 250,
+                 max_workers: Optional[int] = None,
+                 logger: Optional[StructuredLogger] = None,
+                 executor: Optional[PriorityExecutor] = None,
+                 max_in_flight: Optional[int] = None,
+                 thumbnail_cache: Optional[ThumbnailCache] = None,
+                 pipeline: Optional[ImagePipeline] = None):
+        self.thumbnail_size = thumbnail_size
+        self.logger = logger
+        self.thumbnail_cache = thumbnail_cache or ThumbnailCache()
+        # Limita imagens decodificadas aguardando a UI (None = sem limite)
+        self.max_in_flight = max_in_flight
+        # Sem executor da aplicação, mantém uma pool própria (longa duração)
+        self.executor = executor or PriorityExecutor(max_workers, name="ImageLoader",
+                                                     logger=logger)
+        # Com pipeline, cache misses passam pelos estágios de leitura e decode
+        self.pipeline = pipeline
+        # Arquivos a partir deste tamanho são decodificados via mmap (0 = nunca)
+        self.mmap_threshold = MMAP_THRESHOLD_BYTES
+        # Com índice, cópias idênticas compartilham thumbnail e PhotoImage
+        self.catalog: Optional[CatalogIndex] = None
+        self._photos: "weakref.WeakValueDictionary[Tuple, Any]" = weakref.WeakValueDictionary()
+        self._photos_lock = threading.Lock()
+        self.profiler = DecodeProfiler()
+        self._calibration_future: Optional[Future] = None
+        self._calibration_lock = threading.Lock()
+        # Tamanhos gerados juntos a cada decodificação (mais o tamanho atual)
+        self.thumbnail_sizes: Tuple[int, ...] = STANDARD_THUMBNAIL_SIZES
+        # Com quarentena, arquivos que já falharam não são relidos até mudarem
+        self.quarantine: Optional[ImageQuarantine] = None
+
+    @property
+    def max_workers(self) -> int:
+        return self.executor.max_workers
+
+    @staticmethod
+    def _sized_key(key: Tuple, size: int) -> Tuple:
+        """Mesma chave para outro tamanho (o tamanho é sempre o último campo)."""
+        return key[:-1] + (size,)
+
+    def ladder_sizes(self) -> List[int]:
+        return sorted(set(self.thumbnail_sizes) | {self.thumbnail_size}, reverse=True)
+
+    def cached_thumbnail(self, arquivo: Path, min_size: int = 0) -> Optional[Image.Image]:
+        """Menor thumbnail em cache com lado >= `min_size` (ou o maior disponível); sem I/O."""
+        key = self.cache_key(arquivo, compute=False)
+        if key is None:
+            return None
+        best = None
+        for size in self.ladder_sizes():
+            sized = self._sized_key(key, size)
+            if self.thumbnail_cache.contains(sized):
+                if size >= min_size or best is None:
+                    best = sized
+        return self.thumbnail_cache.get(best) if best else None
+
+    def cache_key(self, arquivo: Path, data: Union[bytes, mmap.mmap, None] = None,
+                  compute: bool = True) -> Optional[Tuple]:
+        """
+        Chave do thumbnail no cache: por conteúdo (com índice) ou por arquivo.
+
+        `compute=False` nunca lê o arquivo (seguro na thread da UI): sem
+        impressão digital conhecida, devolve a chave por arquivo.
+        """
+        if self.catalog is not None:
+            content = (self.catalog.content_id(arquivo, data) if compute
+                       else self.catalog.cached_content_id(arquivo))
+            if content is not None:
+                return ("content", content, self.thumbnail_size)
+        return ThumbnailCache.make_key(arquivo, self.thumbnail_size)
+
+    def get_thumbnail(self, arquivo: Path, data: Union[bytes, mmap.mmap, None] = None,
+                      record: bool = True) -> Image.Image:
+        """
+        Retorna o thumbnail (PIL) do arquivo, decodificando só em cache miss.
+
+        `data`: conteúdo já lido pelo estágio de leitura do pipeline.
+        `record=False`: trabalho de fundo (prefetch, atlas) fora dos tempos do
+        profiler, que medem só as cargas da busca.
+        """
+        return self._thumbnail(arquivo, data, record)[1]
+
+    def _thumbnail(self, arquivo: Path, data=None,
+                   record: bool = True) -> Tuple[Optional[Tuple], Image.Image]:
+        quarantine = self.quarantine
+        if quarantine is not None and quarantine.contains(arquivo):
+            raise QuarantinedImageError(f"Imagem em quarentena: {arquivo.name}")
+        try:
+            return self._thumbnail_unchecked(arquivo, data, record)
+        except QUARANTINE_ERRORS as e:
+            # Falha de I/O só falha esta carga; a próxima tenta de novo
+            if quarantine is not None and _is_decode_error(e):
+                quarantine.add(arquivo, e)
+            raise
+
+    def _thumbnail_unchecked(self, arquivo: Path, data=None,
+                             record: bool = True) -> Tuple[Optional[Tuple], Image.Image]:
+        key = self.cache_key(arquivo, data)
+        img = self.thumbnail_cache.get(key)
+        if img is not None:
+            return key, img
+
+        img = self._from_larger(key, record)
+        if img is None:
+            if data is not None:
+                ladder = self._decode_ladder(io.BytesIO(data) if isinstance(data, bytes) else data,
+                                             record)
+            else:
+                with image_source(arquivo, self.mmap_threshold) as source:
+                    ladder = self._decode_ladder(source, record)
+            if key is not None:
+                for size, thumb in ladder.items():
+                    self.thumbnail_cache.put(self._sized_key(key, size), thumb)
+            return key, ladder[self.thumbnail_size]
+        self.thumbnail_cache.put(key, img)
+        return key, img
+
+    def _from_larger(self, key: Optional[Tuple], record: bool = True) -> Optional[Image.Image]:
+        """Deriva o tamanho atual de um maior já em cache (sem ler o original)."""
+        if key is None:
+            return None
+        for size in sorted(self.thumbnail_sizes):
+            if size <= self.thumbnail_size:
+                continue
+            sized = self._sized_key(key, size)
+            if self.thumbnail_cache.contains(sized):
+                larger = self.thumbnail_cache.get(sized)
+                if larger is not None:
+                    start = time.perf_counter()
+                    img = _downscale(larger, self.thumbnail_size)
+                    if record:
+                        self.profiler.record("resize", (time.perf_counter() - start) * 1000)
+                    return img
+        return None
+
+    def _shared_photo(self, key: Optional[Tuple], img: Image.Image):
+        """PhotoImage único por chave enquanto algum tile o referenciar."""
+        if key is None:
+            return self._to_photo(img)
+        with self._photos_lock:
+            photo = self._photos.get(key)
+            if photo is None:
+                photo = self._to_photo(img)
+                self._photos[key] = photo
+            return photo
+
+    def _to_photo(self, img: Image.Image):
+        start = time.perf_counter()
+        photo = ImageTk.PhotoImage(img)
+        self.profiler.record("convert", (time.perf_counter() - start) * 1000)
+        return photo
+
+    def _calibrate(self, imagens: List[Path]) -> int:
+        """
+        Mede o custo serial decodificando sozinhas, uma a uma, algumas imagens
+        da última carga (tarefa BACKGROUND, fora do caminho da busca). Não
+        toca o cache nem os tempos por etapa do profiler.
+        """
+        samples = []
+        for arquivo in imagens:
+            if len(samples) >= self.profiler.sample_size:
+                break
+            if self.quarantine is not None and self.quarantine.contains(arquivo, count=False):
+                continue
+            try:
+                start = time.perf_counter()
+                with image_source(arquivo, self.mmap_threshold) as source:
+                    self._decode_ladder(source, record=False)
+                samples.append((time.perf_counter() - start) * 1000)
+            except Exception:
+                continue
+        self.profiler.calibrate(samples)
+        return len(samples)
+
+    def _schedule_calibration(self, imagens: List[Path]) -> bool:
+        """Agenda `_calibrate` se não houver outra em andamento."""
+        with self._calibration_lock:
+            if not imagens or (self._calibration_future is not None
+                               and not self._calibration_future.done()):
+                return False
+            try:
+                self._calibration_future = self.executor.submit(
+                    self._calibrate, list(imagens), priority=TaskPriority.BACKGROUND)
+            except RuntimeError:
+                return False  # Executor encerrado
+            return True
+
+    def _decode_ladder(self, source, record: bool = True) -> Dict[int, Image.Image]:
+        """
+        Uma decodificação → todos os tamanhos de `ladder_sizes()`.
+
+        O maior sai do original (com draft); cada menor vem do menor já
+        gerado que seja múltiplo exato (via `reduce`), senão do menor maior.
+        `record=False` não registra tempos (calibração e trabalho de fundo).
+        """
+        sizes = self.ladder_sizes()
+        largest = sizes[0]
+        start = time.perf_counter()
+        with Image.open(source) as src:
+            # Mesmo draft que o thumbnail() faria (reducing_gap=2), medido à parte
+            src.draft(None, (largest * 2, largest * 2))
+            src.load()
+            decoded = time.perf_counter()
+            src.thumbnail((largest, largest))
+            ladder = {largest: src.copy()}
+        for size in sizes[1:]:
+            candidates = [im for im in ladder.values() if max(im.size) >= size] or list(ladder.values())
+            base = min(candidates, key=lambda im: (max(im.size) % size != 0, max(im.size)))
+            ladder[size] = _downscale(base, size)
+        if record:
+            self.profiler.record("decode", (decoded - start) * 1000)
+            self.profiler.record("resize", (time.perf_counter() - decoded) * 1000)
+        return ladder
+
+    def warm_thumbnail(self, arquivo: Path) -> bool:
+        """Aquece o cache sem criar PhotoImage. Retorna True se decodificou."""
+        if self.quarantine is not None and self.quarantine.contains(arquivo, count=False):
+            return False
+        key = self.cache_key(arquivo)
+        if key is None or self.thumbnail_cache.contains(key):
+            return False
+        try:
+            self.get_thumbnail(arquivo, record=False)
+            return True
+        except Exception as e:
+            if self.logger:
+                self.logger.debug("Prefetch decode failed", filename=arquivo.name,
+                                  error_type=type(e).__name__)
+            return False
+
+    def load_single_image(self, arquivo: Path, index: int,
+                          data: Union[bytes, mmap.mmap, None] = None) -> Optional[Tuple[str, Any, str, int]]:
+        """Carrega uma única imagem (executado em worker thread)."""
+        try:
+            key, img = self._thumbnail(arquivo, data)
+            photo = self._shared_photo(key, img)
+            return (arquivo.name, photo, str(arquivo), index)
+        except QuarantinedImageError:
+            return None  # Já registrado quando entrou na quarentena
+        except Exception as e:
+            if self.logger:
+                self.logger.warning("Failed to load image", filename=arquivo.name,
+                                   error_type=type(e).__name__)
+            return None
+
+    def submit_load(self, arquivo: Path, index: int,
+                    priority: TaskPriority = TaskPriority.INTERACTIVE,
+                    group: Optional[TaskGroup] = None) -> Future:
+        """Agenda `load_single_image`, via pipeline quando a imagem não está em cache."""
+        quarantine = self.quarantine
+        if self.pipeline is not None and not (quarantine is not None
+                                              and quarantine.contains(arquivo, count=False)):
+            key = self.cache_key(arquivo, compute=False)
+            if key is not None and not self.thumbnail_cache.contains(key):
+                # Erros do estágio de leitura são de I/O: não entram em quarentena
+                return self.pipeline.submit(
+                    arquivo, lambda data: self.load_single_image(arquivo, index, data),
+                    priority=priority, group=group)
+        return self.executor.submit(self._load_active, arquivo, index, group,
+                                    priority=priority, group=group)
+
+    def _load_active(self, arquivo: Path, index: int, group: Optional[TaskGroup]):
+        # Grupo cancelado enquanto a tarefa saía da fila: nem começa a decodificar
+        if group is not None and group.cancelled():
+            return None
+        return self.load_single_image(arquivo, index)
+
+    def load_images_parallel(self, imagens: List[Path], cancel_event: threading.Event,
+                            fila_resultados: queue.Queue, trace_id: Optional[str] = None,
+                            priority: TaskPriority = TaskPriority.INTERACTIVE,
+                            generation: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Carrega imagens em paralelo no executor compartilhado.
+
+        Periodicamente, ao fim da carga, algumas imagens carregadas são
+        redecodificadas em série numa tarefa BACKGROUND (calibração do custo
+        serial usado no speedup); a carga nunca espera por ela.
+
+        O cancelamento não espera decodificações em andamento: pendentes são
+        descartadas na hora e resultados tardios ficam fora da fila.
+        `generation` marca as mensagens para a UI ignorar buscas substituídas.
+        """
+        quarantine_before = self.quarantine.stats() if self.quarantine else None
+        timings_before = self.profiler.snapshot()
+
+        start_time = time.time()
+        total_images = len(imagens)
+        loaded_count = 0
+        failed_count = 0
+
+        if self.logger and trace_id:
+            self.logger.info("Starting parallel image loading", trace_id=trace_id,
+                           total_images=total_images, max_workers=self.max_workers)
+
+        fila_resultados.put(_tag({"status": "start_parallel", "total": total_images}, generation))
+
+        group = self.executor.create_group(name=trace_id or "load")
+        window = self.max_in_flight or max(1, total_images)
+        proximas = iter(enumerate(imagens))
+        pending: Set[Future] = set()
+        indices: Dict[Future, int] = {}
+
+        def submit_next() -> bool:
+            item = next(proximas, None)
+            if item is None:
+                return False
+            i, img = item
+            future = self.submit_load(img, i, priority=priority, group=group)
+            indices[future] = i
+            pending.add(future)
+            return True
+
+        pipeline_before = self.pipeline.stats() if self.pipeline else None
+
+        try:
+            while len(pending) < window and submit_next():
+                pass
+
+            while pending:
+                done, pending = wait(pending, timeout=0.1, return_when=FIRST_COMPLETED)
+
+                if cancel_event.is_set():
+                    dropped = group.cancel()
+                    if self.logger and trace_id:
+                        self.logger.info("Parallel loading cancelled", trace_id=trace_id,
+                                       loaded_count=loaded_count, total=total_images,
+                                       dropped_tasks=dropped)
+                    fila_resultados.put(_tag({"status": "cancelled"}, generation))
+                    return {"cancelled": True, "loaded": loaded_count, "failed": failed_count}
+
+                for future in done:
+                    index = indices.pop(future)
+                    try:
+                        result = future.result()
+                        if result:
+                            nome, photo, caminho, index = result
+                            # Bloqueia aqui se a UI estiver atrasada (backpressure)
+                            _put_data(fila_resultados, _tag({
+                                "status": "progress",
+                                "index": index,
+                                "data": (nome, photo, caminho),
+                                "current": loaded_count,
+                                "total": total_images
+                            }, generation), cancel_event)
+                            loaded_count += 1
+                        else:
+                            failed_count += 1
+                            fila_resultados.put(_tag({"status": "failed", "index": index}, generation))
+                    except Exception as e:
+                        failed_count += 1
+                        fila_resultados.put(_tag({"status": "failed", "index": index}, generation))
+                        if self.logger and trace_id:
+                            self.logger.error("Error processing future", trace_id=trace_id,
+                                            error_type=type(e).__name__)
+                    submit_next()
+
+        except Exception as e:
+            group.cancel()
+            if self.logger and trace_id:
+                self.logger.error("Parallel loading failed", trace_id=trace_id,
+                                error_type=type(e).__name__, error_message=str(e))
+            fila_resultados.put(_tag({"status": "error", "msg": str(e)}, generation))
+            return {"error": str(e)}
+
+        duration_ms = (time.time() - start_time) * 1000
+        throughput = loaded_count / (duration_ms / 1000) if duration_ms > 0 else 0
+        timings = DecodeProfiler.averages(timings_before, self.profiler.snapshot())
+
+        # Speedup real: o que as imagens decodificadas custariam em série
+        # (custo calibrado) sobre a duração observada. Sem calibração ou sem
+        # decodificação (tudo em cache) não há speedup a reportar.
+        # Com pipeline, quem decodifica é a pool de decode, não o executor.
+        speedup = efficiency = None
+        serial_ms = self.profiler.serial_ms
+        decoded = timings["decode_count"]
+        decode_workers = self.pipeline.decode_executor.max_workers if self.pipeline else self.max_workers
+        if serial_ms and decoded and duration_ms > 0:
+            speedup = decoded * serial_ms / duration_ms
+            efficiency = speedup / max(1, decode_workers)
+        calibration_scheduled = (self.profiler.needs_calibration()
+                                 and self._schedule_calibration(imagens))
+
+        stats = {
+            "loaded": loaded_count,
+            "failed": failed_count,
+            "total": total_images,
+            "duration_ms": duration_ms,
+            "speedup": speedup,
+            "parallel_efficiency": efficiency,
+            "serial_ms_per_image": serial_ms,
+            "calibration_scheduled": calibration_scheduled,
+            "throughput_imgs_per_sec": throughput,
+            **timings
+        }
+
+        if quarantine_before is not None:
+            quarantine_after = self.quarantine.stats()
+            stats["quarantined_skipped"] = quarantine_after["skipped"] - quarantine_before["skipped"]
+            stats["quarantined_new"] = quarantine_after["added"] - quarantine_before["added"]
+
+        if pipeline_before is not None:
+            stats["pipeline"] = ImagePipeline.utilization(pipeline_before, self.pipeline.stats(),
+                                                          duration_ms)
+
+        if self.logger and trace_id:
+            self.logger.info("Parallel loading completed", trace_id=trace_id,
+                             **{k: v for k, v in stats.items() if k != "pipeline"})
+            if "pipeline" in stats:
+                self.logger.record_pipeline_stats(stats["pipeline"], trace_id=trace_id)
+            if isinstance(fila_resultados, ResultQueue):
+                self.logger.record_queue_stats(fila_resultados.stats(), trace_id=trace_id)
+            self.logger.record_parallel_load(speedup=speedup, images_count=loaded_count,
+                                            duration_ms=duration_ms,
+                                            workers=decode_workers,
+                                            efficiency=efficiency, timings=timings)
+
+        fila_resultados.put(_tag({"status": "done", "stats": stats}, generation))
+        return stats
+
+
+class GridLayout:
+    """
+    Geometria do grid virtualizado de thumbnails (sem Tk).
+
+    Tiles de tamanho fixo em linhas de `columns`; abaixo de um cabeçalho
+    de altura `top`. Converte índice ↔ posição e rolagem → faixa visível,
+    para a UI criar itens de canvas só para as linhas à vista.
+    """
+
+    TILE_PAD = 6
+
+    def __init__(self, thumb_size: int = 250, columns: int = 3, gap: int = 20,
+                 label_height: int = 36, top: int = 0):
+        self.thumb_size = thumb_size
+        self.columns = max(1, columns)
+        self.gap = gap
+        self.label_height = label_height
+        self.top = top
+
+    @property
+    def tile_width(self) -> int:
+        return self.thumb_size + 2 * self.TILE_PAD
+
+    @property
+    def tile_height(self) -> int:
+        return self.thumb_size + 2 * self.TILE_PAD + self.label_height
+
+    @property
+    def cell_width(self) -> int:
+        return self.tile_width + self.gap
+
+    @property
+    def cell_height(self) -> int:
+        return self.tile_height + self.gap
+
+    def rows(self, total: int) -> int:
+        return (total + self.columns - 1) // self.columns
+
+    def columns_for_width(self, width: int) -> int:
+        """Quantas colunas cabem em `width` pixels (mínimo 1)."""
+        return max(1, (width - self.gap) // self.cell_width)
+
+    def content_width(self) -> int:
+        return self.gap + self.columns * self.cell_width
+
+    def content_height(self, total: int) -> int:
+        return self.top + self.gap + self.rows(total) * self.cell_height
+
+    def tile_origin(self, index: int) -> Tuple[int, int]:
+        """Canto superior esquerdo do tile `index` (coordenadas do canvas)."""
+        row, col = divmod(index, self.columns)
+        return self.gap + col * self.cell_width, self.top + self.gap + row * self.cell_height
+
+    def row_at(self, y: float) -> int:
+        return max(0, int((y - self.top - self.gap) // self.cell_height))
+
+    def visible_range(self, y0: float, y1: float, total: int,
+                      margin_rows: int = 0) -> Tuple[int, int]:
+        """Índices (inclusivos) das linhas entre y0 e y1, mais `margin_rows`; (0, -1) se vazio."""
+        if total <= 0 or y1 < y0:
+            return 0, -1
+        last_row = self.rows(total) - 1
+        first = max(0, self.row_at(y0) - margin_rows)
+        last = min(last_row, self.row_at(y1) + margin_rows)
+        if first > last_row:
+            return 0, -1
+        return first * self.columns, min(total - 1, (last + 1) * self.columns - 1)
+
+    def index_at(self, x: float, y: float, total: int) -> Optional[int]:
+        """Tile sob o ponto (None no espaço entre tiles ou fora do grid)."""
+        if x < self.gap or y < self.top + self.gap:
+            return None
+        col, dx = divmod(x - self.gap, self.cell_width)
+        row, dy = divmod(y - self.top - self.gap, self.cell_height)
+        if col >= self.columns or dx >= self.tile_width or dy >= self.tile_height:
+            return None
+        index = int(row) * self.columns + int(col)
+        return index if index < total else None
+
+
+class LazyThumbnailLoader:
+    """
+    Carregamento sob demanda de thumbnails dirigido pela viewport do grid.
+
+    Só decodifica os tiles visíveis (prioridade INTERACTIVE) e uma margem
+    ao redor (prioridade PREFETCH). A cada rolagem as tarefas pendentes fora
+    da janela são descartadas e as restantes são repriorizadas. Resultados
+    chegam na fila como mensagens "thumb" com o índice do tile.
+    """
+
+    def __init__(self, loader: ParallelImageLoader, fila_resultados: queue.Queue,
+                 logger: Optional[StructuredLogger] = None):
+        self.loader = loader
+        self.fila = fila_resultados
+        self.logger = logger
+        # RLock: o callback de um future já concluído roda na própria thread que o registra
+        self._lock = threading.RLock()
+        self._imagens: List[Path] = []
+        self._group: Optional[TaskGroup] = None
+        self._pending: Dict[int, Tuple[Future, TaskPriority]] = {}
+        self._loaded: Set[int] = set()
+        self._generation = 0
+        self._tag: Optional[int] = None  # Geração da busca dona da listagem
+        # Notificado com True quando uma rajada de decodificação começa e
+        # False quando as pendências esvaziam (medição de throughput)
+        self.on_activity: Optional[Callable[[bool], None]] = None
+
+    @property
+    def total(self) -> int:
+        return len(self._imagens)
+
+    def loaded_count(self) -> int:
+        with self._lock:
+            return len(self._loaded)
+
+    def start(self, imagens: List[Path], tag: Optional[int] = None) -> int:
+        """
+        Inicia nova listagem (descarta a anterior). Retorna a geração.
+
+        `tag`: geração da busca, repassada nas mensagens "thumb". Uma busca
+        já substituída (tag menor que a atual) não toma a listagem de volta.
+        """
+        with self._lock:
+            if tag is not None and self._tag is not None and tag < self._tag:
+                return self._generation
+        self.cancel()
+        with self._lock:
+            self._generation += 1
+            self._tag = tag
+            self._imagens = list(imagens)
+            self._group = self.loader.executor.create_group(f"lazy-{self._generation}")
+            self._pending.clear()
+            self._loaded.clear()
+            return self._generation
+
+    def cancel(self, tag: Optional[int] = None):
+        """Cancela a listagem atual (só se pertencer à busca `tag`, quando informado)."""
+        with self._lock:
+            if tag is not None and tag != self._tag:
+                return
+            group = self._group
+            self._group = None
+            self._pending.clear()
+        if group:
+            group.cancel()
+
+    def invalidate(self) -> bool:
+        """
+        Esquece os thumbnails já entregues (ex.: mudou o tamanho), mantendo a
+        listagem: o próximo `update_viewport` pede de novo os tiles visíveis.
+        Resultados em andamento da rodada anterior são descartados.
+        Retorna False se não houver listagem ativa.
+        """
+        with self._lock:
+            if self._group is None:
+                return False
+            old = self._group
+            self._generation += 1
+            self._group = self.loader.executor.create_group(f"lazy-{self._generation}")
+            self._pending.clear()
+            self._loaded.clear()
+        old.cancel()
+        return True
+
+    def update_viewport(self, first: int, last: int, margin: int = 0):
+        """
+        Ajusta o trabalho pendente à janela visível [first, last].
+
+        Args:
+            first, last: índices (inclusivos) dos tiles visíveis
+            margin: quantidade de tiles pré-carregados antes/depois da janela
+        """
+        with self._lock:
+            if self._group is None or not self._imagens:
+                return
+            was_idle = not self._pending
+            total = len(self._imagens)
+            first = max(0, first)
+            last = min(total - 1, last)
+            wanted: Dict[int, TaskPriority] = {}
+            for i in range(max(0, first - margin), min(total, last + margin + 1)):
+                if i not in self._loaded:
+                    wanted[i] = (TaskPriority.INTERACTIVE if first <= i <= last
+                                 else TaskPriority.PREFETCH)
+
+            # Descarta pendentes que saíram da janela ou mudaram de prioridade
+            for i, (future, priority) in list(self._pending.items()):
+                if wanted.get(i) == priority:
+                    del wanted[i]
+                elif future.cancel():
+                    del self._pending[i]
+                elif i in wanted:
+                    del wanted[i]  # Já em execução: mantém
+
+            # Visíveis primeiro, na ordem de leitura
+            for i in sorted(wanted, key=lambda i: (wanted[i], i)):
+                self._submit(i, wanted[i])
+
+            if was_idle and self._pending and self.on_activity:
+                self.on_activity(True)
+
+    def _submit(self, index: int, priority: TaskPriority):
+        future = self.loader.submit_load(self._imagens[index], index,
+                                         priority=priority, group=self._group)
+        self._pending[index] = (future, priority)
+        generation = self._generation
+        future.add_done_callback(lambda f, i=index, g=generation: self._on_done(f, i, g))
+
+    def _on_done(self, future: Future, index: int, generation: int):
+        if future.cancelled():
+            return
+        with self._lock:
+            if generation != self._generation or self._group is None:
+                return
+            group = self._group
+            tag = self._tag
+            entry = self._pending.get(index)
+            drained = False
+            if entry and entry[0] is future:
+                del self._pending[index]
+                drained = not self._pending
+            self._loaded.add(index)
+            loaded = len(self._loaded)
+        if drained and self.on_activity:
+            self.on_activity(False)
+        try:
+            result = future.result()
+        except Exception as e:
+            if self.logger:
+                self.logger.error("Lazy thumbnail load failed", error_type=type(e).__name__)
+            result = None
+        msg = _tag({
+            "status": "thumb",
+            "index": index,
+            "data": result[:3] if result else None,
+            "current": loaded,
+            "total": len(self._imagens)
+        }, tag)
+        if threading.current_thread() is not threading.main_thread():
+            _put_data(self.fila, msg, group.cancel_event)
+            return
+        # Future já concluído: o callback roda na thread Tk (update_viewport),
+        # única consumidora da fila. Nunca espera; com a fila cheia, a
+        # inserção com backpressure vai para um worker.
+        if not _put_data(self.fila, msg, group.cancel_event, block=False):
+            try:
+                self.loader.executor.submit(_put_data, self.fila, msg, group.cancel_event,
+                                            group=group)
+            except RuntimeError:
+                pass  # Executor encerrado
+
+
+class FullImageLoader:
+    """
+    Decodificação em tamanho de tela para o visualizador, fora da thread Tk.
+
+    Características:
+    - Decodifica no executor compartilhado (nunca na thread da UI)
+    - `draft` JPEG: o decoder já reduz por DCT antes do LANCZOS
+    - Requisições duplicadas reaproveitam o mesmo Future
+    - LRU pequeno: voltar a uma imagem recente é imediato
+    - Prefetch especulativo (hover) com prioridade PREFETCH
+    - Originais grandes decodificados direto do arquivo mapeado (mmap)
+    """
+
+    def __init__(self, executor: PriorityExecutor, max_size: Tuple[int, int] = (1920, 1080),
+                 cache_entries: int = 4, logger: Optional[StructuredLogger] = None,
+                 mmap_threshold: int = MMAP_THRESHOLD_BYTES):
+        self.executor = executor
+        self.max_size = max_size
+        self.mmap_threshold = mmap_threshold
+        self.cache_entries = cache_entries
+        self.logger = logger
+        self._cache: "OrderedDict[Tuple, Image.Image]" = OrderedDict()
+        self._inflight: Dict[Tuple, Tuple[Future, TaskPriority]] = {}
+        # RLock: cancelar um Future dispara _forget na mesma thread
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(path: Path) -> Optional[Tuple]:
+        try:
+            st = path.stat()
+        except OSError:
+            return None
+        return (str(path), st.st_mtime_ns, st.st_size)
+
+    def get_cached(self, path: Path) -> Optional[Image.Image]:
+        key = self._key(Path(path))
+        with self._lock:
+            img = self._cache.get(key) if key else None
+            if img is not None:
+                self.hits += 1
+                self._cache.move_to_end(key)
+            return img
+
+    def request(self, path: Path, priority: TaskPriority = TaskPriority.INTERACTIVE) -> Future:
+        """Retorna um Future com a imagem em tamanho de tela."""
+        path = Path(path)
+        key = self._key(path)
+        with self._lock:
+            if key in self._cache:
+                self.hits += 1
+                self._cache.move_to_end(key)
+                future = Future()
+                future.set_result(self._cache[key])
+                return future
+            if priority == TaskPriority.INTERACTIVE:
+                self.misses += 1  # Prefetch não conta: ninguém esperou por ele
+            entry = self._inflight.get(key)
+            if entry:
+                future, current = entry
+                # Promove um prefetch ainda pendente para a prioridade pedida
+                if priority >= current or not future.cancel():
+                    return future
+            future = self.executor.submit(self._decode, path, key, priority=priority)
+            self._inflight[key] = (future, priority)
+        future.add_done_callback(lambda f, k=key: self._forget(k, f))
+        return future
+
+    def prefetch(self, path: Path) -> Future:
+        return self.request(path, priority=TaskPriority.PREFETCH)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._cache),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0
+            }
+
+    def resize(self, cache_entries: int):
+        """Altera o limite do cache mantendo as imagens mais recentes."""
+        with self._lock:
+            self.cache_entries = max(1, cache_entries)
+            self._trim()
+
+    def _trim(self):
+        while len(self._cache) > self.cache_entries:
+            self._cache.popitem(last=False)
+
+    def _forget(self, key: Optional[Tuple], future: Future):
+        with self._lock:
+            entry = self._inflight.get(key)
+            if entry and entry[0] is future:
+                del self._inflight[key]
+
+    def _decode(self, path: Path, key: Optional[Tuple]) -> Image.Image:
+        start = time.perf_counter()
+        with image_source(path, self.mmap_threshold) as source, Image.open(source) as src:
+            src.draft("RGB", self.max_size)
+            src.thumbnail(self.max_size, Image.Resampling.LANCZOS)
+            img = src.copy()
+        if key is not None:
+            with self._lock:
+                self._cache[key] = img
+                self._cache.move_to_end(key)
+                self._trim()
+        if self.logger:
+            self.logger.debug("Full image decoded", filename=path.name,
+                              duration_ms=(time.perf_counter() - start) * 1000)
+        return img
+
+
+class TileDiskCache:
+    """
+    Orçamento em bytes para os tiles gravados em `cache_dir/pyramid/`.
+
+    LRU pelo mtime dos arquivos (lidos são "tocados"); ao passar do limite,
+    os mais antigos são apagados até 90% do orçamento. O total é medido uma
+    vez e depois mantido incrementalmente. Compartilhado entre pirâmides.
+    """
+
+    LOW_WATER = 0.9
+
+    def __init__(self, cache_dir: Path, max_bytes: int = 256 * 1024 * 1024,
+                 logger: Optional[StructuredLogger] = None):
+        self.root = Path(cache_dir) / "pyramid"
+        self.max_bytes = max_bytes
+        self.logger = logger
+        self._lock = threading.Lock()
+        self._total: Optional[int] = None
+        self.evicted = 0
+
+    def _files(self) -> List[Tuple[float, int, Path]]:
+        files = []
+        if not self.root.exists():
+            return files
+        for path in self.root.rglob("*.png"):
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            files.append((st.st_mtime, st.st_size, path))
+        return files
+
+    def _ensure_total(self):
+        if self._total is None:
+            self._total = sum(size for _, size, _ in self._files())
+
+    def touch(self, path: Path):
+        """Marca o tile como recém-usado."""
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    def add(self, nbytes: int):
+        """Contabiliza um tile gravado e aplica o orçamento se preciso."""
+        with self._lock:
+            if self._total is None:
+                self._ensure_total()  # A medição inicial já inclui o tile novo
+            else:
+                self._total += nbytes
+            if self._total > self.max_bytes:
+                self._evict(int(self.max_bytes * self.LOW_WATER))
+
+    def resize(self, max_bytes: int):
+        with self._lock:
+            self.max_bytes = max_bytes
+            self._ensure_total()
+            if self._total > max_bytes:
+                self._evict(int(max_bytes * self.LOW_WATER))
+
+    def _evict(self, target: int):
+        files = sorted(self._files())
+        total = sum(size for _, size, _ in files)
+        removed = 0
+        for _, size, path in files:
+            if total <= target:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        self._total = total
+        self.evicted += removed
+        self._prune_dirs()
+        if self.logger and removed:
+            self.logger.info("Viewer tile cache trimmed", tiles_removed=removed,
+                             cache_bytes=total, max_bytes=self.max_bytes)
+
+    def _prune_dirs(self):
+        if not self.root.exists():
+            return
+        for path in sorted(self.root.rglob("*"), key=lambda p: len(p.parts), reverse=True):
+            if path.is_dir():
+                try:
+                    path.rmdir()  # Só remove diretórios vazios
+                except OSError:
+                    pass
+
+    def clear(self) -> int:
+        """Apaga todos os tiles em disco; retorna quantos foram removidos."""
+        with self._lock:
+            files = self._files()
+            shutil.rmtree(self.root, ignore_errors=True)
+            self._total = 0
+            return len(files)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._ensure_total()
+            return {"bytes": self._total, "max_bytes": self.max_bytes, "evicted": self.evicted}
+
+
+class TilePyramid:
+    """
+    Pirâmide multi-resolução de tiles para zoom/pan no visualizador.
+
+    Nível 0 = resolução original; cada nível seguinte tem metade do lado.
+    Tiles (256 px por padrão) são gerados sob demanda, só os pedidos (os
+    visíveis, mais um anel opcional gravado só em disco): `get_tiles`
+    decodifica o nível já reduzido (`draft` JPEG + `reduce`) uma vez por
+    lote, recorta os tiles que faltam, grava-os e solta a imagem do nível.
+    Em memória ficam só tiles (LRU, `trim` deixa só os da viewport); em
+    disco vale o orçamento do `TileDiskCache`.
+    """
+
+    def __init__(self, source: Path, cache_dir: Path, tile_size: int = 256,
+                 memory_tiles: int = 64, logger: Optional[StructuredLogger] = None,
+                 mmap_threshold: int = MMAP_THRESHOLD_BYTES,
+                 disk_cache: Optional[TileDiskCache] = None):
+        self.source = Path(source)
+        self.disk_cache = disk_cache
+        self.mmap_threshold = mmap_threshold
+        self.tile_size = tile_size
+        self.memory_tiles = memory_tiles
+        self.logger = logger
+
+        st = self.source.stat()
+        with Image.open(self.source) as img:
+            self.width, self.height = img.size
+        digest = hashlib.sha1(f"{self.source}|{st.st_mtime_ns}|{st.st_size}".encode("utf-8"))
+        self.cache_dir = Path(cache_dir) / "pyramid" / digest.hexdigest()[:20]
+
+        self.levels = 1
+        while max(self.level_size(self.levels - 1)) > tile_size:
+            self.levels += 1
+
+        self._tiles: "OrderedDict[Tuple[int, int, int], Image.Image]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._level_locks = defaultdict(threading.Lock)
+
+    def level_size(self, level: int) -> Tuple[int, int]:
+        factor = 1 << level
+        return (max(1, math.ceil(self.width / factor)), max(1, math.ceil(self.height / factor)))
+
+    def tile_grid(self, level: int) -> Tuple[int, int]:
+        w, h = self.level_size(level)
+        return (math.ceil(w / self.tile_size), math.ceil(h / self.tile_size))
+
+    def fit_level(self, max_w: int, max_h: int) -> int:
+        """Menor nível (maior resolução) que cabe inteiro na área informada."""
+        for level in range(self.levels):
+            w, h = self.level_size(level)
+            if w <= max_w and h <= max_h:
+                return level
+        return self.levels - 1
+
+    def visible_tiles(self, level: int, x0: float, y0: float,
+                      x1: float, y1: float) -> List[Tuple[int, int]]:
+        """Tiles que intersectam o retângulo (coordenadas do nível)."""
+        cols, rows = self.tile_grid(level)
+        ts = self.tile_size
+        tx0, ty0 = max(0, int(x0 // ts)), max(0, int(y0 // ts))
+        tx1, ty1 = min(cols - 1, int(max(x0, x1 - 1) // ts)), min(rows - 1, int(max(y0, y1 - 1) // ts))
+        return [(tx, ty) for ty in range(ty0, ty1 + 1) for tx in range(tx0, tx1 + 1)]
+
+    def _tile_path(self, level: int, tx: int, ty: int) -> Path:
+        return self.cache_dir / str(level) / f"{tx}_{ty}.png"
+
+    def get_cached_tile(self, level: int, tx: int, ty: int) -> Optional[Image.Image]:
+        with self._lock:
+            tile = self._tiles.get((level, tx, ty))
+            if tile is not None:
+                self._tiles.move_to_end((level, tx, ty))
+            return tile
+
+    def get_tile(self, level: int, tx: int, ty: int) -> Image.Image:
+        """Retorna o tile (memória → disco → recorte do nível decodificado)."""
+        return self.get_tiles(level, [(tx, ty)])[(tx, ty)]
+
+    def get_tiles(self, level: int, coords: List[Tuple[int, int]],
+                  extra: Iterable[Tuple[int, int]] = ()) -> Dict[Tuple[int, int], Image.Image]:
+        """
+        Tiles `coords` do nível (memória → disco → recorte). Os que faltam
+        saem de uma única decodificação do nível, liberada ao fim do lote.
+        `extra` (ex.: anel ao redor da viewport) aproveita essa decodificação
+        só para gravar em disco, sem ocupar memória.
+        """
+        tiles: Dict[Tuple[int, int], Image.Image] = {}
+        missing = []
+        for coord in coords:
+            tile = self.get_cached_tile(level, *coord)
+            if tile is None:
+                tile = self._read_tile(level, *coord)
+            if tile is None:
+                missing.append(coord)
+            else:
+                tiles[coord] = tile
+        if missing:
+            with self._level_locks[level]:
+                # Outro lote pode ter gerado os mesmos tiles enquanto esperávamos
+                still = []
+                for coord in missing:
+                    tile = self._read_tile(level, *coord)
+                    if tile is None:
+                        still.append(coord)
+                    else:
+                        tiles[coord] = tile
+                if still:
+                    ring = [c for c in extra if c not in tiles and c not in still
+                            and not self._tile_path(level, *c).exists()]
+                    tiles.update(self._generate_tiles(level, still, ring))
+        for coord, tile in tiles.items():
+            self._remember((level, *coord), tile)
+        return tiles
+
+    def _read_tile(self, level: int, tx: int, ty: int) -> Optional[Image.Image]:
+        path = self._tile_path(level, tx, ty)
+        try:
+            with Image.open(path) as img:
+                img.load()
+                tile = img.copy()
+        except (OSError, SyntaxError, ValueError):
+            return None
+        if self.disk_cache:
+            self.disk_cache.touch(path)
+        return tile
+
+    def _generate_tiles(self, level: int, coords: List[Tuple[int, int]],
+                        extra: List[Tuple[int, int]]) -> Dict[Tuple[int, int], Image.Image]:
+        start = time.perf_counter()
+        img = self._decode_level(level)
+        ts = self.tile_size
+        tiles = {}
+        for coord in list(coords) + list(extra):
+            tx, ty = coord
+            box = (tx * ts, ty * ts, min((tx + 1) * ts, img.width), min((ty + 1) * ts, img.height))
+            tile = img.crop(box)
+            self._save_tile(self._tile_path(level, tx, ty), tile)
+            if coord in coords:
+                tiles[coord] = tile
+        del img  # O nível inteiro não fica residente
+        if self.logger:
+            self.logger.debug("Pyramid tiles generated", filename=self.source.name, level=level,
+                              tiles=len(coords), ring=len(extra),
+                              duration_ms=(time.perf_counter() - start) * 1000)
+        return tiles
+
+    def _save_tile(self, path: Path, tile: Image.Image):
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(".tmp")
+            tile.save(tmp, "PNG", compress_level=1)
+            os.replace(tmp, path)
+            if self.disk_cache:
+                self.disk_cache.add(path.stat().st_size)
+        except OSError as e:
+            if self.logger:
+                self.logger.warning("Pyramid tile save failed", filename=self.source.name,
+                                    error_type=type(e).__name__)
+
+    def _remember(self, key: Tuple[int, int, int], tile: Image.Image):
+        with self._lock:
+            self._tiles[key] = tile
+            self._tiles.move_to_end(key)
+            while len(self._tiles) > self.memory_tiles:
+                self._tiles.popitem(last=False)
+
+    def _decode_level(self, level: int) -> Image.Image:
+        target = self.level_size(level)
+        with image_source(self.source, self.mmap_threshold) as source, Image.open(source) as src:
+            src.draft("RGB", target)
+            src.load()
+            img = src if src.mode in ("RGB", "RGBA", "L") else src.convert("RGBA")
+            factor = max(1, min(img.width // target[0], img.height // target[1]))
+            if factor > 1:
+                img = img.reduce(factor)
+            if img.size != target:
+                img = img.resize(target, Image.Resampling.LANCZOS)
+            return img.copy() if img is src else img
+
+    def trim(self, keep: Set[Tuple[int, int, int]]):
+        """Descarta da memória todos os tiles fora de `keep` (ex.: viewport)."""
+        with self._lock:
+            for key in [k for k in self._tiles if k not in keep]:
+                del self._tiles[key]
+
+
+# ╔═══════════════════════════════════════════════════════════════════════╗
+# ║                  PRÉ-CARREGAMENTO EM TEMPO OCIOSO                     ║
+# ╚═══════════════════════════════════════════════════════════════════════╝
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.gif')
+
+
+def natural_sort_key(path: Path) -> Tuple:
+    """Ordem natural do nome: "foto2" antes de "foto10", sem diferenciar caixa."""
+    return tuple((0, int(part), "") if part.isdigit() else (1, 0, part)
+                 for part in re.split(r"(\d+)", path.name.casefold()) if part)
+
+
+def image_dimensions(path: Path) -> Optional[Tuple[int, int]]:
+    """Largura e altura lidas só do cabeçalho (None se ilegível)."""
+    meta = read_image_metadata(path)
+    return (meta["width"], meta["height"]) if meta else None
+
+
+def list_image_files(pasta: Path) -> List[Path]:
+    """Lista arquivos de imagem legíveis de uma pasta (sem recursão), em ordem natural."""
+    imagens = []
+    for arquivo in pasta.iterdir():
+        try:
+            if arquivo.is_file() and arquivo.suffix.lower() in IMAGE_EXTENSIONS:
+                if os.access(arquivo, os.R_OK):
+                    imagens.append(arquivo)
+        except OSError:
+            continue
+    imagens.sort(key=natural_sort_key)
+    return imagens
+
+
+class IOBudget:
+    """Token bucket de bytes/segundo para limitar I/O de tarefas de fundo."""
+
+    def __init__(self, bytes_per_sec: float):
+        self.rate = max(1.0, float(bytes_per_sec))
+        self.allowance = self.rate
+        self.last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def consume(self, nbytes: int, cancel_event: Optional[threading.Event] = None) -> bool:
+        """Aguarda orçamento para `nbytes`. Retorna False se cancelado."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.allowance = min(self.rate, self.allowance + (now - self.last) * self.rate)
+                self.last = now
+                # Arquivos maiores que o balde passam com ele cheio (saldo negativo)
+                if self.allowance >= min(nbytes, self.rate):
+                    self.allowance -= nbytes
+                    return True
+                wait_s = (min(nbytes, self.rate) - self.allowance) / self.rate
+            if cancel_event is not None:
+                if cancel_event.wait(wait_s):
+                    return False
+            else:
+                time.sleep(wait_s)
+
+
+class IdlePrefetcher:
+    """
+    Aquece o cache de thumbnails com as próximas buscas prováveis.
+
+    Candidatos (em ordem):
+    1. Pastas vizinhas da peça atual (ordem alfabética)
+    2. Top-N termos do histórico (frequência + recência)
+
+    Roda como uma única tarefa BACKGROUND no executor compartilhado, limitada
+    por um orçamento de I/O, e é interrompida assim que uma busca começa.
+    """
+
+    def __init__(self, loader: ParallelImageLoader, dir_cache: DirectoryCache,
+                 config_manager: ConfigManager, logger: Optional[StructuredLogger] = None):
+        self.loader = loader
+        self.dir_cache = dir_cache
+        self.config = config_manager
+        self.logger = logger
+        self._group: Optional[TaskGroup] = None
+        self._future: Optional[Future] = None
+        self._lock = threading.Lock()
+
+    def is_running(self) -> bool:
+        with self._lock:
+            return self._future is not None and not self._future.done()
+
+    def start(self, diretorio_raiz: str, current_part: Optional[Path] = None) -> bool:
+        """Agenda o pré-carregamento (substitui um anterior em andamento)."""
+        self.stop()
+        if not diretorio_raiz:
+            return False
+        with self._lock:
+            self._group = self.loader.executor.create_group("idle-prefetch")
+            self._future = self.loader.executor.submit(
+                self._run, self._group, str(diretorio_raiz), current_part,
+                priority=TaskPriority.BACKGROUND, group=self._group)
+        return True
+
+    def stop(self):
+        with self._lock:
+            group = self._group
+            self._group = None
+            self._future = None
+        if group:
+            group.cancel()
+
+    def plan(self, diretorio_raiz: str, current_part: Optional[Path] = None) -> List[Path]:
+        """Pastas candidatas, sem duplicatas, na ordem de prioridade."""
+        entry = self.dir_cache.get(diretorio_raiz)
+        if not entry:
+            return []
+
+        pastas: List[Path] = []
+        if current_part is not None:
+            ordered = sorted(entry['directories'], key=lambda d: d[0].casefold())
+            paths = [p for _, p in ordered]
+            if current_part in paths:
+                pos = paths.index(current_part)
+                k = int(self.config.get("performance", "prefetch_neighbours", 2))
+                for offset in range(1, k + 1):
+                    for i in (pos + offset, pos - offset):
+                        if 0 <= i < len(paths):
+                            pastas.append(paths[i])
+
+        top_n = int(self.config.get("performance", "prefetch_top_terms", 5))
+        for term in self.config.get_top_terms(top_n):
+            found = self.dir_cache.search(diretorio_raiz, term)
+            if found:
+                pastas.append(found[1])
+
+        seen = {current_part}
+        unique = []
+        for pasta in pastas:
+            if pasta not in seen:
+                seen.add(pasta)
+                unique.append(pasta)
+        return unique
+
+    def _run(self, group: TaskGroup, diretorio_raiz: str, current_part: Optional[Path]):
+        mb_per_sec = float(self.config.get("performance", "prefetch_io_mb_per_sec", 8))
+        budget = IOBudget(mb_per_sec * 1024 * 1024)
+        warmed = skipped = bytes_read = 0
+        start = time.time()
+
+        for pasta in self.plan(diretorio_raiz, current_part):
+            if group.cancelled():
+                break
+            try:
+                imagens = list_image_files(pasta)
+            except OSError:
+                continue
+            for arquivo in imagens:
+                if group.cancelled():
+                    break
+                try:
+                    size = arquivo.stat().st_size
+                except OSError:
+                    continue
+                key = self.loader.cache_key(arquivo, compute=False)
+                if self.loader.thumbnail_cache.contains(key):
+                    skipped += 1
+                    continue
+                if not budget.consume(size, group.cancel_event):
+                    break
+                if self.loader.warm_thumbnail(arquivo):
+                    warmed += 1
+                    bytes_read += size
+
+        if self.logger:
+            self.logger.info("Idle prefetch finished" if not group.cancelled() else "Idle prefetch stopped",
+                             event_type="prefetch", warmed=warmed, skipped=skipped,
+                             bytes_read=bytes_read, duration_ms=(time.time() - start) * 1000)
+        return {"warmed": warmed, "skipped": skipped, "bytes_read": bytes_read}
+
+
+# ╔═══════════════════════════════════════════════════════════════════════╗
+# ║                   MONITOR DE PERFORMANCE (HUD)                        ║
+# ╚═══════════════════════════════════════════════════════════════════════╝
+
+class PerformanceMonitor:
+    """
+    Amostragem barata de métricas para o HUD ao vivo.
+
+    Junta `StructuredLogger.live_snapshot()` com os contadores dos
+    componentes (caches, executor, pipeline, fila, profiler) sem logar
+    nada. A utilização de cada pool (geral, leitura e decode do pipeline)
+    é a fração de tempo ocupado desde a amostra anterior.
+    """
+
+    def __init__(self, logger: StructuredLogger, executor: Optional[PriorityExecutor] = None,
+                 thumbnail_cache: Optional[ThumbnailCache] = None,
+                 full_loader: Optional["FullImageLoader"] = None,
+                 fila: Optional[queue.Queue] = None,
+                 profiler: Optional[DecodeProfiler] = None,
+                 pipeline: Optional[ImagePipeline] = None):
+        self.logger = logger
+        self.executor = executor
+        self.thumbnail_cache = thumbnail_cache
+        self.full_loader = full_loader
+        self.fila = fila
+        self.profiler = profiler
+        self.pipeline = pipeline
+        self._last: Dict[str, Tuple[float, float]] = {}  # pool -> (instante, busy_ms)
+
+    @staticmethod
+    def _hit_rate(stats: Dict[str, Any]) -> Optional[float]:
+        return stats["hit_rate"] if stats["hits"] + stats["misses"] else None
+
+    def _utilization(self, pool: str, now: float, busy_ms: float, workers: int) -> Optional[float]:
+        """Fração ocupada da pool desde a amostra anterior (None na primeira)."""
+        last = self._last.get(pool)
+        self._last[pool] = (now, busy_ms)
+        if last is None or not workers:
+            return None
+        elapsed_ms = (now - last[0]) * 1000
+        if elapsed_ms <= 0:
+            return None
+        return min(1.0, (busy_ms - last[1]) / (elapsed_ms * workers))
+
+    def sample(self) -> Dict[str, Any]:
+        snap = self.logger.live_snapshot()
+        caches = {"diretórios": snap["directory_hit_rate"]}
+        if self.thumbnail_cache is not None:
+            thumbs = self.thumbnail_cache.stats()
+            caches["thumbnails"] = self._hit_rate(thumbs)
+            snap["thumbnail_bytes"] = thumbs["bytes"]
+            snap["thumbnail_max_bytes"] = thumbs["max_bytes"]
+        if self.full_loader is not None:
+            caches["visualizador"] = self._hit_rate(self.full_loader.stats())
+        snap["cache_hit_rates"] = caches
+
+        now = time.perf_counter()
+        if self.executor is not None:
+            ex = self.executor.stats()
+            snap.update({"workers": ex["workers"], "workers_active": ex["active"],
+                         "executor_queue_depth": ex["queue_depth"],
+                         "worker_utilization": self._utilization("geral", now, ex["busy_ms"],
+                                                                 ex["workers"])})
+
+        if self.pipeline is not None:
+            # Com pipeline, leituras e decodificações de cache miss rodam nas
+            # pools dele, não no executor geral
+            stages = self.pipeline.stats()
+            for stage in ("read", "decode"):
+                workers = stages[stage]["workers"]
+                snap[f"{stage}_workers"] = workers
+                snap[f"{stage}_utilization"] = self._utilization(stage, now, stages[stage]["busy_ms"],
+                                                                 workers)
+
+        if isinstance(self.fila, ResultQueue):
+            fila = self.fila.stats()
+            snap.update({"queue_depth": fila["depth"], "queue_capacity": fila["capacity"],
+                         "queue_lag_ms_avg": fila["lag_ms_avg"], "queue_lag_ms_max": fila["lag_ms_max"]})
+
+        if self.profiler is not None:
+            snap["decode_ms"] = {stage: self.profiler.percentiles(stage)
+                                 for stage in DecodeProfiler.STAGES}
+        return snap
+
+    @staticmethod
+    def format_lines(sample: Dict[str, Any]) -> List[str]:
+        """Linhas de texto do HUD ("—" onde ainda não há medida)."""
+        def ms(value) -> str:
+            return "—" if value is None else f"{value:.0f}ms" if value >= 100 else f"{value:.1f}ms"
+
+        def pct(value) -> str:
+            return "—" if value is None else f"{value:.0%}"
+
+        def dist(points: Dict[int, float]) -> str:
+            return "  ".join(f"p{p} {ms(points.get(p))}" for p in (50, 95, 99))
+
+        lines = [f"Busca    {dist(sample['search_ms'])}  ({sample['searches']} buscas)"]
+        scan = sample["gauges"].get("directory_scan_time")
+        if scan:
+            lines.append(f"Scan     {dist(scan)}")
+        decode = sample.get("decode_ms")
+        if decode:
+            lines.append("Decode   " + " | ".join(
+                f"{stage} p50 {ms(points.get(50))} p95 {ms(points.get(95))}"
+                for stage, points in decode.items()))
+        if "queue_depth" in sample:
+            lines.append(f"Fila     {sample['queue_depth']}/{sample['queue_capacity']}"
+                         f"  lag {ms(sample['queue_lag_ms_avg'])} (máx {ms(sample['queue_lag_ms_max'])})"
+                         f"  | executor: {sample.get('executor_queue_depth', 0)} na fila")
+        lines.append("Cache    " + " | ".join(f"{name} {pct(rate)}"
+                                               for name, rate in sample["cache_hit_rates"].items()))
+        if "thumbnail_bytes" in sample:
+            lines.append(f"Memória  thumbnails {sample['thumbnail_bytes'] / 2**20:.1f}"
+                         f"/{sample['thumbnail_max_bytes'] / 2**20:.0f} MB")
+        if "workers" in sample:
+            line = (f"Workers  {sample['workers_active']}/{sample['workers']} ativos"
+                    f"  | geral {pct(sample['worker_utilization'])}")
+            if "read_utilization" in sample:
+                line += (f" | leitura {pct(sample['read_utilization'])} ({sample['read_workers']})"
+                         f" | decode {pct(sample['decode_utilization'])} ({sample['decode_workers']})")
+            lines.append(line)
+        if sample.get("log_dropped"):
+            lines.append(f"Log      {sample['log_dropped']} registros descartados (fila cheia)")
+        return lines
+
+
+# ╔═══════════════════════════════════════════════════════════════════════╗
+# ║                      SERVIÇO DE BUSCA                                 ║
+# ╚═══════════════════════════════════════════════════════════════════════╝
+
+class BuscadorService:
+    """
+    Serviço de busca com suporte a carregamento paralelo.
+
+    Instância de longa duração: reutilizada entre buscas, lê as configurações
+    de performance no início de cada busca e assina o ConfigManager para
+    aplicar alterações feitas com buscas em andamento.
+    """
+
+    # Alterações nessas seções reaplicam a configuração (as demais chaves,
+    # como autotuned_workers, são estado gravado pelo próprio serviço)
+    LIVE_KEYS = {
+        "general": {"cache_ttl_seconds"},
+        "performance": {"thumbnail_size", "thumbnail_sizes", "max_workers", "result_queue_size",
+                        "thumbnail_cache_mb", "mmap_threshold_mb", "dedupe_thumbnails",
+                        "quarantine_bad_images", "read_workers", "read_buffer_mb", "read_ahead"}
+    }
+
+    def __init__(self, fila_resultados: queue.Queue, cancel_event: threading.Event,
+                 dir_cache: DirectoryCache, logger: StructuredLogger,
+                 config_manager: ConfigManager,
+                 executor: Optional[PriorityExecutor] = None):
+        self.fila = fila_resultados
+        self.cancel_event = cancel_event
+        self.dir_cache = dir_cache
+        self.logger = logger
+        self.config = config_manager
+
+        self.pipeline: Optional[ImagePipeline] = None
+        self._applied_read_workers = self._read_workers()
+        if config_manager.get("performance", "staged_pipeline", False):
+            self.pipeline = ImagePipeline(
+                read_workers=self._read_workers(),
+                buffer_bytes=self._read_buffer_bytes(),
+                read_ahead=config_manager.get("performance", "read_ahead", True),
+                mmap_threshold=config_manager.get_mmap_threshold_bytes(),
+                logger=logger
+            )
+
+        self.parallel_loader = ParallelImageLoader(
+            thumbnail_size=config_manager.get_thumbnail_size(),
+            max_workers=config_manager.get_max_workers(),
+            logger=logger,
+            executor=executor,
+            thumbnail_cache=ThumbnailCache(config_manager.get_thumbnail_cache_bytes()),
+            pipeline=self.pipeline
+        )
+        self.lazy_loader = LazyThumbnailLoader(self.parallel_loader, fila_resultados, logger)
+        self.prefetcher = IdlePrefetcher(self.parallel_loader, dir_cache, config_manager, logger)
+
+        self.atlas = ThumbnailAtlas(config_manager.get_cache_dir(), logger=logger)
+        self._atlas_group: Optional[TaskGroup] = None
+
+        self.catalog = CatalogIndex(config_manager.get_cache_dir() / "catalog_index.json", logger)
+        if config_manager.get("performance", "dedupe_thumbnails", False):
+            self.parallel_loader.catalog = self.catalog
+
+        self.quarantine = ImageQuarantine(config_manager.get_cache_dir() / "quarantine.json", logger)
+        if config_manager.get("performance", "quarantine_bad_images", False):
+            self.parallel_loader.quarantine = self.quarantine
+
+        # Com pipeline, o gargalo que varia entre raízes é a largura de leitura
+        tuned = self.pipeline.read_executor if self.pipeline else self.parallel_loader.executor
+        self.autotuner = WorkerAutotuner(tuned, config_manager, logger,
+                                         baseline=self._read_workers if self.pipeline else None)
+        self._lazy_sample: Optional[Tuple[Dict[str, Any], int]] = None
+        self.lazy_loader.on_activity = self._on_lazy_activity
+
+        # Última peça carregada (base para o pré-carregamento de vizinhas)
+        self.last_root: Optional[str] = None
+        self.last_part: Optional[Path] = None
+
+        config_manager.subscribe(self._on_config_change)
+
+    def _on_config_change(self, changes: Dict[str, Dict[str, Any]]):
+        if any(self.LIVE_KEYS.get(section, set()) & values.keys()
+               for section, values in changes.items()):
+            self.apply_config()
+            self.logger.info("Runtime configuration applied",
+                             changes={section: sorted(values) for section, values in changes.items()})
+
+    def apply_config(self):
+        """
+        Aplica configurações de performance atuais aos componentes em uso.
+
+        Tudo é ajustado no lugar: caches quentes são mantidos (só encolhem
+        pelo LRU) e a pool de workers cresce/encolhe sem ser recriada.
+        """
+        self.dir_cache.set_ttl(self.config.get("general", "cache_ttl_seconds", 300))
+        workers = self.config.get_max_workers()
+        if workers and workers != self.parallel_loader.executor.max_workers:
+            # Em "Auto" (None) quem decide é o autotuner no início da busca
+            self.parallel_loader.executor.resize(workers)
+        self.parallel_loader.thumbnail_size = self.config.get_thumbnail_size()
+        self.parallel_loader.thumbnail_sizes = tuple(
+            self.config.get("performance", "thumbnail_sizes", STANDARD_THUMBNAIL_SIZES) or ())
+        window = self.config.get_result_queue_size()
+        self.parallel_loader.max_in_flight = window
+        if isinstance(self.fila, ResultQueue) and self.fila.maxsize != window:
+            self.fila.resize(window)
+        self.parallel_loader.thumbnail_cache.resize(self.config.get_thumbnail_cache_bytes())
+        self.parallel_loader.mmap_threshold = self.config.get_mmap_threshold_bytes()
+        dedupe = self.config.get("performance", "dedupe_thumbnails", False)
+        self.parallel_loader.catalog = self.catalog if dedupe else None
+        quarantine = self.config.get("performance", "quarantine_bad_images", False)
+        self.parallel_loader.quarantine = self.quarantine if quarantine else None
+        if self.pipeline:
+            read_workers = self._read_workers()
+            if read_workers != self._applied_read_workers:
+                # Só quando o valor muda: no modo Auto a largura é do autotuner
+                self._applied_read_workers = read_workers
+                self.pipeline.read_executor.resize(read_workers)
+            self.pipeline.buffer.resize(self._read_buffer_bytes())
+            self.pipeline.read_ahead = self.config.get("performance", "read_ahead", True)
+            self.pipeline.mmap_threshold = self.parallel_loader.mmap_threshold
+
+    def _read_workers(self) -> int:
+        return max(1, int(self.config.get("performance", "read_workers", 16) or 16))
+
+    def _read_buffer_bytes(self) -> int:
+        return int(self.config.get("performance", "read_buffer_mb", 64)) * 1024 * 1024
+
+    def shutdown(self):
+        """Encerra as pools próprias do serviço (o executor compartilhado é da UI)."""
+        self.config.unsubscribe(self._on_config_change)
+        self.prefetcher.stop()
+        self.catalog.save()
+        self.quarantine.save()
+        if self.pipeline:
+            self.pipeline.shutdown()
+
+    def _decoded_count(self) -> int:
+        """
+        Decodificações da busca registradas pelo profiler. Misses servidos de
+        um tamanho maior não contam; prefetch e atlas não registram.
+        """
+        count, _ = self.parallel_loader.profiler.snapshot()["decode"]
+        return count
+
+    def _queue_blocked_ms(self) -> float:
+        return self.fila.stats()["blocked_ms"] if isinstance(self.fila, ResultQueue) else 0.0
+
+    def _on_lazy_activity(self, busy: bool):
+        """Mede cada rajada do carregamento sob demanda para o autoajuste."""
+        if busy:
+            self._lazy_sample = (self.autotuner.snapshot(), self._decoded_count())
+            return
+        sample, self._lazy_sample = self._lazy_sample, None
+        if sample and self.last_root:
+            snapshot, decoded = sample
+            self.autotuner.observe(self.last_root, snapshot, self._decoded_count() - decoded)
+
+    def _emit(self, msg: Dict, generation: Optional[int] = None):
+        self.fila.put(_tag(msg, generation))
+
+    def _check_cancelled(self, cancel_event: Optional[threading.Event] = None,
+                         generation: Optional[int] = None) -> bool:
+        if (cancel_event or self.cancel_event).is_set():
+            self.lazy_loader.cancel(tag=generation)
+            self._emit({"status": "cancelled"}, generation)
+            return True
+        return False
+
+    def _usar_atlas(self, pasta: Path, imagens: List[Path], trace_id: Optional[str] = None):
+        """
+        Pré-popula o cache de thumbnails a partir do atlas da peça.
+
+        Em caso de atlas ausente/desatualizado, agenda a (re)geração em
+        BACKGROUND; as miniaturas já carregadas pela busca são reaproveitadas.
+        """
+        if self._atlas_group:
+            self._atlas_group.cancel()
+            self._atlas_group = None
+
+        loader = self.parallel_loader
+        size = loader.thumbnail_size
+        start = time.perf_counter()
+        thumbs = self.atlas.load(pasta, imagens, size)
+        if thumbs is not None:
+            for path, img in thumbs.items():
+                loader.thumbnail_cache.put(loader.cache_key(path), img)
+            self.logger.metric("atlas_load_time", (time.perf_counter() - start) * 1000, unit="ms",
+                               images=len(thumbs), trace_id=trace_id)
+            return
+
+        self._atlas_group = loader.executor.create_group(f"atlas-{pasta.name}")
+        loader.executor.submit(self._construir_atlas, pasta, list(imagens), size,
+                               self._atlas_group, priority=TaskPriority.BACKGROUND,
+                               group=self._atlas_group)
+
+    def _construir_atlas(self, pasta: Path, imagens: List[Path], size: int, group: TaskGroup):
+        thumbs: Dict[Path, Optional[Image.Image]] = {}
+        for path in imagens:
+            if group.cancelled() or size != self.parallel_loader.thumbnail_size:
+                return False
+            try:
+                # Fora do profiler: não infla as amostras da busca concorrente
+                thumbs[path] = self.parallel_loader.get_thumbnail(path, record=False)
+            except Exception:
+                thumbs[path] = None
+        ok = self.atlas.build(pasta, thumbs, size)
+        if ok:
+            self.logger.info("Thumbnail atlas built", path=str(pasta), images=len(thumbs))
+        return ok
+
+    SIZES_BATCH = 64
+    SIZES_FLUSH_S = 0.1
+
+    def _publicar_dimensoes(self, imagens: List[Path], cancel_event: threading.Event,
+                            generation: Optional[int] = None, publicar: bool = True) -> TaskGroup:
+        """
+        Lê os cabeçalhos em paralelo, depois da listagem e sem bloquear a busca.
+
+        Só arquivos novos ou alterados são abertos (e nunca decodificados);
+        os demais vêm do índice do acervo, que esta leitura mantém em dia
+        para grid, visualizador e filtros. Arquivos em quarentena nem são
+        abertos. Com `publicar` (placeholder_dimensions), as dimensões chegam
+        à UI em lotes {"status": "sizes"} (índice -> (largura, altura)).
+        """
+        loader = self.parallel_loader
+        group = loader.executor.create_group("metadata")
+        lock = threading.Lock()
+        state = {"pending": {}, "remaining": len(imagens), "flushed": time.perf_counter()}
+
+        def ler(index: int, path: Path):
+            meta = None
+            if not cancel_event.is_set() and not (
+                    loader.quarantine is not None and loader.quarantine.contains(path, count=False)):
+                meta = self.catalog.metadata(path)
+            if not publicar:
+                return
+            with lock:
+                if meta:
+                    state["pending"][index] = (meta["width"], meta["height"])
+                state["remaining"] -= 1
+                now = time.perf_counter()
+                if state["pending"] and (state["remaining"] == 0
+                                         or len(state["pending"]) >= self.SIZES_BATCH
+                                         or now - state["flushed"] >= self.SIZES_FLUSH_S):
+                    batch, state["pending"], state["flushed"] = state["pending"], {}, now
+                else:
+                    batch = None
+            if batch and not cancel_event.is_set():
+                self._emit({"status": "sizes", "sizes": batch}, generation)
+
+        for index, path in enumerate(imagens):
+            loader.executor.submit(ler, index, path, priority=TaskPriority.PREFETCH, group=group)
+        return group
+
+    def _scan_directories(self, base_path: Path, cancel_event: Optional[threading.Event] = None,
+                          generation: Optional[int] = None) -> List[Tuple[str, Path]]:
+        directories = []
+        try:
+            for item in base_path.iterdir():
+                if self._check_cancelled(cancel_event, generation):
+                    return []
+                try:
+                    if item.is_dir() and os.access(item, os.R_OK):
+                        directories.append((item.name, item))
+                except OSError:
+                    continue
+        except:
+            pass
+        return directories
+
+    def buscar_e_carregar(self, diretorio_raiz: str, termo_busca: str,
+                          cancel_event: Optional[threading.Event] = None,
+                          generation: Optional[int] = None):
+        """
+        Busca a peça e carrega suas imagens.
+
+        Args:
+            cancel_event: evento da busca (padrão: o do serviço); uma busca nova
+                recebe um evento próprio, então a anterior pode terminar sozinha
+            generation: geração da busca, repassada em todas as mensagens
+        """
+        cancel_event = cancel_event or self.cancel_event
+        self.apply_config()
+        with self.logger.trace("search_and_load", search_term=termo_busca) as trace_id:
+            start_time = time.time()
+
+            if self._check_cancelled(cancel_event, generation):
+                return
+
+            try:
+                diretorio_raiz_real = Path(diretorio_raiz).resolve()
+            except Exception as e:
+                self.logger.error("Invalid directory path", error_type=type(e).__name__,
+                                 path=diretorio_raiz, trace_id=trace_id)
+                self._emit({"status": "error", "msg": "Caminho inválido"}, generation)
+                return
+
+            if not diretorio_raiz_real.exists():
+                self._emit({"status": "error", "msg": "Diretório não existe"}, generation)
+                return
+
+            base_path_str = str(diretorio_raiz_real)
+            cache_result = self.dir_cache.search(base_path_str, termo_busca)
+
+            if not cache_result:
                 scan_start = time.time()
-                directories = self._scan_directories(diretorio_raiz_real)
+                directories = self._scan_directories(diretorio_raiz_real, cancel_event, generation)
                 scan_duration = (time.time() - scan_start) * 1000
 
-                if self._check_cancelled():
+                if self._check_cancelled(cancel_event, generation):
                     return
 
                 self.dir_cache.set(base_path_str, directories)
@@ -936,23 +4519,25 @@ class BuscadorService:
                 if not cache_result:
                     search_duration = (time.time() - start_time) * 1000
                     self.logger.record_search(termo_busca, search_duration, False)
-                    self.fila.put({"status": "not_found"})
+                    self._emit({"status": "not_found"}, generation)
                     return
 
             nome_peca, caminho_pasta = cache_result
+            self.last_root = base_path_str
+            self.last_part = caminho_pasta
+            self.autotuner.apply(base_path_str)
 
-            if self._check_cancelled():
+            if self._check_cancelled(cancel_event, generation):
                 return
 
-            extensoes = ('.jpg', '.jpeg', '.png', '.bmp', '.gif')
             imagens = []
 
             try:
                 for arquivo in caminho_pasta.iterdir():
-                    if self._check_cancelled():
+                    if self._check_cancelled(cancel_event, generation):
                         return
                     try:
-                        if arquivo.is_file() and arquivo.suffix.lower() in extensoes:
+                        if arquivo.is_file() and arquivo.suffix.lower() in IMAGE_EXTENSIONS:
                             if os.access(arquivo, os.R_OK):
                                 imagens.append(arquivo)
                     except OSError:
@@ -960,39 +4545,83 @@ class BuscadorService:
             except Exception as e:
                 self.logger.error("Error listing images", error_type=type(e).__name__,
                                  path=str(caminho_pasta), trace_id=trace_id)
-                self.fila.put({"status": "error", "msg": "Erro ao listar imagens"})
+                self._emit({"status": "error", "msg": "Erro ao listar imagens"}, generation)
                 return
 
             if not imagens:
-                self.fila.put({"status": "no_images"})
+                self._emit({"status": "no_images"}, generation)
                 return
 
-            self.fila.put({"status": "found_part", "nome": nome_peca, "total": len(imagens)})
-
-            if self.config.is_parallel_loading_enabled():
-                stats = self.parallel_loader.load_images_parallel(imagens, self.cancel_event,
-                                                                  self.fila, trace_id)
+            # Ordem natural e estável: cada imagem tem seu lugar antes de decodificar
+            imagens.sort(key=natural_sort_key)
+            self._emit({"status": "found_part", "nome": nome_peca, "total": len(imagens)}, generation)
+
+            listing = {"status": "listing", "nome": nome_peca, "imagens": [str(p) for p in imagens],
+                       "sizes": None, "total": len(imagens)}
+
+            def publicar_listagem():
+                # Nenhum I/O por arquivo antes da listagem: os placeholders
+                # nascem quadrados e as dimensões chegam depois ("sizes").
+                # O índice recebe os metadados mesmo sem placeholders dimensionados.
+                self._emit(listing, generation)
+                self._publicar_dimensoes(
+                    imagens, cancel_event, generation,
+                    publicar=self.config.get("performance", "placeholder_dimensions", False))
+
+            if self.config.get("performance", "use_atlas", False):
+                self._usar_atlas(caminho_pasta, imagens, trace_id)
+
+            if self.config.is_lazy_loading_enabled():
+                # Decodificação fica a cargo da viewport (update_viewport)
+                self.lazy_loader.start(imagens, tag=generation)
+                publicar_listagem()
+                self._emit({"status": "done", "lazy": True, "total": len(imagens)}, generation)
+                self.logger.info("Lazy listing published", trace_id=trace_id,
+                                 total_images=len(imagens))
+            elif self.config.is_parallel_loading_enabled():
+                publicar_listagem()
+                snapshot = self.autotuner.snapshot()
+                decoded = self._decoded_count()
+                blocked_ms = self._queue_blocked_ms()
+                stats = self.parallel_loader.load_images_parallel(imagens, cancel_event,
+                                                                  self.fila, trace_id,
+                                                                  generation=generation)
                 if stats.get("cancelled"):
                     return
+                self.autotuner.observe(base_path_str, snapshot, self._decoded_count() - decoded,
+                                       stalled_ms=self._queue_blocked_ms() - blocked_ms)
             else:
-                self.fila.put({"status": "start", "total": len(imagens), "nome": nome_peca})
+                publicar_listagem()
+                self._emit({"status": "start", "total": len(imagens), "nome": nome_peca}, generation)
                 for i, arquivo in enumerate(imagens):
-                    if self._check_cancelled():
+                    if self._check_cancelled(cancel_event, generation):
                         return
                     result = self.parallel_loader.load_single_image(arquivo, i)
                     if result:
                         nome, photo, caminho, _ = result
-                        self.fila.put({
+                        _put_data(self.fila, _tag({
                             "status": "progress",
+                            "index": i,
                             "data": (nome, photo, caminho),
                             "current": i,
                             "total": len(imagens)
-                        })
-                self.fila.put({"status": "done"})
+                        }, generation), cancel_event)
+                    else:
+                        self._emit({"status": "failed", "index": i}, generation)
+                self._emit({"status": "done"}, generation)
 
-            if not self._check_cancelled():
+            if not self._check_cancelled(cancel_event, generation):
                 search_duration = (time.time() - start_time) * 1000
                 self.logger.record_search(termo_busca, search_duration, True)
+                self.logger.debug("Catalog index stats", trace_id=trace_id,
+                                  **{f"catalog_{k}": v for k, v in self.catalog.stats().items()})
+                # Impressões e metadados novos (inclusive das buscas sob demanda) vão para o disco
+                self.parallel_loader.executor.submit(self.catalog.save,
+                                                     priority=TaskPriority.BACKGROUND)
+                if self.parallel_loader.quarantine is not None:
+                    self.logger.record_quarantine(self.quarantine.stats(), trace_id=trace_id)
+                    self.parallel_loader.executor.submit(self.quarantine.save,
+                                                         priority=TaskPriority.BACKGROUND)
 
 
 # ╔═══════════════════════════════════════════════════════════════════════╗
@@ -1000,38 +4629,69 @@ class BuscadorService:
 # ╚═══════════════════════════════════════════════════════════════════════╝
 
 class ThreadManager:
-    """Gerenciador de threads com lifecycle completo."""
+    """
+    Gerenciador de threads com lifecycle completo.
+
+    Cada busca recebe um `cancel_event` próprio e um número de geração:
+    cancelar apenas sinaliza (nunca bloqueia a thread da UI) e uma busca nova
+    substitui a anterior, que termina sozinha com o evento já sinalizado.
+    """
 
     def __init__(self, logger: Optional[StructuredLogger] = None):
         self.thread: Optional[threading.Thread] = None
         self.cancel_event = threading.Event()
+        self.generation = 0
         self.state = ThreadState.IDLE
         self.logger = logger
 
+    def new_generation(self) -> Tuple[int, threading.Event]:
+        """
+        Substitui a busca atual: sinaliza seu cancelamento (sem join) e
+        prepara evento e geração novos para a próxima `start_thread`.
+        """
+        if self.is_running():
+            self.cancel()
+            if self.logger:
+                self.logger.info("Search superseded", generation=self.generation)
+        self.cancel_event = threading.Event()
+        self.generation += 1
+        return self.generation, self.cancel_event
+
     def start_thread(self, target, args=(), name=None) -> bool:
         if self.is_running():
             return False
-        self.cancel_event.clear()
+        if self.cancel_event.is_set():
+            # Evento novo: a thread anterior continua vendo o seu sinalizado
+            self.cancel_event = threading.Event()
         self.state = ThreadState.RUNNING
-        self.thread = threading.Thread(target=self._thread_wrapper, args=(target, args),
+        self.thread = threading.Thread(target=self._thread_wrapper,
+                                       args=(target, args, self.cancel_event),
                                        name=name or "BuscadorThread", daemon=False)
         self.thread.start()
         return True
 
-    def _thread_wrapper(self, target, args):
+    def _thread_wrapper(self, target, args, cancel_event: threading.Event):
         try:
             target(*args)
-            self.state = ThreadState.CANCELLED if self.cancel_event.is_set() else ThreadState.FINISHED
+            state = ThreadState.CANCELLED if cancel_event.is_set() else ThreadState.FINISHED
         except Exception as e:
-            self.state = ThreadState.ERROR
+            state = ThreadState.ERROR
             if self.logger:
                 self.logger.exception("Thread execution error", error_type=type(e).__name__)
+        # Uma busca substituída não altera o estado da atual
+        if threading.current_thread() is self.thread:
+            self.state = state
+
+    def cancel(self):
+        """Sinaliza o cancelamento sem esperar a thread (seguro na thread da UI)."""
+        if self.is_running():
+            self.state = ThreadState.CANCELLING
+        self.cancel_event.set()
 
     def cancel_thread(self, timeout=5.0) -> bool:
         if not self.is_running():
             return True
-        self.state = ThreadState.CANCELLING
-        self.cancel_event.set()
+        self.cancel()
         if self.thread:
             self.thread.join(timeout=timeout)
             return not self.thread.is_alive()
@@ -1045,7 +4705,7 @@ class ThreadManager:
         if self.thread and self.thread.is_alive():
             self.cancel_thread(timeout=2.0)
         self.thread = None
-        self.cancel_event.clear()
+        self.cancel_event = threading.Event()
         self.state = ThreadState.IDLE
 
 
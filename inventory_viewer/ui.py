@@ -4,10 +4,502 @@ import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
 from PIL import Image, ImageTk
 import threading
+import time
 import queue
+import gc
 from pathlib import Path
+from typing import Optional, Tuple, List, Dict, Set, Any, Callable
+
+from .core import (StructuredLogger, ConfigManager, DirectoryCache, ParallelImageLoader,
+                   BuscadorService, ThreadManager, PriorityExecutor, ResultQueue,
+                   FullImageLoader, TilePyramid, TileDiskCache, TaskPriority, QueueDrainer, GridLayout,
+                   PerformanceMonitor)
+
+
+class ZoomableViewer:
+    """
+    Canvas do visualizador com zoom/pan sobre a pirâmide de tiles.
+
+    Modo ajustado: exibe a imagem em tamanho de tela (FullImageLoader).
+    Ao dar zoom, passa a exibir tiles 1:1 do nível da pirâmide: só os
+    tiles visíveis são decodificados, desenhados e mantidos em memória.
+    """
+
+    POLL_MS = 30
+
+    def __init__(self, app: "VisualizadorPecas", parent, path: Path):
+        self.app = app
+        self.path = path
+        self.canvas = tk.Canvas(parent, bg="black", highlightthickness=0)
+        self.canvas.pack(expand=True, fill="both")
+        self.text_item = self.canvas.create_text(0, 0, text="⏳ Carregando...", fill="white")
+
+        self.fit_image = None
+        self.fit_photo = None
+        self.level = None  # None = modo ajustado
+        self.items = {}    # (level, tx, ty) -> (item_id, PhotoImage)
+        self.pending = {}  # (level, tx, ty) -> Future
+        self._poll_job = None
+        self._render_job = None
+
+        config = app.config_manager
+        self.group = app.executor.create_group(f"viewer-{path.name}")
+        self.pyramid_future = app.executor.submit(
+            TilePyramid, path, config.get_cache_dir(),
+            config.get("advanced", "viewer_tile_size", 256),
+            config.get("advanced", "viewer_memory_tiles", 64), app.logger,
+            config.get_mmap_threshold_bytes(), disk_cache=app.tile_cache,
+            priority=TaskPriority.PREFETCH, group=self.group)
+
+        self.canvas.bind("<Configure>", lambda e: self._agendar_render())
+        self.canvas.bind("<MouseWheel>", lambda e: self._zoom(e, 1 if e.delta > 0 else -1))
+        self.canvas.bind("<Button-4>", lambda e: self._zoom(e, 1))
+        self.canvas.bind("<Button-5>", lambda e: self._zoom(e, -1))
+        self.canvas.bind("<ButtonPress-1>", lambda e: self.canvas.scan_mark(e.x, e.y))
+        self.canvas.bind("<B1-Motion>", self._arrastar)
+        self.canvas.bind("<Destroy>", lambda e: self.group.cancel())
+
+    def alive(self) -> bool:
+        try:
+            return bool(self.canvas.winfo_exists())
+        except tk.TclError:
+            return False
+
+    def show_message(self, text: str):
+        self.canvas.itemconfig(self.text_item, text=text)
+        self._centralizar_texto()
+
+    def set_image(self, img):
+        """Imagem do modo ajustado (prévia ou decodificação completa)."""
+        self.fit_image = img
+        self.fit_photo = ImageTk.PhotoImage(img)
+        self.canvas.itemconfig(self.text_item, text="")
+        if self.level is None:
+            self._render()
+
+    # ── Geometria ─────────────────────────────────────────────────────────
+
+    def _pyramid(self) -> Optional[TilePyramid]:
+        if self.pyramid_future.done() and not self.pyramid_future.cancelled():
+            if self.pyramid_future.exception() is None:
+                return self.pyramid_future.result()
+        return None
+
+    def _fit_width(self, pyramid: TilePyramid) -> float:
+        if self.fit_image is not None:
+            return self.fit_image.width
+        cw, ch = self.canvas.winfo_width(), self.canvas.winfo_height()
+        return pyramid.width * min(1.0, cw / pyramid.width, ch / pyramid.height)
+
+    def _scale(self, pyramid: TilePyramid) -> float:
+        """Pixels de tela por pixel da fonte no modo atual."""
+        if self.level is None:
+            return self._fit_width(pyramid) / pyramid.width
+        return 1.0 / (1 << self.level)
+
+    def _origin(self, pyramid: TilePyramid) -> Tuple[float, float]:
+        """Posição (coords. do canvas) do pixel (0, 0) da imagem."""
+        if self.level is None:
+            cw, ch = self.canvas.winfo_width(), self.canvas.winfo_height()
+            scale = self._scale(pyramid)
+            return ((cw - pyramid.width * scale) / 2, (ch - pyramid.height * scale) / 2)
+        return (0.0, 0.0)
+
+    def _nivel_zoom(self, pyramid: TilePyramid, direction: int):
+        """Próximo nível de zoom (None = modo ajustado)."""
+        fit_w = self._fit_width(pyramid) * 1.05
+        maiores = [lvl for lvl in range(pyramid.levels) if pyramid.level_size(lvl)[0] > fit_w]
+        if not maiores:
+            return None
+        if self.level is None:
+            return max(maiores) if direction > 0 else None
+        novo = self.level - direction
+        if novo < 0:
+            return 0
+        return novo if novo in maiores else None
+
+    # ── Interação ─────────────────────────────────────────────────────────
+
+    def _zoom(self, event, direction: int):
+        pyramid = self._pyramid()
+        if pyramid is None:
+            return "break"
+        novo = self._nivel_zoom(pyramid, direction)
+        if novo == self.level:
+            return "break"
+
+        # Ponto da fonte sob o cursor permanece sob o cursor
+        ox, oy = self._origin(pyramid)
+        scale = self._scale(pyramid)
+        sx = (self.canvas.canvasx(event.x) - ox) / scale
+        sy = (self.canvas.canvasy(event.y) - oy) / scale
+
+        self.level = novo
+        self._limpar_tiles()
+        self._configurar_regiao(pyramid)
+        if novo is not None:
+            nscale = self._scale(pyramid)
+            self._mover_para(sx * nscale - event.x, sy * nscale - event.y)
+        self._render()
+        return "break"
+
+    def _arrastar(self, event):
+        if self.level is not None:
+            self.canvas.scan_dragto(event.x, event.y, gain=1)
+            self._agendar_render()
+
+    def _configurar_regiao(self, pyramid: TilePyramid):
+        cw, ch = self.canvas.winfo_width(), self.canvas.winfo_height()
+        if self.level is None:
+            self.canvas.configure(scrollregion=(0, 0, cw, ch))
+            self.canvas.xview_moveto(0)
+            self.canvas.yview_moveto(0)
+            return
+        lw, lh = pyramid.level_size(self.level)
+        pad_x, pad_y = max(0, (cw - lw) / 2), max(0, (ch - lh) / 2)
+        self.canvas.configure(scrollregion=(-pad_x, -pad_y, lw + pad_x, lh + pad_y))
+
+    def _mover_para(self, x: float, y: float):
+        x0, y0, x1, y1 = (float(v) for v in self.canvas.cget("scrollregion").split())
+        self.canvas.xview_moveto((x - x0) / max(1.0, x1 - x0))
+        self.canvas.yview_moveto((y - y0) / max(1.0, y1 - y0))
+
+    # ── Renderização ──────────────────────────────────────────────────────
+
+    def _agendar_render(self):
+        if self._render_job is None:
+            self._render_job = self.canvas.after_idle(self._render)
+
+    def _centralizar_texto(self):
+        self.canvas.coords(self.text_item, self.canvas.canvasx(self.canvas.winfo_width() / 2),
+                           self.canvas.canvasy(self.canvas.winfo_height() / 2))
+
+    def _render(self):
+        self._render_job = None
+        if not self.alive():
+            return
+        self._centralizar_texto()
+        self.canvas.delete("fit")
+        if self.level is None:
+            if self.fit_photo is not None:
+                cw, ch = self.canvas.winfo_width(), self.canvas.winfo_height()
+                self.canvas.create_image(cw / 2, ch / 2, image=self.fit_photo, tags="fit")
+            return
 
-from .core import StructuredLogger, ConfigManager, DirectoryCache, ParallelImageLoader, BuscadorService, ThreadManager
+        pyramid = self._pyramid()
+        visiveis = self._visiveis(pyramid)
+
+        for key in [k for k in self.items if k not in visiveis]:
+            self.canvas.delete(self.items.pop(key)[0])
+        self._descartar_pendentes(visiveis)
+
+        faltando = []
+        for key in visiveis:
+            if key in self.items or key in self.pending:
+                continue
+            tile = pyramid.get_cached_tile(*key)
+            if tile is not None:
+                self._desenhar_tile(pyramid, key, tile)
+            else:
+                faltando.append(key[1:])
+        if faltando:
+            # Um lote por render: o nível é decodificado uma vez e liberado;
+            # o anel em volta vai só para o disco (pan sem nova decodificação)
+            anel = [c for c in self._coords(pyramid, margin=pyramid.tile_size)
+                    if (self.level, *c) not in visiveis]
+            future = self.app.executor.submit(
+                pyramid.get_tiles, self.level, faltando, anel,
+                priority=TaskPriority.INTERACTIVE, group=self.group)
+            for coord in faltando:
+                self.pending[(self.level, *coord)] = future
+
+        pyramid.trim(visiveis)
+        if self.pending and self._poll_job is None:
+            self._poll_job = self.canvas.after(self.POLL_MS, self._poll_tiles)
+
+    def _coords(self, pyramid: TilePyramid, margin: int = 0) -> List[Tuple[int, int]]:
+        cw, ch = self.canvas.winfo_width(), self.canvas.winfo_height()
+        x0, y0 = self.canvas.canvasx(0), self.canvas.canvasy(0)
+        return pyramid.visible_tiles(self.level, x0 - margin, y0 - margin,
+                                     x0 + cw + margin, y0 + ch + margin)
+
+    def _visiveis(self, pyramid: TilePyramid) -> Set[Tuple[int, int, int]]:
+        return {(self.level, tx, ty) for tx, ty in self._coords(pyramid)}
+
+    def _descartar_pendentes(self, visiveis: Set[Tuple[int, int, int]]):
+        """Esquece pendentes fora da viewport; cancela lotes que ninguém mais espera."""
+        saindo = {self.pending.pop(k) for k in [k for k in self.pending if k not in visiveis]}
+        for future in saindo - set(self.pending.values()):
+            future.cancel()
+
+    def _desenhar_tile(self, pyramid: TilePyramid, key, tile):
+        _, tx, ty = key
+        photo = ImageTk.PhotoImage(tile)
+        item = self.canvas.create_image(tx * pyramid.tile_size, ty * pyramid.tile_size,
+                                        anchor="nw", image=photo)
+        self.items[key] = (item, photo)
+
+    def _poll_tiles(self):
+        self._poll_job = None
+        if not self.alive():
+            return
+        pyramid = self._pyramid()
+        visiveis = self._visiveis(pyramid) if self.level is not None else set()
+        self._descartar_pendentes(visiveis)
+        for key, future in list(self.pending.items()):
+            if not future.done():
+                continue
+            del self.pending[key]
+            if future.cancelled() or future.exception() is not None:
+                continue
+            tile = future.result().get(key[1:])
+            if tile is not None and key not in self.items:
+                self._desenhar_tile(pyramid, key, tile)
+        if pyramid is not None:
+            pyramid.trim(visiveis)  # Tiles que saíram da viewport não ficam em memória
+        if self.pending:
+            self._poll_job = self.canvas.after(self.POLL_MS, self._poll_tiles)
+
+    def _limpar_tiles(self):
+        for item, _ in self.items.values():
+            self.canvas.delete(item)
+        self.items.clear()
+        for future in self.pending.values():
+            future.cancel()
+        self.pending.clear()
+
+
+class ThumbnailGrid:
+    """
+    Grid de thumbnails virtualizado sobre um único Canvas.
+
+    Cada tile é um conjunto de itens de canvas (moldura, placeholder,
+    imagem, aviso e nome) — nenhum widget por imagem. Os tiles são
+    reservados na ordem da listagem e preenchidos conforme chegam; o
+    placeholder ganha as proporções da imagem assim que o cabeçalho é lido
+    ("sizes"), dentro do tile de tamanho fixo. Só as linhas visíveis (mais uma
+    margem) têm itens; ao rolar, os conjuntos que saem da janela são
+    reaproveitados para os que entram. Limpar e redesenhar custam
+    O(visível), não O(tamanho da pasta).
+
+    Com colunas automáticas, a largura do canvas define as colunas; um
+    redimensionamento só move os itens visíveis (um relayout por ciclo ocioso).
+    """
+
+    RENDER_MARGIN_ROWS = 1
+    HEADER_HEIGHT = 40
+
+    def __init__(self, app: "VisualizadorPecas", canvas: tk.Canvas):
+        self.app = app
+        self.canvas = canvas
+        self.layout = GridLayout(app.config_manager.get_thumbnail_size(),
+                                 app.config_manager.get("ui", "max_columns", 3))
+        # None = colunas pela largura do canvas; senão, número fixo
+        self.fixed_columns: Optional[int] = None
+        # {"nome", "caminho", "size" (do cabeçalho ou None), "photo" (None = pendente), "failed"}
+        self.tiles: List[Dict[str, Any]] = []
+        self._slots: Dict[int, Tuple[int, ...]] = {}  # índice -> itens
+        self._free: List[Tuple[int, ...]] = []
+        self._render_job = None
+        self._scrollregion = None
+        self._hover_index: Optional[int] = None
+        # Notificado a cada render com (primeiro, último) índices visíveis
+        self.on_viewport: Optional[Callable[[int, int], None]] = None
+
+        self.header_item = canvas.create_text(self.layout.gap, self.HEADER_HEIGHT // 2,
+                                              anchor="w", text="", font=("Arial", 12, "bold"))
+        canvas.bind("<Double-Button-1>", self._on_double_click)
+        canvas.bind("<Motion>", self._on_motion)
+        canvas.bind("<Leave>", lambda e: self._set_hover(None))
+
+    # ── Modelo ────────────────────────────────────────────────────────────
+
+    def set_header(self, text: str, color: str = "black"):
+        self.canvas.itemconfig(self.header_item, text=text, fill=color)
+        self.layout.top = self.HEADER_HEIGHT if text else 0
+        self._reposicionar()
+
+    def set_tiles(self, caminhos: List[str], sizes: Optional[List] = None):
+        """Reserva um tile pendente por imagem, na ordem da listagem."""
+        sizes = sizes or [None] * len(caminhos)
+        self.tiles.extend({"nome": Path(c).name, "caminho": c, "size": size,
+                           "photo": None, "failed": False}
+                          for c, size in zip(caminhos, sizes))
+        self.schedule_render()
+
+    def set_sizes(self, sizes: Dict[int, Tuple[int, int]]):
+        """Dimensões lidas do cabeçalho depois da listagem (ajusta placeholders)."""
+        for index, size in sizes.items():
+            if index < len(self.tiles):
+                self.tiles[index]["size"] = tuple(size)
+                if index in self._slots:
+                    self._place(index, self._slots[index])
+
+    def update_tile(self, index: int, photo=None, failed: bool = False):
+        if index >= len(self.tiles):
+            return
+        tile = self.tiles[index]
+        tile["photo"], tile["failed"] = photo, failed
+        if index in self._slots:
+            self._place(index, self._slots[index])
+
+    def invalidate_photos(self):
+        """Thumbnails do tamanho anterior voltam a pendentes (não desenham por cima dos vizinhos)."""
+        for tile in self.tiles:
+            tile["photo"] = None
+        for index, slot in self._slots.items():
+            self._place(index, slot)
+        self.schedule_render()
+
+    def clear(self):
+        """Descarta o modelo e esconde os itens (mantidos para reuso)."""
+        self.tiles = []
+        for slot in self._slots.values():
+            self._hide(slot)
+            self._free.append(slot)
+        self._slots.clear()
+        self._hover_index = None
+        self.canvas.itemconfig(self.header_item, text="")
+        self.layout.top = 0
+        self.canvas.yview_moveto(0)
+        self.schedule_render()
+
+    def configure(self, thumb_size: int, columns: Optional[int] = None):
+        """Tamanho do thumbnail e colunas fixas (None = automáticas)."""
+        self.fixed_columns = columns
+        if thumb_size != self.layout.thumb_size:
+            self.layout.thumb_size = thumb_size
+            self._reposicionar()
+        else:
+            self.schedule_render()
+
+    # ── Renderização ──────────────────────────────────────────────────────
+
+    def schedule_render(self):
+        """Agrupa rolagem, redimensionamento e novas mensagens em um render."""
+        if self._render_job is None:
+            self._render_job = self.canvas.after_idle(self.render)
+
+    def _reposicionar(self):
+        """Geometria mudou: todos os itens visíveis precisam ser recolocados."""
+        for index, slot in self._slots.items():
+            self._place(index, slot)
+        self.schedule_render()
+
+    def _ajustar_colunas(self):
+        """Recalcula as colunas; o primeiro tile visível continua no topo."""
+        columns = self.fixed_columns or self.layout.columns_for_width(self.canvas.winfo_width())
+        if columns == self.layout.columns:
+            return
+        total = len(self.tiles)
+        top = self.canvas.canvasy(0)
+        anchor = self.layout.visible_range(top, top, total)[0]
+        self.layout.columns = columns
+        for index, slot in self._slots.items():
+            self._place(index, slot)
+        if anchor:
+            self._set_scrollregion(total)
+            y = self.layout.tile_origin(anchor)[1] - self.layout.gap
+            self.canvas.yview_moveto(y / self.layout.content_height(total))
+
+    def _set_scrollregion(self, total: int):
+        width = max(self.layout.content_width(), self.canvas.winfo_width())
+        region = (0, 0, width, self.layout.content_height(total))
+        if region != self._scrollregion:
+            # Reconfigurar dispara o yscrollcommand (e outro render): só quando muda
+            self._scrollregion = region
+            self.canvas.configure(scrollregion=region)
+
+    def render(self):
+        self._render_job = None
+        self._ajustar_colunas()
+        total = len(self.tiles)
+        self._set_scrollregion(total)
+        top = self.canvas.canvasy(0)
+        bottom = top + self.canvas.winfo_height()
+        first, last = self.layout.visible_range(top, bottom, total, self.RENDER_MARGIN_ROWS)
+
+        for index in [i for i in self._slots if not first <= i <= last]:
+            slot = self._slots.pop(index)
+            self._hide(slot)
+            self._free.append(slot)
+        for index in range(first, last + 1):
+            if index not in self._slots:
+                slot = self._free.pop() if self._free else self._create_slot()
+                self._slots[index] = slot
+                self._place(index, slot)
+
+        if self.on_viewport and total:
+            self.on_viewport(*self.layout.visible_range(top, bottom, total))
+
+    def _create_slot(self) -> Tuple[int, ...]:
+        c = self.canvas
+        return (c.create_rectangle(0, 0, 0, 0, outline="#cccccc", fill="white"),
+                c.create_rectangle(0, 0, 0, 0, outline="", fill="#eeeeee"),
+                c.create_image(0, 0, anchor="n"),
+                c.create_text(0, 0, text="⚠️", font=("Arial", 24)),
+                c.create_text(0, 0, anchor="n", font=("Arial", 8), justify="center"))
+
+    def _placeholder_box(self, tile: Dict[str, Any]) -> Tuple[int, int]:
+        """Tamanho que o thumbnail terá (thumbnail() nunca amplia)."""
+        size = self.layout.thumb_size
+        if not tile["size"]:
+            return size, size
+        w, h = tile["size"]
+        scale = min(1.0, size / max(1, w), size / max(1, h))
+        return max(1, round(w * scale)), max(1, round(h * scale))
+
+    def _place(self, index: int, slot: Tuple[int, ...]):
+        rect, shade, image, mark, label = slot
+        tile = self.tiles[index]
+        layout = self.layout
+        x, y = layout.tile_origin(index)
+        pad = GridLayout.TILE_PAD
+        cx = x + layout.tile_width // 2
+        c = self.canvas
+        c.coords(rect, x, y, x + layout.tile_width, y + layout.tile_height)
+        w, h = self._placeholder_box(tile)
+        c.coords(shade, cx - w // 2, y + pad, cx - w // 2 + w, y + pad + h)
+        c.coords(image, cx, y + pad)
+        c.coords(mark, cx, y + pad + layout.thumb_size // 2)
+        c.coords(label, cx, y + pad + layout.thumb_size + 4)
+        photo = tile["photo"]
+        pending = photo is None and not tile["failed"]
+        c.itemconfig(shade, state="normal" if pending else "hidden")
+        c.itemconfig(image, image=photo or "", state="normal")
+        c.itemconfig(mark, state="normal" if tile["failed"] else "hidden")
+        c.itemconfig(label, text=tile["nome"], width=layout.thumb_size, state="normal")
+        c.itemconfig(rect, state="normal")
+
+    def _hide(self, slot: Tuple[int, ...]):
+        self.canvas.itemconfig(slot[2], image="")  # Solta a referência ao PhotoImage
+        for item in slot:
+            self.canvas.itemconfig(item, state="hidden")
+
+    # ── Interação ─────────────────────────────────────────────────────────
+
+    def _index_at(self, event) -> Optional[int]:
+        return self.layout.index_at(self.canvas.canvasx(event.x), self.canvas.canvasy(event.y),
+                                    len(self.tiles))
+
+    def _on_double_click(self, event):
+        index = self._index_at(event)
+        if index is not None:
+            self.app.abrir_visualizador(self.tiles[index]["caminho"])
+
+    def _on_motion(self, event):
+        self._set_hover(self._index_at(event))
+
+    def _set_hover(self, index: Optional[int]):
+        """Hover prolongado sobre um tile pré-decodifica a imagem completa."""
+        if index == self._hover_index:
+            return
+        self._hover_index = index
+        self.canvas.config(cursor="hand2" if index is not None else "")
+        if index is None:
+            self.app._cancelar_hover()
+        else:
+            self.app._on_tile_enter(self.tiles[index]["caminho"])
 
 
 class VisualizadorPecas:
@@ -15,12 +507,15 @@ class VisualizadorPecas:
 
     def __init__(self, root):
         self.root = root
-        self.logger = StructuredLogger("VisualizadorPecas")
+        self.config_manager = ConfigManager()
+        self.logger = StructuredLogger(
+            "VisualizadorPecas",
+            queue_size=self.config_manager.get("advanced", "log_queue_size", 10000),
+            overflow=self.config_manager.get("advanced", "log_overflow", "drop_debug"),
+            level=self.config_manager.get("advanced", "log_level", "INFO"))
         self.logger.info("Application starting", event_type="app_start", version="8.1",
                         features=["parallel_loading", "unicode_normalization"])
 
-        self.config_manager = ConfigManager()
-
         self.root.title("Buscador de Peças Pro - v8.1 ⚡ Unicode+")
         geometry = self.config_manager.get_window_geometry()
         self.root.geometry(geometry)
@@ -35,21 +530,55 @@ class VisualizadorPecas:
 
         self.diretorio_raiz = tk.StringVar()
         self.pesquisa_var = tk.StringVar()
-        self.imagens_ativas = []
-        self.widgets_imagem = []
         self.contador_buscas = 0
         self.last_stats = None
+        # Geração da busca exibida; mensagens de outras gerações são descartadas
+        self.geracao_busca: Optional[int] = None
 
         cache_ttl = self.config_manager.get("general", "cache_ttl_seconds", 300)
         self.dir_cache = DirectoryCache(ttl_seconds=cache_ttl, logger=self.logger)
         self.thread_manager = ThreadManager(logger=self.logger)
-        self.fila = queue.Queue()
+        self.fila = ResultQueue(maxsize=self.config_manager.get_result_queue_size())
+        self.executor = PriorityExecutor(max_workers=self.config_manager.get_max_workers(),
+                                         name="AppWorker", logger=self.logger)
+        self.service = BuscadorService(self.fila, self.thread_manager.cancel_event,
+                                       self.dir_cache, self.logger, self.config_manager,
+                                       executor=self.executor)
+        self.full_loader = FullImageLoader(
+            self.executor,
+            cache_entries=self.config_manager.get("performance", "viewer_cache_entries", 4),
+            logger=self.logger,
+            mmap_threshold=self.config_manager.get_mmap_threshold_bytes())
+        # Tiles do zoom em disco: orçamento aplicado já na abertura, em background
+        self.tile_cache = TileDiskCache(self.config_manager.get_cache_dir(),
+                                        self._tile_cache_bytes(), logger=self.logger)
+        self.executor.submit(self.tile_cache.resize, self._tile_cache_bytes(),
+                             priority=TaskPriority.BACKGROUND)
+        self._hover_job = None
 
-        self.grid_row = 0
-        self.grid_col = 0
         self.max_cols = self.config_manager.get("ui", "max_columns", 3)
 
+        self._prefetch_job = None
+
+        # Fila drenada em lotes por quadro; produtores acordam a UI quando ociosa
+        self.drainer = QueueDrainer(self.fila, self._processar_mensagem,
+                                    budget_ms=self.config_manager.get("ui", "frame_budget_ms", 12))
+        self._fila_job = None
+        # Produtores só marcam o sinal (sem Tcl fora da thread da UI); a UI
+        # ociosa o confere a cada wake_poll_ms
+        self._fila_sinal = threading.Event()
+        self._ocioso_desde = 0.0
+        self.fila.on_ready = self._fila_sinal.set
+
+        # HUD de performance: amostrado só enquanto visível
+        loader = self.service.parallel_loader
+        self.monitor = PerformanceMonitor(self.logger, self.executor, loader.thumbnail_cache,
+                                          self.full_loader, self.fila, loader.profiler,
+                                          pipeline=self.service.pipeline)
+        self._hud_job = None
+
         self.criar_interface()
+        self.config_manager.subscribe(self._on_config_change)
         self.verificar_fila()
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
 
@@ -89,6 +618,10 @@ class VisualizadorPecas:
         ttk.Button(linha1, text="⚙️ Config", 
                   command=self.abrir_configuracoes).pack(side="left", padx=5)
 
+        ttk.Button(linha1, text="📊 HUD",
+                  command=self.alternar_hud).pack(side="left", padx=5)
+        self.root.bind("<F12>", lambda e: self.alternar_hud())
+
         self.progress_frame = ttk.Frame(controle_frame)
         self.progress_frame.pack(fill="x", pady=5)
 
@@ -102,12 +635,11 @@ class VisualizadorPecas:
         self.scrollbar = ttk.Scrollbar(container_scroll, orient="vertical",
                                        command=self.canvas.yview)
 
-        self.scrollable_frame = tk.Frame(self.canvas, bg="white")
-        self.scrollable_frame.bind("<Configure>",
-            lambda e: self.canvas.configure(scrollregion=self.canvas.bbox("all")))
-
-        self.canvas.create_window((0, 0), window=self.scrollable_frame, anchor="nw")
-        self.canvas.configure(yscrollcommand=self.scrollbar.set)
+        self.grid = ThumbnailGrid(self, self.canvas)
+        self.grid.configure(self.config_manager.get_thumbnail_size(), self._colunas_fixas())
+        self.grid.on_viewport = self._atualizar_viewport
+        self.canvas.configure(yscrollcommand=self._on_canvas_scroll)
+        self.canvas.bind("<Configure>", lambda e: self.grid.schedule_render())
 
         self.canvas.pack(side="left", fill="both", expand=True)
         self.scrollbar.pack(side="right", fill="y")
@@ -120,6 +652,34 @@ class VisualizadorPecas:
                               relief="sunken", anchor="w", padding=(5, 2))
         status_bar.pack(side="bottom", fill="x")
 
+        self.hud_var = tk.StringVar()
+        self.hud_label = tk.Label(self.root, textvariable=self.hud_var, justify="left",
+                                  anchor="w", font=("Courier", 9), bg="#1e1e1e", fg="#d4d4d4",
+                                  padx=8, pady=4)
+        if self.config_manager.get("ui", "show_hud", False):
+            self.alternar_hud()
+
+    def alternar_hud(self):
+        """Mostra/oculta o painel de métricas ao vivo (F12)."""
+        if self.hud_label.winfo_manager():
+            self.hud_label.pack_forget()
+            if self._hud_job is not None:
+                self.root.after_cancel(self._hud_job)
+                self._hud_job = None
+            self.config_manager.set("ui", "show_hud", False)
+            return
+        self.hud_label.pack(side="bottom", fill="x")
+        self.config_manager.set("ui", "show_hud", True)
+        self.atualizar_hud()
+
+    def atualizar_hud(self):
+        try:
+            self.hud_var.set("\n".join(PerformanceMonitor.format_lines(self.monitor.sample())))
+        except Exception as e:
+            self.logger.warning("HUD refresh failed", error=str(e))
+        self._hud_job = self.root.after(self.config_manager.get("ui", "hud_refresh_ms", 500),
+                                        self.atualizar_hud)
+
     def selecionar_pasta(self):
         pasta = filedialog.askdirectory(title="Selecione a Pasta Raiz")
         if not pasta:
@@ -137,10 +697,6 @@ class VisualizadorPecas:
             messagebox.showerror("Erro", f"Erro: {e}")
 
     def iniciar_busca(self):
-        if self.thread_manager.is_running():
-            messagebox.showwarning("Aviso", "Busca já em andamento")
-            return
-
         termo = self.pesquisa_var.get().strip()
         if not termo:
             messagebox.showwarning("Aviso", "Digite um código")
@@ -150,16 +706,18 @@ class VisualizadorPecas:
             messagebox.showwarning("Aviso", "Selecione a pasta raiz")
             return
 
+        self._parar_prefetch()
         self.contador_buscas += 1
         self.config_manager.add_to_history(termo)
         self.combo_pesquisa['values'] = self.config_manager.get_history()
         self.limpar_visualizacao()
 
-        service = BuscadorService(self.fila, self.thread_manager.cancel_event,
-                                 self.dir_cache, self.logger, self.config_manager)
-
-        self.thread_manager.start_thread(target=service.buscar_e_carregar,
-                                        args=(self.diretorio_raiz.get(), termo),
+        # Uma busca em andamento é substituída (cancelada sem esperar)
+        geracao, cancel_event = self.thread_manager.new_generation()
+        self.geracao_busca = geracao
+        self.thread_manager.start_thread(target=self.service.buscar_e_carregar,
+                                        args=(self.diretorio_raiz.get(), termo,
+                                              cancel_event, geracao),
                                         name=f"Busca-{termo}")
 
         self.progress_bar.pack(side="left", fill="x", expand=True, padx=5)
@@ -175,9 +733,9 @@ class VisualizadorPecas:
     def cancelar_busca(self):
         if not self.thread_manager.is_running():
             return
-        self.btn_cancelar.config(state="disabled")
-        self.lbl_progresso.config(text="Cancelando...")
-        self.thread_manager.cancel_thread(timeout=3.0)
+        # Não bloqueia a UI: a busca termina sozinha e suas mensagens são ignoradas
+        self.thread_manager.cancel()
+        self.geracao_busca = None
         self.finalizar_carregamento("❌ Cancelado")
 
     def limpar_tudo(self):
@@ -186,93 +744,181 @@ class VisualizadorPecas:
         self.status_var.set("Limpo")
 
     def limpar_visualizacao(self):
-        for widget in self.widgets_imagem:
+        self.service.lazy_loader.cancel()
+        self.grid.clear()
+        self.grid.configure(self.config_manager.get_thumbnail_size(), self._colunas_fixas())
+
+    def _on_config_change(self, changes: Dict[str, Dict[str, Any]]):
+        """Reconfigura grade, visualizador e tema no lugar (só na thread da UI)."""
+        if threading.current_thread() is not threading.main_thread():
+            return  # Alterações de workers em background (autotune) não afetam widgets
+        ui = changes.get("ui", {})
+        perf = changes.get("performance", {})
+        if "log_level" in changes.get("advanced", {}):
+            self.logger.set_level(changes["advanced"]["log_level"])
+        if "max_columns" in ui:
+            self.max_cols = ui["max_columns"]
+        if {"max_columns", "auto_columns"} & ui.keys() or "thumbnail_size" in perf:
+            self.grid.configure(self.config_manager.get_thumbnail_size(), self._colunas_fixas())
+        if "thumbnail_size" in perf and self.grid.tiles:
+            self._recarregar_thumbnails()
+        if "viewer_disk_cache_mb" in changes.get("advanced", {}):
+            self.executor.submit(self.tile_cache.resize, self._tile_cache_bytes(),
+                                 priority=TaskPriority.BACKGROUND)
+        if "viewer_cache_entries" in perf:
+            self.full_loader.resize(perf["viewer_cache_entries"])
+        if "theme" in ui:
             try:
-                if widget.winfo_exists():
-                    widget.config(image='')
-            except:
+                self.style.theme_use(ui["theme"])
+            except tk.TclError:
                 pass
-        self.imagens_ativas.clear()
-        self.widgets_imagem.clear()
-        for widget in self.scrollable_frame.winfo_children():
-            widget.destroy()
-        gc.collect()
-        self.grid_row = 0
-        self.grid_col = 0
 
-    def verificar_fila(self):
-        try:
-            msg = self.fila.get_nowait()
-
-            if msg["status"] == "found_part":
-                tk.Label(self.scrollable_frame, text=f"📦 {msg['nome']}",
-                        font=("Arial", 12, "bold"), bg="white").grid(
-                    row=self.grid_row, column=0, columnspan=self.max_cols, pady=10)
-                self.grid_row += 1
-
-            elif msg["status"] in ["start", "start_parallel"]:
-                self.progress_bar.config(mode="determinate", maximum=msg["total"])
-
-            elif msg["status"] == "progress":
-                nome, photo, caminho = msg["data"]
-                self.adicionar_imagem_grid(nome, photo, caminho)
-                self.imagens_ativas.append(photo)
-                self.progress_bar['value'] = msg.get("current", 0) + 1
-
-            elif msg["status"] == "done":
-                stats = msg.get("stats")
-                if stats:
-                    self.last_stats = stats
-                    status_msg = f"✅ {stats['loaded']} imagens"
-                    if stats.get('speedup'):
-                        status_msg += f" | Speedup: {stats['speedup']:.1f}x"
-                    if stats.get('throughput_imgs_per_sec'):
-                        status_msg += f" | {stats['throughput_imgs_per_sec']:.1f} imgs/s"
-                    self.finalizar_carregamento(status_msg)
-                else:
-                    self.finalizar_carregamento(f"✅ {len(self.imagens_ativas)} imagens")
-
-            elif msg["status"] == "cancelled":
-                self.finalizar_carregamento("❌ Cancelado")
-
-            elif msg["status"] == "not_found":
-                tk.Label(self.scrollable_frame, text="❌ Não encontrado",
-                        font=("Arial", 14, "bold"), fg="red", bg="white").grid(
-                    row=0, column=0, columnspan=self.max_cols, pady=20)
-                self.finalizar_carregamento("❌ Não encontrado")
-
-            elif msg["status"] == "no_images":
-                tk.Label(self.scrollable_frame, text="⚠️ Sem imagens",
-                        font=("Arial", 12), fg="orange", bg="white").grid(
-                    row=0, column=0, columnspan=self.max_cols, pady=20)
-                self.finalizar_carregamento("⚠️ Sem imagens")
-
-            elif msg["status"] == "error":
-                messagebox.showerror("Erro", msg["msg"])
-                self.finalizar_carregamento("❌ Erro")
-
-        except queue.Empty:
-            pass
-
-        self.root.after(50, self.verificar_fila)
-
-    def adicionar_imagem_grid(self, nome: str, photo: ImageTk.PhotoImage, caminho: str):
-        frame = tk.Frame(self.scrollable_frame, borderwidth=2, relief="groove",
-                        bg="white", padx=5, pady=5)
-        frame.grid(row=self.grid_row, column=self.grid_col, padx=10, pady=10, sticky="n")
+    def _recarregar_thumbnails(self):
+        """
+        Novo tamanho de thumbnail: os tiles visíveis são pedidos de novo pelo
+        carregamento sob demanda (a escada de tamanhos costuma já estar no
+        cache). Listagens carregadas em paralelo passam ao modo sob demanda.
+        """
+        self.grid.invalidate_photos()
+        lazy = self.service.lazy_loader
+        if lazy.total != len(self.grid.tiles) or not lazy.invalidate():
+            lazy.start([Path(tile["caminho"]) for tile in self.grid.tiles], tag=self.geracao_busca)
+
+    def _tile_cache_bytes(self) -> int:
+        return int(self.config_manager.get("advanced", "viewer_disk_cache_mb", 256)) * 1024 * 1024
+
+    def _colunas_fixas(self) -> Optional[int]:
+        auto = self.config_manager.get("ui", "auto_columns", True)
+        return None if auto else self.max_cols
+
+    def _agendar_fila(self, delay_ms: int):
+        if self._fila_job is not None:
+            self.root.after_cancel(self._fila_job)
+        self._fila_job = self.root.after(delay_ms, self.verificar_fila)
 
-        lbl_img = tk.Label(frame, image=photo, bg="white", cursor="hand2")
-        lbl_img.pack()
-        lbl_img.bind("<Double-Button-1>", lambda e, p=caminho: self.abrir_visualizador(p))
-        self.widgets_imagem.append(lbl_img)
-
-        tk.Label(frame, text=nome, font=("Arial", 8), wraplength=200,
-                bg="white").pack(pady=5)
-
-        self.grid_col += 1
-        if self.grid_col >= self.max_cols:
-            self.grid_col = 0
-            self.grid_row += 1
+    def verificar_fila(self):
+        """Drena um lote dentro do orçamento do quadro e decide quando voltar."""
+        self._fila_job = None
+        self._fila_sinal.clear()
+        self.drainer.budget_ms = self.config_manager.get("ui", "frame_budget_ms", 12)
+        self.drainer.drain()
+        if self.drainer.pending() or not self.fila.arm():
+            self._agendar_fila(1)  # Ainda há mensagens: próximo lote após redesenhar
+        else:
+            # Ocioso: espera o sinal do produtor; a consulta lenta é só uma rede de segurança
+            self._ocioso_desde = time.perf_counter()
+            self._fila_job = self.root.after(self._wake_poll_ms(), self._conferir_sinal)
+
+    def _wake_poll_ms(self) -> int:
+        return max(1, int(self.config_manager.get("ui", "wake_poll_ms", 16)))
+
+    def _conferir_sinal(self):
+        """Tick barato da UI ociosa: só lê o sinal, sem tocar na fila."""
+        self._fila_job = None
+        idle_s = self.config_manager.get("ui", "idle_poll_ms", 250) / 1000
+        if self._fila_sinal.is_set() or time.perf_counter() - self._ocioso_desde >= idle_s:
+            self.verificar_fila()
+        else:
+            self._fila_job = self.root.after(self._wake_poll_ms(), self._conferir_sinal)
+
+    def _processar_mensagem(self, msg):
+        if "generation" in msg and msg["generation"] != self.geracao_busca:
+            pass  # Busca substituída ou cancelada
+
+        elif msg["status"] == "found_part":
+            self.grid.set_header(f"📦 {msg['nome']}")
+
+        elif msg["status"] == "listing":
+            self.grid.set_tiles(msg["imagens"], msg.get("sizes"))
+            self.progress_bar.config(mode="determinate", maximum=msg["total"])
+
+        elif msg["status"] == "sizes":
+            self.grid.set_sizes(msg["sizes"])
+
+        elif msg["status"] == "thumb":
+            data = msg["data"]
+            self.grid.update_tile(msg["index"], data[1] if data else None, failed=data is None)
+            self.progress_bar['value'] = msg.get("current", 0)
+
+        elif msg["status"] in ["start", "start_parallel"]:
+            self.progress_bar.config(mode="determinate", maximum=msg["total"])
+
+        elif msg["status"] == "progress":
+            # Preenche o lugar reservado na listagem: ordem de chegada não importa
+            self.grid.update_tile(msg["index"], msg["data"][1])
+            self.progress_bar['value'] = msg.get("current", 0) + 1
+
+        elif msg["status"] == "failed":
+            self.grid.update_tile(msg["index"], None, failed=True)
+
+        elif msg["status"] == "done":
+            stats = msg.get("stats")
+            if msg.get("lazy"):
+                self.finalizar_carregamento(f"✅ {msg['total']} imagens (sob demanda)")
+            elif stats:
+                self.last_stats = stats
+                status_msg = f"✅ {stats['loaded']} imagens"
+                if stats.get('speedup'):
+                    status_msg += (f" | Speedup: {stats['speedup']:.1f}x"
+                                   f" ({stats['parallel_efficiency']:.0%})")
+                if stats.get('throughput_imgs_per_sec'):
+                    status_msg += f" | {stats['throughput_imgs_per_sec']:.1f} imgs/s"
+                if stats.get('quarantined_skipped'):
+                    status_msg += f" | ⚠️ {stats['quarantined_skipped']} em quarentena"
+                self.finalizar_carregamento(status_msg)
+            else:
+                carregadas = sum(1 for tile in self.grid.tiles if tile["photo"] is not None)
+                self.finalizar_carregamento(f"✅ {carregadas} imagens")
+
+        elif msg["status"] == "cancelled":
+            self.finalizar_carregamento("❌ Cancelado")
+
+        elif msg["status"] == "not_found":
+            self.grid.set_header("❌ Não encontrado", color="red")
+            self.finalizar_carregamento("❌ Não encontrado")
+
+        elif msg["status"] == "no_images":
+            self.grid.set_header("⚠️ Sem imagens", color="orange")
+            self.finalizar_carregamento("⚠️ Sem imagens")
+
+        elif msg["status"] == "error":
+            messagebox.showerror("Erro", msg["msg"])
+            self.finalizar_carregamento("❌ Erro")
+
+    def _on_canvas_scroll(self, first, last):
+        self.scrollbar.set(first, last)
+        self.grid.schedule_render()
+
+    def _atualizar_viewport(self, first: int, last: int):
+        """Decodificação sob demanda segue as linhas visíveis do grid."""
+        margin_rows = self.config_manager.get("performance", "lazy_prefetch_rows", 2)
+        self.service.lazy_loader.update_viewport(first, last,
+                                                 margin=margin_rows * self.grid.layout.columns)
+
+    def _on_tile_enter(self, caminho: str):
+        self._cancelar_hover()
+        delay = self.config_manager.get("performance", "viewer_hover_prefetch_ms", 350)
+        self._hover_job = self.root.after(delay, lambda: self._prefetch_visualizador(caminho))
+
+    def _cancelar_hover(self):
+        if self._hover_job is not None:
+            self.root.after_cancel(self._hover_job)
+            self._hover_job = None
+
+    def _prefetch_visualizador(self, caminho: str):
+        self._hover_job = None
+        self.full_loader.prefetch(Path(caminho))
+
+    def _preview_rapido(self, path: Path, max_size) -> Optional[Image.Image]:
+        """Thumbnail já em cache (o maior disponível) ampliado, sem tocar no original."""
+        thumb = self.service.parallel_loader.cached_thumbnail(path, min(max_size))
+        if thumb is None:
+            return None
+        scale = min(max_size[0] / thumb.width, max_size[1] / thumb.height)
+        if scale <= 1:
+            return thumb
+        size = (max(1, int(thumb.width * scale)), max(1, int(thumb.height * scale)))
+        return thumb.resize(size, Image.Resampling.BILINEAR)
 
     def abrir_visualizador(self, caminho_imagem: str):
         try:
@@ -281,23 +927,47 @@ class VisualizadorPecas:
                 messagebox.showerror("Erro", "Arquivo não existe")
                 return
             janela = tk.Toplevel(self.root)
-            janela.title(f"Visualização: {path.name}")
+            titulo = f"Visualização: {path.name}"
+            meta = self.service.catalog.cached_metadata(path)  # Sem abrir o arquivo
+            if meta:
+                titulo += f" — {meta['width']}×{meta['height']} {meta['format'] or ''}".rstrip()
+                if meta["taken_at"]:
+                    titulo += f" | {meta['taken_at'].replace('T', ' ')}"
+            janela.title(titulo)
             janela.geometry("1200x900")
             janela.configure(bg="black")
-            img = Image.open(path)
-            img.thumbnail((1920, 1080), Image.Resampling.LANCZOS)
-            photo = ImageTk.PhotoImage(img)
+            ttk.Button(janela, text="✖ Fechar (ESC)",
+                      command=janela.destroy).pack(side="bottom", pady=10)
+            ttk.Label(janela, text="🔍 Roda do mouse: zoom | Arrastar: mover",
+                      background="black", foreground="gray").pack(side="bottom")
             container = tk.Frame(janela, bg="black")
             container.pack(expand=True, fill="both", padx=10, pady=10)
-            lbl = tk.Label(container, image=photo, bg="black")
-            lbl.image = photo
-            lbl.pack(expand=True)
-            ttk.Button(janela, text="✖ Fechar (ESC)",
-                      command=janela.destroy).pack(pady=10)
+            viewer = ZoomableViewer(self, container, path)
             janela.bind("<Escape>", lambda e: janela.destroy())
+
+            img = self.full_loader.get_cached(path)
+            if img is None:
+                img = self._preview_rapido(path, (1180, 820))
+                future = self.full_loader.request(path)
+                self.root.after(30, lambda: self._aguardar_imagem_completa(viewer, future))
+            if img is not None:
+                viewer.set_image(img)
         except Exception as e:
             messagebox.showerror("Erro", f"Erro: {e}")
 
+    def _aguardar_imagem_completa(self, viewer: ZoomableViewer, future):
+        """Troca a prévia pela imagem completa quando o worker terminar."""
+        if not viewer.alive():
+            return
+        if not future.done():
+            self.root.after(30, lambda: self._aguardar_imagem_completa(viewer, future))
+            return
+        try:
+            viewer.set_image(future.result())
+        except Exception as e:
+            self.logger.warning("Viewer decode failed", error_type=type(e).__name__)
+            viewer.show_message(f"❌ Erro: {e}")
+
     def abrir_configuracoes(self):
         config_win = tk.Toplevel(self.root)
         config_win.title("⚙️ Configurações")
@@ -315,7 +985,8 @@ class VisualizadorPecas:
         ttk.Checkbutton(perf_frame, text="Habilitar carregamento paralelo (recomendado)",
                        variable=parallel_var).grid(row=0, column=0, columnspan=2, sticky="w", pady=10)
 
-        ttk.Label(perf_frame, text="Workers (threads):").grid(row=1, column=0, sticky="w", pady=5)
+        # Com a pipeline ativa, cache misses usam a pool de leitura; esta é a pool geral
+        ttk.Label(perf_frame, text="Workers gerais (threads):").grid(row=1, column=0, sticky="w", pady=5)
         workers_var = tk.StringVar(value=str(self.config_manager.get_max_workers() or "Auto"))
         workers_combo = ttk.Combobox(perf_frame, textvariable=workers_var, width=10)
         workers_combo['values'] = ["Auto", "2", "4", "6", "8", "12", "16"]
@@ -327,13 +998,33 @@ class VisualizadorPecas:
                                 textvariable=thumb_var, width=10)
         thumb_spin.grid(row=2, column=1, sticky="w", padx=10)
 
+        atlas_var = tk.BooleanVar(value=self.config_manager.get("performance", "use_atlas", False))
+        ttk.Checkbutton(perf_frame, text="Atlas de miniaturas por peça (rede lenta)",
+                       variable=atlas_var).grid(row=3, column=0, columnspan=2, sticky="w", pady=5)
+
+        ttk.Label(perf_frame, text="Threads de leitura (pipeline):").grid(row=5, column=0,
+                                                                       sticky="w", pady=5)
+        read_var = tk.IntVar(value=self.config_manager.get("performance", "read_workers", 16))
+        ttk.Spinbox(perf_frame, from_=1, to=64, increment=2, textvariable=read_var,
+                    width=10).grid(row=5, column=1, sticky="w", padx=10)
+
         if self.last_stats:
             stats_frame = ttk.LabelFrame(perf_frame, text="📊 Última Busca", padding=10)
-            stats_frame.grid(row=3, column=0, columnspan=2, sticky="ew", pady=20)
+            stats_frame.grid(row=4, column=0, columnspan=2, sticky="ew", pady=20)
             ttk.Label(stats_frame, text=f"Imagens: {self.last_stats['loaded']}").pack(anchor="w")
             ttk.Label(stats_frame, text=f"Tempo: {self.last_stats['duration_ms']:.0f}ms").pack(anchor="w")
-            ttk.Label(stats_frame, text=f"Speedup: {self.last_stats.get('speedup', 1):.2f}x").pack(anchor="w")
+            speedup = self.last_stats.get('speedup')
+            if speedup is not None:
+                ttk.Label(stats_frame, text=f"Speedup: {speedup:.2f}x "
+                          f"(eficiência {self.last_stats['parallel_efficiency']:.0%})").pack(anchor="w")
+            else:
+                ttk.Label(stats_frame, text="Speedup: — (sem decodificação a comparar)").pack(anchor="w")
             ttk.Label(stats_frame, text=f"Throughput: {self.last_stats.get('throughput_imgs_per_sec', 0):.1f} imgs/s").pack(anchor="w")
+            etapas = [f"{etapa} {self.last_stats[f'{etapa}_ms_avg']:.1f}ms"
+                      for etapa in ("decode", "resize", "convert")
+                      if self.last_stats.get(f"{etapa}_ms_avg") is not None]
+            if etapas:
+                ttk.Label(stats_frame, text="Por imagem: " + " | ".join(etapas)).pack(anchor="w")
 
         cache_frame = ttk.Frame(notebook, padding=10)
         notebook.add(cache_frame, text="💾 Cache")
@@ -347,6 +1038,16 @@ class VisualizadorPecas:
         ttk.Button(cache_frame, text="🗑️ Limpar Cache",
                   command=lambda: self.dir_cache.invalidate()).grid(row=1, column=0, pady=10)
 
+        ttk.Button(cache_frame, text="🗑️ Limpar tiles do zoom",
+                  command=lambda: self.executor.submit(self.tile_cache.clear,
+                                                       priority=TaskPriority.BACKGROUND)
+                  ).grid(row=3, column=0, columnspan=2, sticky="w", pady=5)
+
+        em_quarentena = self.service.quarantine.stats()["files"]
+        ttk.Button(cache_frame, text=f"♻️ Retentar imagens com falha ({em_quarentena})",
+                  command=self.service.quarantine.clear).grid(row=2, column=0, columnspan=2,
+                                                              sticky="w", pady=5)
+
         ui_frame = ttk.Frame(notebook, padding=10)
         notebook.add(ui_frame, text="🎨 Interface")
 
@@ -355,32 +1056,38 @@ class VisualizadorPecas:
         cols_spin = ttk.Spinbox(ui_frame, from_=1, to=6, textvariable=cols_var, width=10)
         cols_spin.grid(row=0, column=1, sticky="w", padx=10)
 
-        ttk.Label(ui_frame, text="Tema:").grid(row=1, column=0, sticky="w", pady=5)
+        auto_cols_var = tk.BooleanVar(value=self.config_manager.get("ui", "auto_columns", True))
+        ttk.Checkbutton(ui_frame, text="Colunas automáticas (pela largura da janela)",
+                       variable=auto_cols_var).grid(row=1, column=0, columnspan=2, sticky="w", pady=5)
+
+        ttk.Label(ui_frame, text="Tema:").grid(row=2, column=0, sticky="w", pady=5)
         theme_var = tk.StringVar(value=self.config_manager.get("ui", "theme", "clam"))
         theme_combo = ttk.Combobox(ui_frame, textvariable=theme_var, width=10)
         theme_combo['values'] = self.style.theme_names()
-        theme_combo.grid(row=1, column=1, sticky="w", padx=10)
+        theme_combo.grid(row=2, column=1, sticky="w", padx=10)
 
         btn_frame = ttk.Frame(config_win)
         btn_frame.pack(fill="x", padx=10, pady=10)
 
         def salvar():
-            self.config_manager.set("performance", "enable_parallel_loading", parallel_var.get())
             workers_val = workers_var.get()
-            if workers_val == "Auto":
-                self.config_manager.set("performance", "max_workers", None)
-            else:
-                self.config_manager.set("performance", "max_workers", int(workers_val))
-            self.config_manager.set("performance", "thumbnail_size", thumb_var.get())
-            self.config_manager.set("general", "cache_ttl_seconds", ttl_var.get())
-            self.max_cols = cols_var.get()
-            self.config_manager.set("ui", "max_columns", cols_var.get())
-            self.config_manager.set("ui", "theme", theme_var.get())
-            try:
-                self.style.theme_use(theme_var.get())
-            except:
-                pass
-            self.config_manager.save()
+            # Uma única gravação (em background) para todo o diálogo
+            self.config_manager.update({
+                "performance": {
+                    "enable_parallel_loading": parallel_var.get(),
+                    "max_workers": None if workers_val == "Auto" else int(workers_val),
+                    "thumbnail_size": thumb_var.get(),
+                    "use_atlas": atlas_var.get(),
+                    "read_workers": read_var.get()
+                },
+                "general": {"cache_ttl_seconds": ttl_var.get()},
+                "ui": {
+                    "max_columns": cols_var.get(),
+                    "auto_columns": auto_cols_var.get(),
+                    "theme": theme_var.get()
+                }
+            })
+            # Workers, TTL, grade e tema são aplicados pelos assinantes da config
             messagebox.showinfo("Sucesso", "Configurações salvas!")
             config_win.destroy()
 
@@ -394,6 +1101,29 @@ class VisualizadorPecas:
         self.status_var.set(msg)
         self.root.config(cursor="")
         self.btn_cancelar.config(state="disabled")
+        self.logger.record_ui_frames(self.drainer.stats())
+        self._agendar_prefetch()
+
+    def _agendar_prefetch(self):
+        """Agenda o aquecimento de cache após um período ocioso."""
+        self._parar_prefetch()
+        if not self.config_manager.get("performance", "idle_prefetch", True):
+            return
+        delay = self.config_manager.get("performance", "prefetch_idle_ms", 1500)
+        self._prefetch_job = self.root.after(delay, self._iniciar_prefetch)
+
+    def _iniciar_prefetch(self):
+        self._prefetch_job = None
+        if self.thread_manager.is_running():
+            return
+        raiz = self.service.last_root or self.diretorio_raiz.get()
+        self.service.prefetcher.start(raiz, self.service.last_part)
+
+    def _parar_prefetch(self):
+        if self._prefetch_job is not None:
+            self.root.after_cancel(self._prefetch_job)
+            self._prefetch_job = None
+        self.service.prefetcher.stop()
 
     def on_closing(self):
         self.logger.info("Application closing", event_type="app_stop")
@@ -402,11 +1132,21 @@ class VisualizadorPecas:
             self.config_manager.update_window_geometry(geometry)
         except:
             pass
-        if self.thread_manager.is_running():
-            self.thread_manager.cancel_thread(timeout=3.0)
+        self._parar_prefetch()
+        self.fila.on_ready = None
+        if self._hud_job is not None:
+            self.root.after_cancel(self._hud_job)
+        if self._fila_job is not None:
+            self.root.after_cancel(self._fila_job)
+        self.thread_manager.cancel()
         self.thread_manager.cleanup()
+        self.config_manager.unsubscribe(self._on_config_change)
+        self.service.shutdown()
+        self.config_manager.flush()
+        self.executor.shutdown(wait=False)
         self.limpar_visualizacao()
         self.logger.log_metrics_summary()
+        self.logger.close()
         gc.collect()
         self.root.destroy()
 
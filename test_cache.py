@@ -0,0 +1,519 @@
+"""
+Testes para os caches de imagens (thumbnails).
+"""
+
+import errno
+import os
+import queue
+import shutil
+import threading
+import pytest
+from pathlib import Path
+from PIL import Image
+
+from visualizador_pecas_v8_1_COMPLETO import (
+    ThumbnailCache, TilePyramid, TileDiskCache, ThumbnailAtlas, CatalogIndex, ParallelImageLoader,
+    ImageQuarantine, QuarantinedImageError, StructuredLogger
+)
+from inventory_viewer.core import read_image_metadata
+
+
+class TestThumbnailCache:
+    """Testes do cache LRU de thumbnails."""
+
+    @pytest.mark.unit
+    def test_hit_and_miss(self, sample_image):
+        """Testa hit/miss com chave baseada no arquivo."""
+        cache = ThumbnailCache()
+        key = ThumbnailCache.make_key(sample_image, 64)
+        assert cache.get(key) is None
+        cache.put(key, Image.new('RGB', (64, 64)))
+        assert cache.get(key) is not None
+        stats = cache.stats()
+        assert stats["hits"] == 1 and stats["misses"] == 1
+
+    @pytest.mark.unit
+    def test_key_changes_with_file(self, sample_image):
+        """Alterar o arquivo muda a chave (invalidação implícita)."""
+        key1 = ThumbnailCache.make_key(sample_image, 64)
+        Image.new('RGB', (120, 80)).save(sample_image, 'JPEG')
+        key2 = ThumbnailCache.make_key(sample_image, 64)
+        assert key1 != key2
+
+    @pytest.mark.unit
+    def test_missing_file_key(self, temp_dir):
+        """Arquivo inexistente não gera chave nem entrada."""
+        key = ThumbnailCache.make_key(temp_dir / "nao_existe.jpg", 64)
+        assert key is None
+        cache = ThumbnailCache()
+        cache.put(key, Image.new('RGB', (8, 8)))
+        assert cache.stats()["entries"] == 0
+
+    @pytest.mark.unit
+    def test_lru_eviction_by_bytes(self):
+        """Despejo respeita o limite em bytes e a ordem LRU."""
+        one = 10 * 10 * 3
+        cache = ThumbnailCache(max_bytes=one * 2)
+        cache.put(("a",), Image.new('RGB', (10, 10)))
+        cache.put(("b",), Image.new('RGB', (10, 10)))
+        cache.get(("a",))
+        cache.put(("c",), Image.new('RGB', (10, 10)))
+
+        assert cache.contains(("a",))
+        assert not cache.contains(("b",))
+        assert cache.contains(("c",))
+        assert cache.current_bytes <= one * 2
+
+    @pytest.mark.unit
+    def test_resize_evicts(self):
+        """Reduzir o limite despeja imediatamente."""
+        cache = ThumbnailCache()
+        for i in range(5):
+            cache.put((i,), Image.new('RGB', (10, 10)))
+        cache.resize(300)
+        assert cache.stats()["entries"] == 1
+
+
+class TestTilePyramid:
+    """Testes da pirâmide de tiles do visualizador."""
+
+    @pytest.fixture
+    def big_image(self, temp_dir):
+        path = temp_dir / "serial.png"
+        img = Image.new('RGB', (1000, 600), color=(0, 0, 0))
+        img.paste((255, 0, 0), (512, 256, 768, 512))
+        img.save(path)
+        return path
+
+    @pytest.mark.unit
+    def test_levels_and_grid(self, big_image, temp_dir):
+        """Níveis em potências de dois até caber em um tile."""
+        pyramid = TilePyramid(big_image, temp_dir / "cache", tile_size=256)
+        assert pyramid.levels == 3
+        assert pyramid.level_size(0) == (1000, 600)
+        assert pyramid.level_size(2) == (250, 150)
+        assert pyramid.tile_grid(0) == (4, 3)
+        assert pyramid.fit_level(600, 400) == 1
+
+    @pytest.mark.unit
+    def test_tile_matches_source_region(self, big_image, temp_dir):
+        """Tile do nível 0 corresponde exatamente à região da fonte."""
+        pyramid = TilePyramid(big_image, temp_dir / "cache", tile_size=256)
+        tile = pyramid.get_tile(0, 2, 1)
+        assert tile.size == (256, 256)
+        assert tile.getpixel((10, 10)) == (255, 0, 0)
+
+        edge = pyramid.get_tile(0, 3, 2)
+        assert edge.size == (1000 - 768, 600 - 512)
+
+    @pytest.mark.unit
+    def test_tiles_persisted_once(self, big_image, temp_dir):
+        """Tiles ficam em disco: nova instância não decodifica de novo."""
+        cache_dir = temp_dir / "cache"
+        TilePyramid(big_image, cache_dir, tile_size=256).get_tile(1, 1, 1)
+
+        pyramid = TilePyramid(big_image, cache_dir, tile_size=256)
+        pyramid._decode_level = None  # Falharia se tentasse gerar o nível
+        assert pyramid.get_tile(1, 1, 1).size == (500 - 256, 300 - 256)
+
+    @pytest.mark.unit
+    def test_only_requested_tiles_written(self, big_image, temp_dir):
+        """Só os tiles pedidos (viewport) vão para o disco; o nível é decodificado uma vez por lote."""
+        pyramid = TilePyramid(big_image, temp_dir / "cache", tile_size=256)
+        decodes = []
+        original = pyramid._decode_level
+        pyramid._decode_level = lambda level: decodes.append(level) or original(level)
+
+        tiles = pyramid.get_tiles(0, pyramid.visible_tiles(0, 0, 0, 300, 200))
+        assert sorted(tiles) == [(0, 0), (1, 0)]
+        assert decodes == [0]
+        assert len(list(pyramid.cache_dir.rglob("*.png"))) == 2
+
+        # Já em disco: não decodifica de novo
+        pyramid.trim(set())
+        pyramid.get_tile(0, 1, 0)
+        assert decodes == [0]
+
+    @pytest.mark.unit
+    def test_ring_goes_to_disk_only(self, big_image, temp_dir):
+        """O anel em volta da viewport é gravado em disco, sem ficar em memória."""
+        pyramid = TilePyramid(big_image, temp_dir / "cache", tile_size=256)
+        decodes = []
+        original = pyramid._decode_level
+        pyramid._decode_level = lambda level: decodes.append(level) or original(level)
+
+        tiles = pyramid.get_tiles(0, [(0, 0)], extra=[(1, 0), (0, 1)])
+        assert list(tiles) == [(0, 0)]
+        assert pyramid.get_cached_tile(0, 1, 0) is None
+        assert pyramid._tile_path(0, 1, 0).exists() and pyramid._tile_path(0, 0, 1).exists()
+
+        pyramid.get_tiles(0, [(1, 0), (0, 1)])
+        assert decodes == [0]
+        # Nenhuma imagem inteira de nível fica referenciada pela pirâmide
+        assert all(max(img.size) <= 256 for img in pyramid._tiles.values())
+
+    @pytest.mark.unit
+    def test_disk_budget_evicts_oldest(self, big_image, temp_dir):
+        """Orçamento em disco apaga os tiles menos usados; clear() limpa tudo."""
+        cache_dir = temp_dir / "cache"
+        disk = TileDiskCache(cache_dir, max_bytes=10 ** 9)
+        pyramid = TilePyramid(big_image, cache_dir, tile_size=256, disk_cache=disk)
+        for tx, ty in pyramid.visible_tiles(0, 0, 0, 1000, 600):
+            pyramid.get_tile(0, tx, ty)
+        oldest = pyramid._tile_path(0, 0, 0)
+        os.utime(oldest, (1, 1))
+        total = disk.stats()["bytes"]
+        assert total == sum(p.stat().st_size for p in cache_dir.rglob("*.png"))
+
+        disk.resize(total - 1)
+        assert not oldest.exists()
+        assert disk.stats()["bytes"] <= (total - 1) * TileDiskCache.LOW_WATER
+        assert disk.stats()["evicted"] >= 1
+
+        assert disk.clear() > 0
+        assert not list(cache_dir.rglob("*.png"))
+        assert disk.stats()["bytes"] == 0
+
+    @pytest.mark.unit
+    def test_only_visible_tiles_in_memory(self, big_image, temp_dir):
+        """trim() mantém em memória apenas os tiles da viewport."""
+        pyramid = TilePyramid(big_image, temp_dir / "cache", tile_size=256)
+        visible = pyramid.visible_tiles(0, 0, 0, 300, 200)
+        assert visible == [(0, 0), (1, 0)]
+
+        for tx, ty in pyramid.visible_tiles(0, 0, 0, 1000, 600):
+            pyramid.get_tile(0, tx, ty)
+        pyramid.trim({(0, tx, ty) for tx, ty in visible})
+        assert pyramid.get_cached_tile(0, 0, 0) is not None
+        assert pyramid.get_cached_tile(0, 3, 2) is None
+
+
+class TestThumbnailAtlas:
+    """Testes do atlas de miniaturas por peça."""
+
+    @pytest.fixture
+    def part_folder(self, temp_dir):
+        folder = temp_dir / "PECA001"
+        folder.mkdir()
+        for i in range(5):
+            Image.new('RGB', (200, 100), color=(i * 40, 0, 0)).save(folder / f"img{i}.jpg")
+        return folder
+
+    def _thumbs(self, folder, size=64):
+        thumbs = {}
+        for path in sorted(folder.iterdir()):
+            with Image.open(path) as img:
+                img.thumbnail((size, size))
+                thumbs[path] = img.copy()
+        return thumbs
+
+    @pytest.mark.unit
+    def test_roundtrip(self, part_folder, temp_dir):
+        """Miniaturas recortadas do atlas têm tamanho e conteúdo corretos."""
+        atlas = ThumbnailAtlas(temp_dir / "cache")
+        thumbs = self._thumbs(part_folder)
+        assert atlas.build(part_folder, thumbs, 64)
+
+        loaded = atlas.load(part_folder, list(thumbs), 64)
+        assert set(loaded) == set(thumbs)
+        for path, img in loaded.items():
+            assert img.size == thumbs[path].size
+            r, g, b = img.getpixel((img.width // 2, img.height // 2))
+            assert abs(r - thumbs[path].getpixel((img.width // 2, img.height // 2))[0]) < 12
+
+    @pytest.mark.unit
+    def test_invalidated_by_mtime(self, part_folder, temp_dir):
+        """Alterar qualquer fonte invalida o atlas."""
+        atlas = ThumbnailAtlas(temp_dir / "cache")
+        thumbs = self._thumbs(part_folder)
+        atlas.build(part_folder, thumbs, 64)
+
+        changed = part_folder / "img2.jpg"
+        Image.new('RGB', (210, 100)).save(changed)
+        st = changed.stat()
+        import os
+        os.utime(changed, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+
+        assert atlas.load(part_folder, list(thumbs), 64) is None
+
+    @pytest.mark.unit
+    def test_invalidated_by_listing_or_size(self, part_folder, temp_dir):
+        """Novo arquivo ou outro thumbnail_size também invalidam."""
+        atlas = ThumbnailAtlas(temp_dir / "cache")
+        thumbs = self._thumbs(part_folder)
+        atlas.build(part_folder, thumbs, 64)
+
+        assert atlas.load(part_folder, list(thumbs), 128) is None
+        extra = part_folder / "img9.jpg"
+        Image.new('RGB', (10, 10)).save(extra)
+        assert atlas.load(part_folder, list(thumbs) + [extra], 64) is None
+
+    @pytest.mark.unit
+    def test_failed_sources_do_not_invalidate(self, part_folder, corrupted_image, temp_dir):
+        """Fonte ilegível fica registrada sem região."""
+        atlas = ThumbnailAtlas(temp_dir / "cache")
+        thumbs = self._thumbs(part_folder)
+        thumbs[corrupted_image] = None
+        atlas.build(part_folder, thumbs, 64)
+
+        loaded = atlas.load(part_folder, list(thumbs), 64)
+        assert loaded is not None
+        assert corrupted_image not in loaded
+
+
+class TestCatalogIndex:
+    """Testes da impressão digital de conteúdo (deduplicação)."""
+
+    @pytest.fixture
+    def copies(self, temp_dir, sample_image):
+        """Mesma foto copiada em duas peças + uma foto diferente."""
+        paths = []
+        for peca in ("PECA001", "PECA002"):
+            pasta = temp_dir / peca
+            pasta.mkdir()
+            paths.append(Path(shutil.copy2(sample_image, pasta / "foto.jpg")))
+        other = temp_dir / "PECA002" / "outra.jpg"
+        Image.new("RGB", (100, 100), color=(0, 0, 255)).save(other)
+        return paths + [other]
+
+    @pytest.mark.unit
+    def test_identical_files_share_id(self, copies, temp_dir):
+        """Cópias idênticas têm o mesmo identificador de conteúdo."""
+        index = CatalogIndex(temp_dir / "index.json")
+        a, b, other = (index.content_id(p) for p in copies)
+        assert a == b
+        assert a != other
+        assert index.stats()["duplicate_files"] == 1
+
+    @pytest.mark.unit
+    def test_sample_collision_uses_full_hash(self, temp_dir):
+        """Amostras iguais com conteúdo diferente são separadas pelo hash completo."""
+        data = bytearray(os.urandom(300 * 1024))
+        first, twin, changed = temp_dir / "a.bin", temp_dir / "b.bin", temp_dir / "c.bin"
+        first.write_bytes(data)
+        twin.write_bytes(data)
+        data[80 * 1024] ^= 0xFF  # Fora dos blocos amostrados
+        changed.write_bytes(data)
+
+        index = CatalogIndex(temp_dir / "index.json")
+        ids = [index.content_id(p) for p in (first, twin, changed)]
+        assert ids[0] == ids[1] != ids[2]
+
+    @pytest.mark.unit
+    def test_persisted_without_rereading(self, copies, temp_dir):
+        """Índice salvo responde sem ler os arquivos novamente."""
+        index = CatalogIndex(temp_dir / "index.json")
+        expected = [index.content_id(p) for p in copies]
+        assert index.save()
+
+        reloaded = CatalogIndex(temp_dir / "index.json")
+        assert [reloaded.cached_content_id(p) for p in copies] == expected
+
+    @pytest.mark.unit
+    def test_modified_file_is_refingerprinted(self, copies, temp_dir):
+        """Arquivo alterado deixa de compartilhar o conteúdo antigo."""
+        index = CatalogIndex(temp_dir / "index.json")
+        index.content_id(copies[0])
+        index.content_id(copies[1])
+        Image.new("RGB", (50, 50), color=(0, 255, 0)).save(copies[1])
+        os.utime(copies[1], ns=(1, 1))
+        assert index.cached_content_id(copies[1]) is None
+        assert index.content_id(copies[1]) != index.content_id(copies[0])
+
+    @pytest.mark.unit
+    def test_loader_decodes_duplicates_once(self, copies, temp_dir):
+        """Cópias idênticas compartilham um único thumbnail em cache."""
+        loader = ParallelImageLoader(thumbnail_size=64)
+        loader.catalog = CatalogIndex(temp_dir / "index.json")
+        try:
+            first = loader.get_thumbnail(copies[0])
+            second = loader.get_thumbnail(copies[1], copies[1].read_bytes())
+        finally:
+            loader.executor.shutdown()
+        assert second is first
+        # Um único conjunto de tamanhos para as duas cópias
+        assert loader.thumbnail_cache.stats()["entries"] == len(loader.ladder_sizes())
+
+
+class TestHeaderMetadata:
+    """Metadados do cabeçalho guardados no índice do acervo."""
+
+    @pytest.fixture
+    def photo(self, temp_dir):
+        """JPEG 300x200 com orientação e data EXIF."""
+        path = temp_dir / "foto.jpg"
+        exif = Image.Exif()
+        exif[0x0112] = 6
+        exif.get_ifd(0x8769)[0x9003] = "2024:05:01 10:30:00"
+        Image.new("RGB", (300, 200), color="red").save(path, "JPEG", exif=exif)
+        return path
+
+    @pytest.mark.unit
+    def test_reads_header_without_decoding(self, photo, monkeypatch):
+        """Dimensões, formato, orientação e data sem carregar pixels."""
+        def no_load(self):
+            raise AssertionError("decodificou pixels")
+        monkeypatch.setattr(Image.Image, "load", no_load)
+        monkeypatch.setattr("PIL.ImageFile.ImageFile.load", no_load)
+
+        meta = read_image_metadata(photo)
+        assert meta == {"width": 300, "height": 200, "format": "JPEG",
+                        "orientation": 6, "taken_at": "2024-05-01T10:30:00"}
+
+    @pytest.mark.unit
+    def test_png_without_exif(self, temp_dir):
+        """PNG sem EXIF no cabeçalho: orientação normal, sem data."""
+        path = temp_dir / "a.png"
+        Image.new("RGB", (40, 30)).save(path)
+        meta = read_image_metadata(path)
+        assert (meta["width"], meta["height"], meta["format"]) == (40, 30, "PNG")
+        assert meta["orientation"] == 1 and meta["taken_at"] is None
+
+    @pytest.mark.unit
+    def test_stored_in_index(self, photo, temp_dir, monkeypatch):
+        """Lido uma vez por versão do arquivo; persistido com o índice."""
+        index = CatalogIndex(temp_dir / "index.json")
+        assert index.cached_metadata(photo) is None
+        assert index.metadata(photo)["width"] == 300
+        assert index.save()
+
+        reopened = CatalogIndex(temp_dir / "index.json")
+        monkeypatch.setattr("inventory_viewer.core.read_image_metadata",
+                            lambda path: pytest.fail("releu o cabeçalho"))
+        assert reopened.cached_metadata(photo)["taken_at"] == "2024-05-01T10:30:00"
+        assert reopened.metadata(photo)["orientation"] == 6
+        # Impressão de conteúdo continua disponível sobre a mesma entrada
+        assert reopened.content_id(photo) is not None
+        assert reopened.metadata(photo)["format"] == "JPEG"
+        assert reopened.stats()["metadata"] == 1
+
+    @pytest.mark.unit
+    def test_changed_file_reread(self, photo, temp_dir):
+        """Arquivo alterado tem os metadados lidos de novo."""
+        index = CatalogIndex(temp_dir / "index.json")
+        index.metadata(photo)
+        Image.new("RGB", (50, 60)).save(photo, "JPEG")
+        assert index.cached_metadata(photo) is None
+        assert (index.metadata(photo)["width"], index.metadata(photo)["orientation"]) == (50, 1)
+
+
+class TestImageQuarantine:
+    """Testes do cache negativo de imagens corrompidas."""
+
+    @pytest.fixture
+    def loader(self, temp_dir):
+        loader = ParallelImageLoader(thumbnail_size=100)
+        loader.quarantine = ImageQuarantine(temp_dir / "quarantine.json")
+        decodes = []
+        original = loader._decode_ladder
+        loader._decode_ladder = lambda source, record=True: decodes.append(source) or original(source, record)
+        loader.decodes = decodes
+        yield loader
+        loader.executor.shutdown()
+
+    @pytest.mark.unit
+    def test_failed_image_not_retried(self, loader, corrupted_image):
+        """Segunda tentativa nem abre o arquivo."""
+        with pytest.raises(OSError):
+            loader.get_thumbnail(corrupted_image)
+        assert len(loader.decodes) == 1
+
+        with pytest.raises(QuarantinedImageError):
+            loader.get_thumbnail(corrupted_image)
+        assert loader.load_single_image(corrupted_image, 0) is None
+        assert len(loader.decodes) == 1
+        assert loader.quarantine.stats() == {"files": 1, "skipped": 2, "added": 1, "released": 0}
+
+    @pytest.mark.unit
+    def test_transient_io_error_not_quarantined(self, loader, sample_image):
+        """Falha de acesso (ex.: timeout de rede) só falha esta carga."""
+        original = loader._decode_ladder
+        errors = [OSError(errno.EAGAIN, "Resource temporarily unavailable"), TimeoutError()]
+
+        def flaky(source, record=True):
+            if errors:
+                raise errors.pop(0)
+            return original(source, record)
+
+        loader._decode_ladder = flaky
+        for _ in range(2):
+            with pytest.raises(OSError):
+                loader.get_thumbnail(sample_image)
+        assert max(loader.get_thumbnail(sample_image).size) == 100
+        assert loader.quarantine.stats()["added"] == 0
+
+    @pytest.mark.unit
+    def test_changed_file_is_retried(self, loader, corrupted_image):
+        """Arquivo corrigido (tamanho/mtime novos) sai da quarentena."""
+        with pytest.raises(OSError):
+            loader.get_thumbnail(corrupted_image)
+        Image.new("RGB", (300, 200), color="green").save(corrupted_image, "JPEG")
+
+        assert max(loader.get_thumbnail(corrupted_image).size) == 100
+        stats = loader.quarantine.stats()
+        assert stats["files"] == 0 and stats["released"] == 1
+
+    @pytest.mark.unit
+    def test_persisted_between_sessions(self, loader, corrupted_image, temp_dir):
+        """Lista gravada é respeitada na próxima sessão."""
+        with pytest.raises(OSError):
+            loader.get_thumbnail(corrupted_image)
+        assert loader.quarantine.save()
+
+        reopened = ImageQuarantine(temp_dir / "quarantine.json")
+        assert reopened.contains(corrupted_image)
+
+    @pytest.mark.unit
+    def test_parallel_load_reports_counts(self, loader, corrupted_image, sample_image, temp_dir):
+        """Carga e métricas da sessão informam as imagens em quarentena."""
+        logger = StructuredLogger("TestQuarantine", log_dir=str(temp_dir / "logs"))
+        loader._shared_photo = lambda key, img: img  # Sem Tk
+        cancel = threading.Event()
+        first = loader.load_images_parallel([sample_image, corrupted_image], cancel, queue.Queue())
+        assert first["failed"] == 1 and first["quarantined_new"] == 1
+
+        second = loader.load_images_parallel([sample_image, corrupted_image], cancel, queue.Queue())
+        assert second["quarantined_skipped"] == 1 and second["quarantined_new"] == 0
+
+        logger.record_quarantine(loader.quarantine.stats())
+        summary = logger.get_metrics_summary()
+        assert summary["quarantine_files"] == 1
+        assert summary["quarantine_skipped"] >= 1
+
+
+class TestMultiSizeThumbnails:
+    """Todos os tamanhos padrão a partir de uma única decodificação."""
+
+    @pytest.fixture
+    def loader(self):
+        loader = ParallelImageLoader(thumbnail_size=250)
+        yield loader
+        loader.executor.shutdown()
+
+    @pytest.mark.unit
+    def test_one_decode_fills_all_sizes(self, loader, large_image):
+        """Uma decodificação popula 64/128/256/512 e o tamanho atual."""
+        img = loader.get_thumbnail(large_image)
+        assert max(img.size) == 250
+        assert loader.profiler.snapshot()["decode"][0] == 1
+        for size in (64, 128, 250, 256, 512):
+            cached = loader.thumbnail_cache.get(ThumbnailCache.make_key(large_image, size))
+            assert cached is not None and max(cached.size) == size
+
+    @pytest.mark.unit
+    def test_switching_size_needs_no_decode(self, loader, large_image):
+        """Mudar o tamanho nas configurações não relê o original."""
+        loader.get_thumbnail(large_image)
+        loader.thumbnail_size = 128
+        assert max(loader.get_thumbnail(large_image).size) == 128
+        loader.thumbnail_size = 300  # Fora da escada: derivado do 512
+        assert max(loader.get_thumbnail(large_image).size) == 300
+        assert loader.profiler.snapshot()["decode"][0] == 1
+
+    @pytest.mark.unit
+    def test_other_consumers_read_cached_sizes(self, loader, large_image):
+        """Prévia do visualizador usa o maior tamanho em cache, sem I/O."""
+        assert loader.cached_thumbnail(large_image, 1000) is None
+        loader.get_thumbnail(large_image)
+        assert max(loader.cached_thumbnail(large_image, 1000).size) == 512
+        assert max(loader.cached_thumbnail(large_image, 100).size) == 128
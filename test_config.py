@@ -254,4 +254,135 @@ class TestConfigPersistence:
             except:
                 pass
         except ImportError:
-            pytest.skip("ConfigManager not available")
\ No newline at end of file
+            pytest.skip("ConfigManager not available")
+
+class TestSearchHistory:
+    """Testes de histórico e termos mais prováveis."""
+
+    @pytest.mark.unit
+    def test_top_terms_frequency_and_recency(self, config_manager):
+        """Frequência domina; recência desempata."""
+        for term in ["A", "B", "A", "C", "A", "B"]:
+            config_manager.add_to_history(term)
+
+        assert config_manager.get_top_terms(2) == ["A", "B"]
+        assert config_manager.get_top_terms(3) == ["A", "B", "C"]
+
+    @pytest.mark.unit
+    def test_instances_do_not_share_defaults(self, config_manager):
+        """Histórico de uma instância não vaza para os defaults."""
+        config_manager.add_to_history("X")
+        from visualizador_pecas_v8_1_COMPLETO import ConfigManager
+        assert ConfigManager.DEFAULT_CONFIG["search"]["history"] == []
+
+
+class TestCoalescedWrites:
+    """Testes de gravação adiada, atômica e em lote."""
+
+    @pytest.fixture
+    def cm(self, tmp_path):
+        from visualizador_pecas_v8_1_COMPLETO import ConfigManager
+        return ConfigManager(str(tmp_path / "config.json"), save_delay=0.05)
+
+    @staticmethod
+    def wait_clean(cm, timeout=2.0):
+        import time
+        deadline = time.time() + timeout
+        while cm.is_dirty() and time.time() < deadline:
+            time.sleep(0.01)
+        return not cm.is_dirty()
+
+    @pytest.mark.unit
+    def test_sets_are_coalesced(self, cm):
+        """Várias alterações seguidas viram uma única gravação em background."""
+        writes = cm.writes
+        for size in range(100, 110):
+            cm.set("performance", "thumbnail_size", size)
+        assert cm.is_dirty()
+        assert cm.writes == writes  # Nada gravado no caminho interativo
+
+        assert self.wait_clean(cm)
+        assert cm.writes == writes + 1
+        with open(cm.config_path, encoding="utf-8") as f:
+            assert json.load(f)["performance"]["thumbnail_size"] == 109
+
+    @pytest.mark.unit
+    def test_update_batch_and_unchanged_values(self, cm):
+        """update() aplica várias seções; valores iguais não sujam a config."""
+        assert cm.update({"ui": {"theme": "alt", "max_columns": 5},
+                          "general": {"cache_ttl_seconds": 60}})
+        assert cm.get("ui", "theme") == "alt"
+        assert cm.flush()
+        assert not cm.update({"ui": {"theme": "alt"}})
+        assert not cm.is_dirty()
+
+    @pytest.mark.unit
+    def test_single_backup_per_session(self, cm, tmp_path):
+        """Backup é copiado só antes da primeira gravação da sessão."""
+        from visualizador_pecas_v8_1_COMPLETO import ConfigManager
+        cm.set("ui", "theme", "original")
+        cm.flush()
+
+        session = ConfigManager(str(tmp_path / "config.json"), save_delay=0.05)
+        session.set("ui", "theme", "primeira")
+        session.flush()
+        session.set("ui", "theme", "segunda")
+        session.flush()
+
+        with open(session.backup_path, encoding="utf-8") as f:
+            assert json.load(f)["ui"]["theme"] == "original"
+        assert not list(tmp_path.glob("*.tmp"))
+
+    @pytest.mark.unit
+    def test_history_and_geometry_deferred(self, cm):
+        """Histórico e geometria da janela também não gravam na hora."""
+        writes = cm.writes
+        cm.add_to_history("PECA001")
+        cm.update_window_geometry("900x700+10+20")
+        assert cm.writes == writes
+        assert cm.get_window_geometry() == "900x700+10+20"
+        assert self.wait_clean(cm)
+        assert cm.writes == writes + 1
+
+    @pytest.mark.unit
+    def test_auto_save_disabled_keeps_dirty(self, cm):
+        """Sem auto-save, alterações esperam save()/flush() explícito."""
+        cm.set("general", "auto_save", False)
+        cm.flush()
+        writes = cm.writes
+        cm.set("ui", "theme", "alt")
+        import time
+        time.sleep(0.15)
+        assert cm.is_dirty() and cm.writes == writes
+        assert cm.flush() and cm.writes == writes + 1
+
+
+class TestConfigSubscriptions:
+    """Testes de notificação de alterações."""
+
+    @pytest.mark.unit
+    def test_subscribers_receive_only_changes(self, config_manager):
+        """Assinante recebe só as chaves que mudaram, uma vez por update()."""
+        received = []
+        config_manager.subscribe(received.append)
+        config_manager.update({"ui": {"theme": "alt", "max_columns": config_manager.get("ui", "max_columns")}})
+        config_manager.set("ui", "theme", "alt")
+
+        assert received == [{"ui": {"theme": "alt"}}]
+
+    @pytest.mark.unit
+    def test_failing_subscriber_does_not_block_others(self, config_manager):
+        """Erro num assinante não impede os demais."""
+        received = []
+
+        def broken(changes):
+            raise RuntimeError("falha")
+
+        config_manager.subscribe(broken)
+        config_manager.subscribe(received.append)
+        config_manager.set("general", "cache_ttl_seconds", 10)
+        assert received == [{"general": {"cache_ttl_seconds": 10}}]
+
+        config_manager.unsubscribe(received.append)
+        config_manager.set("general", "cache_ttl_seconds", 20)
+        assert len(received) == 1
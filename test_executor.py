@@ -0,0 +1,289 @@
+"""
+Testes para o PriorityExecutor compartilhado.
+"""
+
+import pytest
+import threading
+import time
+
+from visualizador_pecas_v8_1_COMPLETO import (
+    PriorityExecutor, TaskPriority, WorkerAutotuner, StructuredLogger,
+    PerformanceMonitor
+)
+
+
+@pytest.fixture
+def executor():
+    ex = PriorityExecutor(max_workers=1, name="TestWorker")
+    yield ex
+    ex.shutdown(wait=True)
+
+
+class TestPriorityExecutor:
+    """Testes de prioridade, grupos e redimensionamento."""
+
+    @pytest.mark.unit
+    def test_submit_returns_result(self, executor):
+        """Testa execução simples."""
+        future = executor.submit(lambda a, b: a + b, 2, 3)
+        assert future.result(timeout=2) == 5
+
+    @pytest.mark.unit
+    def test_priority_order(self, executor):
+        """Testa que tarefas interativas passam na frente das de background."""
+        gate = threading.Event()
+        order = []
+
+        executor.submit(gate.wait)
+        executor.submit(order.append, "background", priority=TaskPriority.BACKGROUND)
+        executor.submit(order.append, "prefetch", priority=TaskPriority.PREFETCH)
+        last = executor.submit(order.append, "interactive", priority=TaskPriority.INTERACTIVE)
+        gate.set()
+
+        last.result(timeout=2)
+        executor.submit(lambda: None, priority=TaskPriority.BACKGROUND).result(timeout=2)
+        assert order == ["interactive", "prefetch", "background"]
+
+    @pytest.mark.unit
+    def test_group_cancel_drops_pending(self, executor):
+        """Testa cancelamento de um grupo como unidade."""
+        gate = threading.Event()
+        executor.submit(gate.wait)
+
+        group = executor.create_group("busca")
+        futures = [executor.submit(time.sleep, 0, group=group) for _ in range(5)]
+
+        assert group.cancel() == 5
+        gate.set()
+        assert all(f.cancelled() for f in futures)
+        assert group.pending_count() == 0
+
+        # Grupo cancelado não aceita novas tarefas
+        assert executor.submit(time.sleep, 0, group=group).cancelled()
+
+    @pytest.mark.unit
+    def test_resize_grow_and_shrink(self, executor):
+        """Testa reconfiguração do número de workers sem reiniciar."""
+        executor.resize(4)
+        assert executor.max_workers == 4
+
+        barrier = threading.Barrier(4, timeout=2)
+        futures = [executor.submit(barrier.wait) for _ in range(4)]
+        for f in futures:
+            f.result(timeout=3)
+
+        executor.resize(2)
+        assert executor.max_workers == 2
+        deadline = time.time() + 2
+        while len(executor._threads) > 2 and time.time() < deadline:
+            time.sleep(0.01)
+        assert len(executor._threads) == 2
+
+    @pytest.mark.unit
+    def test_shutdown_cancels_pending(self):
+        """Testa que shutdown descarta tarefas pendentes."""
+        ex = PriorityExecutor(max_workers=1)
+        gate = threading.Event()
+        ex.submit(gate.wait)
+        pending = ex.submit(time.sleep, 0)
+        ex.shutdown(wait=False)
+        gate.set()
+        assert pending.cancelled()
+        with pytest.raises(RuntimeError):
+            ex.submit(time.sleep, 0)
+
+
+class TestWorkerAutotuner:
+    """Testes do autoajuste de workers por throughput."""
+
+    @pytest.fixture
+    def autotuner(self, executor, config_manager):
+        return WorkerAutotuner(executor, config_manager, step=2, min_images=4)
+
+    @staticmethod
+    def sample(autotuner, seconds):
+        """Snapshot retroativo: simula uma carga de `seconds` segundos."""
+        snap = autotuner.snapshot()
+        snap["time"] -= seconds
+        return snap
+
+    @pytest.mark.unit
+    def test_climbs_while_throughput_improves(self, autotuner, executor):
+        """Throughput crescente mantém a direção de crescimento."""
+        executor.resize(4)
+        first = autotuner.observe("/raiz", self.sample(autotuner, 1.0), 10)
+        assert first["action"] == "probe" and first["workers"] == 6
+        second = autotuner.observe("/raiz", self.sample(autotuner, 0.5), 10)
+        assert second["action"] == "climb" and second["workers"] == 8
+        assert executor.max_workers == 8
+
+    @pytest.mark.unit
+    def test_backs_off_when_throughput_drops(self, autotuner, executor):
+        """Queda de throughput reduz multiplicativamente."""
+        executor.resize(8)
+        autotuner.observe("/raiz", self.sample(autotuner, 0.5), 10)
+        decision = autotuner.observe("/raiz", self.sample(autotuner, 1.0), 10)
+        assert decision["action"] == "backoff"
+        assert decision["workers"] == 7  # floor(10 * 0.75)
+
+    @pytest.mark.unit
+    def test_persists_per_root(self, autotuner, executor, config_manager):
+        """Valor escolhido é salvo por raiz e reaplicado na próxima busca."""
+        executor.resize(4)
+        autotuner.observe("/ssd", self.sample(autotuner, 1.0), 10)
+        assert config_manager.get_autotuned_workers("/ssd") == 6
+        assert config_manager.get_autotuned_workers("/rede") is None
+
+        executor.resize(2)
+        assert autotuner.apply("/ssd") == 6
+        assert executor.max_workers == 6
+
+    @pytest.mark.unit
+    def test_disabled_with_fixed_workers(self, autotuner, executor, config_manager):
+        """Com número fixo configurado, o autoajuste não interfere."""
+        config_manager.set("performance", "max_workers", 4)
+        executor.resize(4)
+        assert autotuner.apply("/raiz") is None
+        assert autotuner.observe("/raiz", self.sample(autotuner, 1.0), 10) is None
+        assert executor.max_workers == 4
+
+    @pytest.mark.unit
+    def test_unmeasured_root_uses_baseline(self, executor, config_manager):
+        """Raiz sem valor salvo parte do tamanho base (ex.: read_workers), não do default."""
+        autotuner = WorkerAutotuner(executor, config_manager, baseline=lambda: 16)
+        assert autotuner.apply("/nova") == 16
+        assert executor.max_workers == 16
+
+        config_manager.set_autotuned_workers("/nova", 10)
+        assert autotuner.apply("/nova") == 10
+
+    @pytest.mark.unit
+    def test_small_samples_ignored(self, autotuner):
+        """Cargas pequenas (ou vindas do cache) não geram decisão."""
+        assert autotuner.observe("/raiz", self.sample(autotuner, 1.0), 2) is None
+
+    @pytest.mark.unit
+    def test_decisions_in_metrics_summary(self, executor, config_manager, temp_dir):
+        """Decisões aparecem no resumo de métricas da sessão."""
+        logger = StructuredLogger("TestAutotune", log_dir=str(temp_dir / "logs"))
+        autotuner = WorkerAutotuner(executor, config_manager, logger, min_images=4)
+        executor.resize(4)
+        autotuner.observe("/raiz", self.sample(autotuner, 1.0), 10)
+
+        summary = logger.get_metrics_summary()
+        assert summary["autotune_workers"] == 6
+        assert summary["autotune_last_action"] == "probe"
+        assert summary["autotune_decisions"][0]["root"] == "/raiz"
+
+    @pytest.mark.unit
+    def test_executor_tracks_queue_wait(self, executor):
+        """Executor contabiliza tarefas concluídas e espera em fila."""
+        gate = threading.Event()
+        executor.submit(gate.wait)
+        waiting = executor.submit(lambda: None)
+        time.sleep(0.05)
+        gate.set()
+        waiting.result(timeout=2)
+        deadline = time.time() + 2
+        while executor.stats()["completed"] < 2 and time.time() < deadline:
+            time.sleep(0.01)
+        stats = executor.stats()
+        assert stats["completed"] == 2
+        assert stats["queue_wait_ms"] >= 40
+
+
+class TestPerformanceMonitor:
+    """Testes das métricas ao vivo usadas pelo HUD."""
+
+    @pytest.fixture
+    def logger(self, temp_dir):
+        return StructuredLogger("TestHUD", log_dir=str(temp_dir / "logs"))
+
+    @pytest.mark.unit
+    def test_live_snapshot_percentiles(self, logger):
+        """Percentis das buscas e das métricas numéricas recentes."""
+        for ms in range(1, 101):
+            logger.record_search("abc", float(ms), True)
+            logger.metric("directory_scan_time", float(ms), unit="ms")
+
+        snap = logger.live_snapshot()
+        assert snap["searches"] == 100
+        assert 49 <= snap["search_ms"][50] <= 51
+        assert 94 <= snap["search_ms"][95] <= 96
+        assert 98 <= snap["gauges"]["directory_scan_time"][99] <= 100
+
+    @pytest.mark.unit
+    def test_live_window_is_bounded(self, logger):
+        """Só a janela recente entra nos percentis."""
+        for _ in range(StructuredLogger.LIVE_WINDOW):
+            logger.metric("lat", 1000.0)
+        for _ in range(StructuredLogger.LIVE_WINDOW):
+            logger.metric("lat", 1.0)
+        assert logger.live_snapshot()["gauges"]["lat"][99] == 1.0
+
+    @pytest.mark.unit
+    def test_executor_reports_busy_time(self, executor):
+        """Executor expõe workers ativos e tempo ocupado acumulado."""
+        gate = threading.Event()
+        executor.submit(gate.wait)
+        deadline = time.time() + 2
+        while executor.stats()["active"] < 1 and time.time() < deadline:
+            time.sleep(0.01)
+        assert executor.stats()["active"] == 1
+
+        time.sleep(0.05)
+        gate.set()
+        executor.submit(lambda: None).result(timeout=2)
+        while executor.stats()["active"] and time.time() < deadline:
+            time.sleep(0.01)
+        stats = executor.stats()
+        assert stats["active"] == 0
+        assert stats["busy_ms"] >= 40
+
+    @pytest.mark.unit
+    def test_sample_and_format(self, logger, executor):
+        """Amostra combina componentes e formata as linhas do painel."""
+        from visualizador_pecas_v8_1_COMPLETO import ThumbnailCache, ResultQueue, DecodeProfiler
+
+        cache = ThumbnailCache(max_bytes=1024 * 1024)
+        fila = ResultQueue(maxsize=8)
+        fila.put({"status": "progress"})
+        profiler = DecodeProfiler()
+        monitor = PerformanceMonitor(logger, executor, cache, fila=fila, profiler=profiler)
+        logger.record_search("abc", 12.0, True)
+
+        first = monitor.sample()
+        assert first["worker_utilization"] is None
+        assert first["queue_depth"] == 1
+        assert first["cache_hit_rates"]["thumbnails"] is None
+
+        executor.submit(time.sleep, 0.05).result(timeout=2)
+        second = monitor.sample()
+        assert 0 < second["worker_utilization"] <= 1.0
+
+        text = "\n".join(PerformanceMonitor.format_lines(second))
+        assert "Busca" in text and "p95" in text
+        assert "Fila     1/8" in text
+        assert "thumbnails —" in text
+        assert "Workers" in text
+
+    @pytest.mark.unit
+    def test_pipeline_pools_reported_separately(self, logger, executor, sample_image):
+        """Com pipeline, leitura e decode têm utilização própria no HUD."""
+        from visualizador_pecas_v8_1_COMPLETO import ImagePipeline
+
+        pipeline = ImagePipeline(read_workers=2, decode_workers=1, buffer_bytes=1024 * 1024)
+        try:
+            monitor = PerformanceMonitor(logger, executor, pipeline=pipeline)
+            first = monitor.sample()
+            assert first["decode_utilization"] is None and first["read_workers"] == 2
+
+            pipeline.submit(sample_image, lambda data: time.sleep(0.05)).result(timeout=2)
+            second = monitor.sample()
+            assert 0 < second["decode_utilization"] <= 1.0
+            assert second["worker_utilization"] == 0  # Executor geral ocioso
+
+            text = "\n".join(PerformanceMonitor.format_lines(second))
+            assert "geral 0%" in text and "leitura" in text and "decode" in text
+        finally:
+            pipeline.shutdown(wait=True)
@@ -0,0 +1,992 @@
+"""
+Testes para o carregamento de thumbnails (sob demanda e paralelo).
+"""
+
+import mmap
+import pytest
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from PIL import Image
+from pathlib import Path
+
+from visualizador_pecas_v8_1_COMPLETO import (
+    ParallelImageLoader, LazyThumbnailLoader, PriorityExecutor, TaskPriority, ResultQueue,
+    DirectoryCache, ThumbnailCache, IdlePrefetcher, IOBudget, FullImageLoader,
+    BuscadorService, StructuredLogger, ImagePipeline, ByteBudget, ThreadManager, ThreadState,
+    DecodeProfiler, QueueDrainer, GridLayout
+)
+from inventory_viewer.core import image_source, natural_sort_key, image_dimensions
+
+
+class RecordingLoader(ParallelImageLoader):
+    """Loader que registra os índices decodificados (sem depender de Tk)."""
+
+    def __init__(self, executor, gate=None):
+        super().__init__(thumbnail_size=64, executor=executor)
+        self.gate = gate
+        self.started = threading.Event()
+        self.decoded = []
+
+    def load_single_image(self, arquivo, index, data=None):
+        self.started.set()
+        if self.gate:
+            self.gate.wait(timeout=2)
+        self.decoded.append(index)
+        if data is not None:
+            self.get_thumbnail(arquivo, data)
+        return (arquivo.name, None, str(arquivo), index)
+
+
+class DecodingLoader(ParallelImageLoader):
+    """Loader real, exceto a conversão para PhotoImage (sem Tk nos testes)."""
+
+    def _to_photo(self, img):
+        self.profiler.record("convert", 0.1)
+        return None
+
+
+@pytest.fixture
+def executor():
+    ex = PriorityExecutor(max_workers=1, name="TestLoader")
+    yield ex
+    ex.shutdown(wait=True)
+
+
+def drain_until(fila, done, timeout=2.0):
+    """Lê mensagens até `done(msgs)` ser verdadeiro (ou o timeout)."""
+    msgs = []
+    deadline = time.time() + timeout
+    while not done(msgs) and time.time() < deadline:
+        try:
+            msgs.append(fila.get(timeout=0.05))
+        except queue.Empty:
+            pass
+    return msgs
+
+
+def drain(fila, expected, timeout=2.0):
+    msgs = []
+    deadline = time.time() + timeout
+    while len(msgs) < expected and time.time() < deadline:
+        try:
+            msgs.append(fila.get(timeout=0.05))
+        except queue.Empty:
+            pass
+    return msgs
+
+
+class TestLazyThumbnailLoader:
+    """Testes do carregamento dirigido pela viewport."""
+
+    @pytest.mark.unit
+    def test_only_viewport_is_decoded(self, executor):
+        """Somente tiles visíveis + margem são decodificados."""
+        fila = queue.Queue()
+        loader = RecordingLoader(executor)
+        lazy = LazyThumbnailLoader(loader, fila)
+        lazy.start([Path(f"/fake/img{i:03d}.jpg") for i in range(500)])
+
+        lazy.update_viewport(0, 8, margin=3)
+        msgs = drain(fila, 12)
+
+        assert sorted(m["index"] for m in msgs) == list(range(12))
+        assert all(m["status"] == "thumb" for m in msgs)
+        assert lazy.loaded_count() == 12
+
+    @pytest.mark.unit
+    def test_scroll_drops_offscreen_work(self, executor):
+        """Rolagem descarta pendentes fora da janela e prioriza os visíveis."""
+        gate = threading.Event()
+        fila = queue.Queue()
+        loader = RecordingLoader(executor, gate=gate)
+        lazy = LazyThumbnailLoader(loader, fila)
+        lazy.start([Path(f"/fake/img{i:03d}.jpg") for i in range(500)])
+
+        lazy.update_viewport(0, 8)
+        assert loader.started.wait(timeout=2)
+        lazy.update_viewport(300, 308)
+        gate.set()
+        drain(fila, 10)
+
+        # Apenas o tile já em execução na primeira janela sobrevive
+        assert sorted(loader.decoded) == [0] + list(range(300, 309))
+
+    @pytest.mark.unit
+    def test_loaded_tiles_are_not_reloaded(self, executor):
+        """Voltar a uma região já carregada não decodifica novamente."""
+        fila = queue.Queue()
+        loader = RecordingLoader(executor)
+        lazy = LazyThumbnailLoader(loader, fila)
+        lazy.start([Path(f"/fake/img{i:03d}.jpg") for i in range(20)])
+
+        lazy.update_viewport(0, 5)
+        drain(fila, 6)
+        lazy.update_viewport(0, 5)
+        time.sleep(0.05)
+
+        assert sorted(loader.decoded) == list(range(6))
+
+    @pytest.mark.unit
+    def test_restart_ignores_stale_results(self, executor):
+        """Resultados de uma listagem anterior são descartados."""
+        gate = threading.Event()
+        fila = queue.Queue()
+        loader = RecordingLoader(executor, gate=gate)
+        lazy = LazyThumbnailLoader(loader, fila)
+        lazy.start([Path("/fake/old.jpg")])
+        lazy.update_viewport(0, 0)
+
+        lazy.start([Path("/fake/new.jpg")])
+        gate.set()
+        lazy.update_viewport(0, 0)
+        msgs = drain(fila, 1)
+
+        assert [m["data"][0] for m in msgs] == ["new.jpg"]
+
+    @pytest.mark.unit
+    def test_invalidate_requests_visible_tiles_again(self, executor):
+        """Após invalidar (novo tamanho), a mesma janela é pedida de novo."""
+        fila = queue.Queue()
+        loader = RecordingLoader(executor)
+        lazy = LazyThumbnailLoader(loader, fila)
+        lazy.start([Path(f"/fake/img{i:03d}.jpg") for i in range(20)], tag=7)
+
+        lazy.update_viewport(0, 5)
+        drain(fila, 6)
+        assert lazy.invalidate()
+        assert lazy.loaded_count() == 0 and lazy.total == 20
+        lazy.update_viewport(0, 5)
+        msgs = drain(fila, 6)
+
+        assert sorted(loader.decoded) == sorted(list(range(6)) * 2)
+        assert sorted(m["index"] for m in msgs) == list(range(6))
+        assert all(m["generation"] == 7 for m in msgs)
+
+    @pytest.mark.unit
+    def test_completed_futures_never_block_ui_thread(self, executor):
+        """Futures já concluídos (callback na thread Tk) não travam com a fila cheia."""
+        fila = ResultQueue(maxsize=2)
+        loader = RecordingLoader(executor)
+
+        def submit_load(arquivo, index, priority=TaskPriority.INTERACTIVE, group=None):
+            future = Future()
+            future.set_result((arquivo.name, None, str(arquivo), index))
+            return future
+
+        loader.submit_load = submit_load
+        lazy = LazyThumbnailLoader(loader, fila)
+        lazy.start([Path(f"/fake/img{i:03d}.jpg") for i in range(10)])
+        # Se a thread principal bloquear, o cancelamento a solta e o teste falha
+        watchdog = threading.Timer(2.0, lazy.cancel)
+        watchdog.start()
+        try:
+            start = time.perf_counter()
+            lazy.update_viewport(0, 9)
+            assert time.perf_counter() - start < 1.0
+        finally:
+            watchdog.cancel()
+
+        msgs = drain(fila, 10)
+        assert sorted(m["index"] for m in msgs) == list(range(10))
+        assert fila.stats()["rejected"] == 8
+
+
+class TestResultQueue:
+    """Testes da fila limitada com backpressure."""
+
+    @pytest.mark.unit
+    def test_control_messages_bypass_limit(self):
+        """Mensagens de controle nunca bloqueiam, mesmo com a fila cheia."""
+        fila = ResultQueue(maxsize=1)
+        assert fila.put_data({"status": "progress"})
+        fila.put({"status": "done"}, timeout=0.01)
+        assert fila.qsize() == 2
+
+    @pytest.mark.unit
+    def test_producer_blocks_until_consumer_drains(self):
+        """Produtor espera o consumidor quando a janela está cheia."""
+        fila = ResultQueue(maxsize=2)
+        produced = []
+
+        def producer():
+            for i in range(6):
+                fila.put_data({"status": "progress", "i": i})
+                produced.append(i)
+
+        t = threading.Thread(target=producer)
+        t.start()
+        time.sleep(0.1)
+        assert len(produced) == 2
+
+        for _ in range(6):
+            fila.get(timeout=1)
+        t.join(timeout=2)
+        assert produced == list(range(6))
+        stats = fila.stats()
+        assert stats["max_depth"] <= 2
+        assert stats["blocked_puts"] >= 1
+
+    @pytest.mark.unit
+    def test_cancel_releases_blocked_producer(self):
+        """Cancelamento descarta a mensagem em vez de bloquear para sempre."""
+        fila = ResultQueue(maxsize=1)
+        cancel = threading.Event()
+        fila.put_data({"status": "thumb"})
+        cancel.set()
+        assert fila.put_data({"status": "thumb"}, cancel) is False
+        assert fila.stats()["dropped"] == 1
+
+    @pytest.mark.unit
+    def test_consumer_put_never_blocks(self):
+        """Com a fila cheia, a thread consumidora tem a mensagem recusada na hora."""
+        fila = ResultQueue(maxsize=1)
+        fila.put_data({"status": "thumb"})
+
+        start = time.perf_counter()
+        assert fila.put_data({"status": "thumb"}, block=False) is False
+        assert fila.put_data({"status": "thumb"}, timeout=0.05) is False
+        assert time.perf_counter() - start < 0.5
+        stats = fila.stats()
+        assert stats["rejected"] == 2 and stats["dropped"] == 0
+        assert fila.qsize() == 1
+
+        fila.get_nowait()
+        assert fila.put_data({"status": "thumb"}, block=False)
+
+    @pytest.mark.unit
+    def test_parallel_load_bounded_by_window(self, executor):
+        """Imagens decodificadas aguardando a UI nunca excedem a janela."""
+        executor.resize(4)
+        fila = ResultQueue(maxsize=4)
+        loader = RecordingLoader(executor)
+        loader.max_in_flight = 4
+        imagens = [Path(f"/fake/img{i:03d}.jpg") for i in range(100)]
+
+        t = threading.Thread(target=loader.load_images_parallel,
+                             args=(imagens, threading.Event(), fila))
+        t.start()
+        time.sleep(0.2)
+        # Consumidor parado: no máximo janela na fila + janela em voo
+        assert len(loader.decoded) <= 4 + 4 + 1
+
+        msgs = []
+        while t.is_alive() or not fila.empty():
+            try:
+                msgs.append(fila.get(timeout=0.1))
+            except queue.Empty:
+                pass
+        t.join()
+        assert sum(1 for m in msgs if m["status"] == "progress") == 100
+        assert msgs[-1]["status"] == "done"
+        assert fila.stats()["max_depth"] <= 4 + 2
+
+
+class TestQueueDrainer:
+    """Testes do consumo em lotes por quadro e do despertar pelo produtor."""
+
+    @pytest.mark.unit
+    def test_drains_batch_within_budget(self):
+        """Um quadro consome várias mensagens, não uma por tick."""
+        fila = ResultQueue(maxsize=300)
+        for i in range(200):
+            fila.put_data({"status": "progress", "i": i})
+        handled = []
+        drainer = QueueDrainer(fila, handled.append, budget_ms=50)
+        assert drainer.drain() == 200
+        assert drainer.stats()["max_batch"] == 200
+
+    @pytest.mark.unit
+    def test_stops_at_budget(self):
+        """Handler lento encerra o lote ao estourar o orçamento."""
+        fila = ResultQueue(maxsize=10)
+        for i in range(10):
+            fila.put_data({"status": "progress", "i": i})
+        drainer = QueueDrainer(fila, lambda msg: time.sleep(0.01), budget_ms=25)
+        assert 1 <= drainer.drain() < 10
+        assert drainer.pending()
+        stats = drainer.stats()
+        assert stats["frames"] == 1 and stats["frame_ms_max"] >= 25
+        assert stats["queue_lag_ms_max"] >= 0
+
+    @pytest.mark.unit
+    def test_armed_queue_wakes_consumer_once(self):
+        """Com o consumidor armado, só a primeira inserção o acorda."""
+        fila = ResultQueue(maxsize=10)
+        wakes = []
+        fila.on_ready = lambda: wakes.append(threading.current_thread().name)
+        fila.put({"status": "start"})
+        assert wakes == []  # Não armado: consumidor ainda está ativo
+
+        fila.get_nowait()
+        assert fila.arm()
+        t = threading.Thread(target=lambda: [fila.put_data({"status": "thumb"}) for _ in range(3)],
+                             name="Produtor")
+        t.start()
+        t.join()
+        assert wakes == ["Produtor"]
+        assert fila.arm() is False  # Ainda há mensagens: drenar antes de dormir
+
+    @pytest.mark.unit
+    def test_queue_lag_measured(self):
+        """Latência fila → UI entra nas estatísticas."""
+        fila = ResultQueue(maxsize=4)
+        fila.put({"status": "done"})
+        time.sleep(0.02)
+        fila.get_nowait()
+        stats = fila.stats()
+        assert stats["lag_ms_max"] >= 15
+        assert stats["lag_ms_avg"] == stats["lag_ms_max"]
+
+
+class TestGridLayout:
+    """Testes da geometria do grid virtualizado."""
+
+    @pytest.fixture
+    def layout(self):
+        return GridLayout(thumb_size=100, columns=4, gap=20, label_height=36, top=40)
+
+    @pytest.mark.unit
+    def test_visible_range_is_independent_of_total(self, layout):
+        """Janela visível depende só da rolagem, não do tamanho da pasta."""
+        small = layout.visible_range(0, 600, 5000)
+        assert small == layout.visible_range(0, 600, 50_000)
+        assert small[1] - small[0] + 1 <= 4 * 4
+
+        y = layout.tile_origin(4000)[1]
+        first, last = layout.visible_range(y, y + 600, 5000)
+        assert first == 4000 and last - first + 1 <= 4 * 5
+
+    @pytest.mark.unit
+    def test_margin_and_bounds(self, layout):
+        """Margem em linhas, limitada ao início e ao fim do grid."""
+        assert layout.visible_range(0, 100, 10, margin_rows=2) == (0, 9)
+        assert layout.visible_range(0, 100, 0) == (0, -1)
+        bottom = layout.content_height(10)
+        assert layout.visible_range(bottom - 100, bottom + 500, 10) == (8, 9)
+        assert layout.visible_range(bottom + 10, bottom + 500, 10) == (0, -1)
+
+    @pytest.mark.unit
+    def test_index_at_round_trip(self, layout):
+        """Ponto dentro de um tile devolve seu índice; vão entre tiles, None."""
+        for index in (0, 3, 4, 17):
+            x, y = layout.tile_origin(index)
+            assert layout.index_at(x + 5, y + 5, 18) == index
+        x, y = layout.tile_origin(0)
+        assert layout.index_at(x + layout.tile_width + 1, y + 5, 18) is None
+        assert layout.index_at(*layout.tile_origin(18), 18) is None
+        assert layout.index_at(5, 5, 18) is None  # Cabeçalho
+
+    @pytest.mark.unit
+    def test_columns_follow_width(self, layout):
+        """Colunas automáticas: quantas células cabem na largura do canvas."""
+        assert layout.columns_for_width(0) == 1
+        assert layout.columns_for_width(layout.gap + 3 * layout.cell_width) == 3
+        assert layout.columns_for_width(layout.gap + 3 * layout.cell_width - 1) == 2
+
+        layout.columns = layout.columns_for_width(1200)
+        assert layout.content_width() <= 1200
+        x, y = layout.tile_origin(500)
+        assert layout.index_at(x + 1, y + 1, 501) == 500
+
+
+class TestIdlePrefetcher:
+    """Testes do pré-carregamento em tempo ocioso."""
+
+    @pytest.fixture
+    def prefetch_setup(self, directory_structure, config_manager, executor):
+        cache = DirectoryCache()
+        base = str(directory_structure)
+        cache.set(base, [(p.name, p) for p in directory_structure.iterdir()])
+        loader = ParallelImageLoader(thumbnail_size=32, executor=executor)
+        prefetcher = IdlePrefetcher(loader, cache, config_manager)
+        return base, loader, prefetcher
+
+    @pytest.mark.integration
+    def test_warms_history_terms(self, prefetch_setup, config_manager):
+        """Termos frequentes do histórico viram cache hit."""
+        base, loader, prefetcher = prefetch_setup
+        config_manager.add_to_history("PECA001")
+
+        prefetcher.start(base)
+        prefetcher._future.result(timeout=5)
+
+        pasta = Path(base) / "PECA001"
+        for arquivo in pasta.iterdir():
+            key = ThumbnailCache.make_key(arquivo, 32)
+            assert loader.thumbnail_cache.contains(key)
+
+    @pytest.mark.integration
+    def test_plans_sorted_neighbours(self, prefetch_setup):
+        """Vizinhas da peça atual (ordem alfabética) entram no plano."""
+        base, loader, prefetcher = prefetch_setup
+        plan = prefetcher.plan(base, Path(base) / "PECA001")
+        names = [p.name for p in plan]
+        assert "PECA001" not in names
+        assert names[:2] == ["PECA002", "Empty"]
+
+    @pytest.mark.unit
+    def test_stop_cancels(self, prefetch_setup, config_manager):
+        """Uma busca do usuário interrompe o pré-carregamento."""
+        base, loader, prefetcher = prefetch_setup
+        config_manager.set("performance", "prefetch_io_mb_per_sec", 0.000001)
+        config_manager.add_to_history("PECA001")
+        prefetcher.start(base)
+        prefetcher.stop()
+        assert not prefetcher.is_running()
+
+    @pytest.mark.unit
+    def test_io_budget_throttles(self):
+        """Orçamento de I/O impõe espera proporcional aos bytes."""
+        budget = IOBudget(bytes_per_sec=1000)
+        start = time.monotonic()
+        assert budget.consume(1000)
+        assert budget.consume(200)
+        assert time.monotonic() - start >= 0.15
+
+        cancel = threading.Event()
+        cancel.set()
+        assert budget.consume(1000, cancel) is False
+
+
+class TestFullImageLoader:
+    """Testes da decodificação do visualizador fora da thread Tk."""
+
+    @pytest.mark.unit
+    def test_decodes_to_screen_size(self, large_image, executor):
+        """Imagem é reduzida para caber no tamanho máximo."""
+        full = FullImageLoader(executor, max_size=(800, 600))
+        img = full.request(large_image).result(timeout=5)
+        assert img.width <= 800 and img.height <= 600
+
+    @pytest.mark.unit
+    def test_recent_images_are_cached(self, image_collection, executor):
+        """LRU pequeno: imagens recentes voltam sem nova decodificação."""
+        full = FullImageLoader(executor, cache_entries=2)
+        for path in image_collection[:3]:
+            full.request(path).result(timeout=5)
+
+        assert full.get_cached(image_collection[0]) is None
+        assert full.get_cached(image_collection[2]) is not None
+        assert full.request(image_collection[2]).done()
+
+    @pytest.mark.unit
+    def test_duplicate_requests_share_future(self, sample_image, executor):
+        """Hover seguido de abertura reaproveita a mesma decodificação."""
+        gate = threading.Event()
+        executor.submit(gate.wait)
+        full = FullImageLoader(executor)
+
+        prefetch = full.prefetch(sample_image)
+        again = full.prefetch(sample_image)
+        assert again is prefetch
+
+        # Abrir promove o prefetch pendente para INTERACTIVE
+        opened = full.request(sample_image)
+        gate.set()
+        assert opened.result(timeout=5) is not None
+        assert prefetch.cancelled()
+
+    @pytest.mark.unit
+    def test_resize_keeps_recent_images(self, image_collection, executor):
+        """Reduzir o LRU mantém as imagens mais recentes."""
+        full = FullImageLoader(executor, cache_entries=3)
+        for path in image_collection[:3]:
+            full.request(path).result(timeout=5)
+
+        full.resize(1)
+        assert full.get_cached(image_collection[1]) is None
+        assert full.get_cached(image_collection[2]) is not None
+
+
+class TestAtlasIntegration:
+    """Atlas alimentando o cache de thumbnails da busca."""
+
+    @pytest.mark.integration
+    def test_second_load_comes_from_atlas(self, directory_structure, config_manager,
+                                          executor, temp_dir):
+        """Primeira busca gera o atlas; a seguinte só recorta em memória."""
+        logger = StructuredLogger("TestAtlas", log_dir=str(temp_dir / "logs"))
+        service = BuscadorService(ResultQueue(), threading.Event(), DirectoryCache(),
+                                  logger, config_manager, executor=executor)
+        pasta = directory_structure / "PECA001"
+        imagens = sorted(pasta.iterdir())
+
+        service._usar_atlas(pasta, imagens)
+        executor.submit(lambda: None, priority=TaskPriority.BACKGROUND).result(timeout=5)
+
+        cache = service.parallel_loader.thumbnail_cache
+        cache.clear()
+        service._usar_atlas(pasta, imagens)
+        assert all(cache.contains(service.parallel_loader.cache_key(p)) for p in imagens)
+
+    @pytest.mark.integration
+    def test_atlas_build_not_counted_by_search(self, image_collection, config_manager,
+                                               executor, temp_dir):
+        """Atlas gerado durante a busca não entra nas decodificações da busca."""
+        logger = StructuredLogger("TestAtlasCount", log_dir=str(temp_dir / "logs"))
+        service = BuscadorService(ResultQueue(), threading.Event(), DirectoryCache(),
+                                  logger, config_manager, executor=executor)
+        loader = service.parallel_loader
+        loader._shared_photo = lambda key, img: img  # Sem Tk nos testes
+        group = executor.create_group("atlas")
+        atlas = threading.Thread(target=service._construir_atlas,
+                                 args=(image_collection[0].parent, image_collection[20:],
+                                       loader.thumbnail_size, group))
+
+        before = service._decoded_count()
+        atlas.start()
+        stats = loader.load_images_parallel(image_collection[:20], threading.Event(), queue.Queue())
+        atlas.join(timeout=10)
+        service.shutdown()
+
+        assert stats["loaded"] == 20 and stats["decode_count"] == 20
+        assert service._decoded_count() - before == 20
+        assert all(loader.thumbnail_cache.contains(loader.cache_key(p))
+                   for p in image_collection[20:])
+
+
+class TestLiveReconfiguration:
+    """Alterações de configuração aplicadas ao serviço em execução."""
+
+    @pytest.fixture
+    def service(self, config_manager, executor, temp_dir):
+        logger = StructuredLogger("TestLive", log_dir=str(temp_dir / "logs"))
+        service = BuscadorService(ResultQueue(), threading.Event(), DirectoryCache(),
+                                  logger, config_manager, executor=executor)
+        yield service
+        service.shutdown()
+
+    @pytest.mark.unit
+    def test_ttl_and_workers_applied_in_place(self, service, config_manager, executor):
+        """TTL do cache de diretórios e a pool mudam sem recriar nada."""
+        dir_cache = service.dir_cache
+        config_manager.update({"general": {"cache_ttl_seconds": 5},
+                               "performance": {"max_workers": 3}})
+        assert service.dir_cache is dir_cache
+        assert dir_cache.ttl.total_seconds() == 5
+        assert executor.max_workers == 3
+        assert service.parallel_loader.executor is executor
+
+    @pytest.mark.unit
+    def test_read_workers_resize_pipeline(self, service, config_manager):
+        """read_workers muda a pool de leitura ao vivo; Auto parte desse valor."""
+        read_pool = service.pipeline.read_executor
+        assert service.autotuner.executor is read_pool
+        assert service.autotuner.apply("/sem-medida") == 16
+        assert read_pool.max_workers == 16
+
+        config_manager.set("performance", "read_workers", 6)
+        assert service.pipeline.read_executor is read_pool
+        assert read_pool.max_workers == 6
+        assert service.autotuner.workers_for("/sem-medida") == 6
+
+    @pytest.mark.unit
+    def test_decoded_count_ignores_misses_from_larger(self, service, sample_image):
+        """Miss servido de um tamanho maior em cache não conta como decodificação."""
+        loader = service.parallel_loader
+        before = service._decoded_count()
+        loader.get_thumbnail(sample_image)
+        assert service._decoded_count() == before + 1
+
+        misses = loader.thumbnail_cache.stats()["misses"]
+        loader.thumbnail_size = 100  # Fora da escada: derivado do 128 em cache
+        loader.get_thumbnail(sample_image)
+        assert loader.thumbnail_cache.stats()["misses"] > misses
+        assert service._decoded_count() == before + 1
+
+    @pytest.mark.unit
+    def test_thumbnail_cache_stays_warm(self, service, config_manager, sample_image):
+        """Mudar o limite do cache preserva thumbnails que ainda cabem."""
+        loader = service.parallel_loader
+        key = loader.cache_key(sample_image)
+        loader.thumbnail_cache.put(key, Image.new("RGB", (64, 64)))
+
+        config_manager.update({"performance": {"thumbnail_cache_mb": 64, "thumbnail_size": 128}})
+        assert loader.thumbnail_cache.max_bytes == 64 * 1024 * 1024
+        assert loader.thumbnail_cache.contains(key)
+        assert loader.thumbnail_size == 128
+
+    @pytest.mark.unit
+    def test_unrelated_keys_and_shutdown(self, service, config_manager, executor):
+        """Estado gravado (autotune) não reaplica a config; shutdown cancela a assinatura."""
+        calls = []
+        service.apply_config = lambda: calls.append(1)
+        config_manager.set_autotuned_workers("/raiz", 5)
+        assert calls == []
+        service.shutdown()
+        config_manager.set("performance", "thumbnail_size", 96)
+        assert calls == []
+
+
+class TestImagePipeline:
+    """Testes do pipeline leitura → decodificação."""
+
+    @pytest.fixture
+    def pipeline(self):
+        p = ImagePipeline(read_workers=4, decode_workers=2, buffer_bytes=1024 * 1024)
+        yield p
+        p.shutdown(wait=True)
+
+    @pytest.mark.unit
+    def test_decode_receives_file_bytes(self, pipeline, sample_image):
+        """Estágio de decodificação recebe os bytes lidos pelo leitor."""
+        future = pipeline.submit(sample_image, len)
+        assert future.result(timeout=5) == sample_image.stat().st_size
+        stats = pipeline.stats()
+        assert stats["read"]["tasks"] == 1 and stats["decode"]["tasks"] == 1
+        assert stats["read"]["bytes"] == sample_image.stat().st_size
+        assert stats["buffer"]["used"] == 0
+
+    @pytest.mark.unit
+    def test_read_errors_propagate(self, pipeline, temp_dir):
+        """Arquivo inexistente falha o Future sem vazar reserva do buffer."""
+        future = pipeline.submit(temp_dir / "missing.jpg", len)
+        with pytest.raises(OSError):
+            future.result(timeout=5)
+        assert pipeline.buffer.stats()["used"] == 0
+
+    @pytest.mark.unit
+    def test_group_cancel_drops_pipeline_work(self, pipeline, image_collection, executor):
+        """Cancelar o grupo descarta leituras e decodificações pendentes."""
+        gate = threading.Event()
+        for _ in range(2):
+            pipeline.decode_executor.submit(gate.wait)
+        group = executor.create_group("busca")
+        futures = [pipeline.submit(p, len, group=group) for p in image_collection[:10]]
+        time.sleep(0.1)
+
+        group.cancel()
+        gate.set()
+        assert all(f.cancelled() for f in futures)
+        deadline = time.time() + 2
+        while pipeline.buffer.stats()["used"] and time.time() < deadline:
+            time.sleep(0.01)
+        assert pipeline.buffer.stats()["used"] == 0
+
+    @pytest.mark.integration
+    def test_parallel_load_reports_stage_utilization(self, pipeline, image_collection, executor):
+        """Carga com pipeline decodifica dos bytes e reporta cada estágio."""
+        loader = RecordingLoader(executor)
+        loader.pipeline = pipeline
+        loader.profiler.calibrate([5.0])
+        fila = queue.Queue()
+        stats = loader.load_images_parallel(image_collection[:20], threading.Event(), fila)
+
+        assert stats["loaded"] == 20
+        # Eficiência relativa à pool que decodifica, não ao executor geral
+        workers = pipeline.decode_executor.max_workers
+        assert stats["parallel_efficiency"] == pytest.approx(stats["speedup"] / workers)
+        assert loader.thumbnail_cache.stats()["entries"] == 20 * len(loader.ladder_sizes())
+        assert stats["pipeline"]["read_tasks"] == 20
+        assert stats["pipeline"]["decode_tasks"] == 20
+        assert 0 <= stats["pipeline"]["read_utilization"] <= 1
+        assert 0 < stats["pipeline"]["decode_utilization"] <= 1
+
+
+class TestMemoryMappedSource:
+    """Testes da leitura via mmap acima do limite de tamanho."""
+
+    @pytest.mark.unit
+    def test_small_files_use_path(self, sample_image):
+        """Abaixo do limite, o Pillow recebe o caminho."""
+        with image_source(sample_image, threshold=1024 * 1024) as source:
+            assert source == sample_image
+
+    @pytest.mark.unit
+    def test_large_files_are_mapped(self, large_image):
+        """Acima do limite, o Pillow decodifica direto do mmap."""
+        with image_source(large_image, threshold=1) as source:
+            assert isinstance(source, mmap.mmap)
+            assert len(source) == large_image.stat().st_size
+        assert source.closed
+
+    @pytest.mark.unit
+    def test_viewer_decodes_from_map(self, large_image, executor):
+        """Visualizador decodifica normalmente pelo caminho mmap."""
+        full = FullImageLoader(executor, max_size=(800, 600), mmap_threshold=1)
+        img = full.request(large_image).result(timeout=5)
+        assert img.width <= 800 and img.height <= 600
+
+    @pytest.mark.unit
+    def test_pipeline_hands_map_to_decoder(self, large_image):
+        """Pipeline entrega o mmap ao decode e o fecha depois."""
+        pipeline = ImagePipeline(read_workers=1, decode_workers=1, mmap_threshold=1)
+        received = []
+        try:
+            size = pipeline.submit(large_image, lambda d: received.append(d) or len(d)).result(timeout=5)
+        finally:
+            pipeline.shutdown(wait=True)
+        assert size == large_image.stat().st_size
+        assert isinstance(received[0], mmap.mmap) and received[0].closed
+
+
+class TestByteBudget:
+    """Testes do buffer limitado entre os estágios."""
+
+    @pytest.mark.unit
+    def test_blocks_until_release(self):
+        """Leitor espera quando o buffer está cheio."""
+        budget = ByteBudget(100)
+        assert budget.acquire(80)
+        acquired = threading.Event()
+        t = threading.Thread(target=lambda: budget.acquire(50) and acquired.set())
+        t.start()
+        assert not acquired.wait(0.1)
+        budget.release(80)
+        assert acquired.wait(1)
+        t.join()
+        assert budget.stats()["waits"] == 1
+
+    @pytest.mark.unit
+    def test_oversized_file_admitted_alone(self):
+        """Arquivo maior que o buffer passa quando o buffer está vazio."""
+        budget = ByteBudget(100)
+        assert budget.acquire(500)
+        assert budget.stats()["peak"] == 500
+
+    @pytest.mark.unit
+    def test_cancel_releases_waiting_reader(self):
+        """Cancelamento libera o leitor bloqueado."""
+        budget = ByteBudget(100)
+        budget.acquire(100)
+        cancel = threading.Event()
+        cancel.set()
+        assert budget.acquire(10, cancel) is False
+
+
+class TestSearchSupersede:
+    """Cancelamento sem bloqueio e substituição de buscas por geração."""
+
+    @pytest.mark.unit
+    def test_new_search_supersedes_without_join(self):
+        """Nova busca cancela a anterior sem esperar e recebe evento próprio."""
+        manager = ThreadManager()
+        release = threading.Event()
+        gen1, event1 = manager.new_generation()
+        assert manager.start_thread(release.wait, args=(2,))
+
+        start = time.monotonic()
+        gen2, event2 = manager.new_generation()
+        assert manager.start_thread(lambda: None)
+        assert time.monotonic() - start < 0.1
+        assert gen2 == gen1 + 1
+        assert event1.is_set() and not event2.is_set()
+
+        release.set()
+        manager.thread.join(timeout=2)
+        time.sleep(0.05)
+        assert manager.state == ThreadState.FINISHED
+
+    @pytest.mark.unit
+    def test_cancel_does_not_wait_for_inflight_decode(self, executor):
+        """Cancelar retorna na hora, mesmo com decodificação em andamento."""
+        gate = threading.Event()
+        loader = RecordingLoader(executor, gate=gate)
+        cancel = threading.Event()
+        fila = queue.Queue()
+        result = {}
+        t = threading.Thread(target=lambda: result.update(loader.load_images_parallel(
+            [Path(f"/fake/img{i:03d}.jpg") for i in range(20)], cancel, fila, generation=7)))
+        t.start()
+        assert loader.started.wait(timeout=2)
+
+        start = time.monotonic()
+        cancel.set()
+        t.join(timeout=2)
+        assert time.monotonic() - start < 0.5
+        gate.set()
+        assert result["cancelled"]
+        msgs = drain(fila, 2)
+        assert [m["status"] for m in msgs] == ["start_parallel", "cancelled"]
+        assert all(m["generation"] == 7 for m in msgs)
+
+    @pytest.mark.integration
+    def test_search_messages_carry_generation(self, directory_structure, config_manager,
+                                              executor, temp_dir):
+        """Todas as mensagens da busca levam a geração informada."""
+        logger = StructuredLogger("TestGeneration", log_dir=str(temp_dir / "logs"))
+        fila = queue.Queue()
+        service = BuscadorService(fila, threading.Event(), DirectoryCache(),
+                                  logger, config_manager, executor=executor)
+        service.buscar_e_carregar(str(directory_structure), "PECA001", threading.Event(), 3)
+
+        msgs = drain_until(fila, lambda ms: any(m["status"] == "done" for m in ms))
+        assert [m["status"] for m in msgs if m["status"] != "sizes"] == ["found_part", "listing", "done"]
+        assert all(m["generation"] == 3 for m in msgs)
+
+    @pytest.mark.unit
+    def test_superseded_search_cannot_take_listing(self, executor):
+        """Listagem de uma busca antiga não substitui a da busca atual."""
+        lazy = LazyThumbnailLoader(RecordingLoader(executor), queue.Queue())
+        lazy.start([Path("/fake/nova.jpg")], tag=2)
+        lazy.start([Path("/fake/velha.jpg"), Path("/fake/velha2.jpg")], tag=1)
+        assert lazy.total == 1
+        lazy.cancel(tag=1)
+        assert lazy._group is not None
+
+
+class TestStableOrder:
+    """Lugares reservados em ordem natural, preenchidos conforme chegam."""
+
+    @pytest.mark.unit
+    def test_natural_sort_key(self):
+        """Números no nome são comparados pelo valor."""
+        nomes = ["foto10.jpg", "Foto2.jpg", "foto1.jpg", "capa.jpg", "foto2b.jpg"]
+        ordem = sorted((Path(n) for n in nomes), key=natural_sort_key)
+        assert [p.name for p in ordem] == ["capa.jpg", "foto1.jpg", "Foto2.jpg",
+                                           "foto2b.jpg", "foto10.jpg"]
+
+    @pytest.mark.unit
+    def test_dimensions_from_header(self, sample_image, corrupted_image):
+        """Dimensões vêm do cabeçalho; arquivo ilegível devolve None."""
+        assert image_dimensions(sample_image) == (100, 100)
+        assert image_dimensions(corrupted_image) is None
+
+    @pytest.mark.unit
+    def test_progress_and_failures_carry_index(self, executor):
+        """Cada resultado (ou falha) aponta o lugar da imagem na listagem."""
+        executor.resize(4)
+        loader = RecordingLoader(executor)
+        original = loader.load_single_image
+        loader.load_single_image = lambda arquivo, index, data=None: (
+            None if index == 3 else original(arquivo, index, data))
+        fila = queue.Queue()
+        imagens = [Path(f"/fake/img{i:03d}.jpg") for i in range(10)]
+        loader.load_images_parallel(imagens, threading.Event(), fila)
+
+        msgs = drain(fila, 12)
+        progress = {m["index"]: m["data"][2] for m in msgs if m["status"] == "progress"}
+        assert progress == {i: str(p) for i, p in enumerate(imagens) if i != 3}
+        assert [m["index"] for m in msgs if m["status"] == "failed"] == [3]
+
+    @pytest.mark.integration
+    def test_listing_in_natural_order_with_sizes(self, temp_dir, config_manager, executor):
+        """Listagem chega antes das imagens, em ordem natural; dimensões chegam depois."""
+        pasta = temp_dir / "raiz" / "PECA001"
+        pasta.mkdir(parents=True)
+        for i, size in ((10, (40, 20)), (2, (20, 40)), (1, (30, 30))):
+            Image.new("RGB", size).save(pasta / f"foto{i}.jpg")
+        config_manager.set("advanced", "lazy_loading", False)
+        config_manager.set("performance", "enable_parallel_loading", False)
+        logger = StructuredLogger("TestOrder", log_dir=str(temp_dir / "logs"))
+        fila = queue.Queue()
+        service = BuscadorService(fila, threading.Event(), DirectoryCache(),
+                                  logger, config_manager, executor=executor)
+        service.parallel_loader._shared_photo = lambda key, img: img  # Sem Tk
+        service.buscar_e_carregar(str(temp_dir / "raiz"), "PECA001")
+
+        sizes = {}
+
+        def complete(msgs):
+            for m in msgs:
+                if m["status"] == "sizes":
+                    sizes.update(m["sizes"])
+            return len(sizes) == 3 and any(m["status"] == "done" for m in msgs)
+
+        msgs = drain_until(fila, complete)
+        assert [m["status"] for m in msgs][:2] == ["found_part", "listing"]
+        listing = msgs[1]
+        assert [Path(p).name for p in listing["imagens"]] == ["foto1.jpg", "foto2.jpg", "foto10.jpg"]
+        assert listing["sizes"] is None  # Nenhum cabeçalho lido antes da listagem
+        assert {i: tuple(s) for i, s in sizes.items()} == {0: (30, 30), 1: (20, 40), 2: (40, 20)}
+        assert [m["index"] for m in msgs if m["status"] == "progress"] == [0, 1, 2]
+
+    @pytest.mark.integration
+    def test_metadata_indexed_without_placeholder_sizes(self, temp_dir, config_manager, executor):
+        """Sem placeholder_dimensions, o índice recebe os cabeçalhos e a UI não recebe "sizes"."""
+        pasta = temp_dir / "raiz" / "PECA001"
+        pasta.mkdir(parents=True)
+        Image.new("RGB", (40, 20)).save(pasta / "foto1.jpg")
+        config_manager.set("performance", "placeholder_dimensions", False)
+        logger = StructuredLogger("TestOrderMeta", log_dir=str(temp_dir / "logs"))
+        fila = queue.Queue()
+        service = BuscadorService(fila, threading.Event(), DirectoryCache(),
+                                  logger, config_manager, executor=executor)
+        service.buscar_e_carregar(str(temp_dir / "raiz"), "PECA001")
+        executor.submit(lambda: None, priority=TaskPriority.BACKGROUND).result(timeout=5)
+
+        meta = service.catalog.cached_metadata(pasta / "foto1.jpg")
+        assert (meta["width"], meta["height"]) == (40, 20)
+        msgs = drain_until(fila, lambda msgs: False, timeout=0.2)
+        assert not [m for m in msgs if m["status"] == "sizes"]
+
+    @pytest.mark.integration
+    def test_cancelled_search_publishes_no_sizes(self, temp_dir, config_manager, executor):
+        """Cancelada a busca, leituras de cabeçalho pendentes não publicam nada."""
+        pasta = temp_dir / "PECA001"
+        pasta.mkdir()
+        imagens = []
+        for i in range(5):
+            Image.new("RGB", (10 + i, 10)).save(pasta / f"foto{i}.jpg")
+            imagens.append(pasta / f"foto{i}.jpg")
+        logger = StructuredLogger("TestOrderCancel", log_dir=str(temp_dir / "logs"))
+        fila = queue.Queue()
+        service = BuscadorService(fila, threading.Event(), DirectoryCache(),
+                                  logger, config_manager, executor=executor)
+        gate = threading.Event()
+        executor.submit(gate.wait)
+        cancel = threading.Event()
+        group = service._publicar_dimensoes(imagens, cancel)
+        cancel.set()
+        gate.set()
+        executor.submit(lambda: None, priority=TaskPriority.BACKGROUND).result(timeout=5)
+        assert group.pending_count() == 0
+        assert fila.empty()
+
+
+class TestDecodeProfiler:
+    """Speedup calibrado e tempos por etapa."""
+
+    @pytest.mark.integration
+    def test_speedup_from_calibrated_serial_cost(self, image_collection, executor):
+        """Speedup = custo serial medido x imagens decodificadas / duração."""
+        executor.resize(4)
+        loader = DecodingLoader(thumbnail_size=64, executor=executor)
+        first = loader.load_images_parallel(image_collection[:20], threading.Event(), queue.Queue())
+        # Calibração roda depois, em BACKGROUND: a primeira carga não a espera
+        assert first["calibration_scheduled"] and first["speedup"] is None
+        assert first["decode_count"] == 20
+        loader._calibration_future.result(timeout=10)
+
+        stats = loader.load_images_parallel(image_collection[20:40], threading.Event(), queue.Queue())
+        assert not stats["calibration_scheduled"]
+        assert stats["serial_ms_per_image"] > 0
+        assert stats["decode_count"] == 20
+        expected = stats["decode_count"] * stats["serial_ms_per_image"] / stats["duration_ms"]
+        assert stats["speedup"] == pytest.approx(expected)
+        assert stats["parallel_efficiency"] == pytest.approx(stats["speedup"] / 4)
+        assert stats["decode_ms_avg"] > 0 and stats["resize_ms_avg"] >= 0
+        assert stats["convert_count"] == 20
+
+    @pytest.mark.integration
+    def test_cached_load_reports_no_speedup(self, image_collection, executor):
+        """Sem decodificação (tudo em cache) não há speedup inventado."""
+        loader = DecodingLoader(thumbnail_size=64, executor=executor)
+        loader.load_images_parallel(image_collection[:5], threading.Event(), queue.Queue())
+        stats = loader.load_images_parallel(image_collection[:5], threading.Event(), queue.Queue())
+        assert stats["decode_count"] == 0
+        assert stats["speedup"] is None
+
+    @pytest.mark.unit
+    def test_calibration_is_periodic(self):
+        """Calibra na primeira carga e depois a cada `every_loads`."""
+        profiler = DecodeProfiler(every_loads=3)
+        assert profiler.needs_calibration()
+        profiler.calibrate([10.0, 20.0])
+        assert profiler.serial_ms == pytest.approx(15.0)
+        assert [profiler.needs_calibration() for _ in range(3)] == [False, False, True]
+
+    @pytest.mark.unit
+    def test_stage_averages_and_percentiles(self):
+        """Médias por intervalo e percentis das amostras recentes."""
+        profiler = DecodeProfiler()
+        before = profiler.snapshot()
+        for ms in range(1, 101):
+            profiler.record("decode", float(ms))
+        averages = DecodeProfiler.averages(before, profiler.snapshot())
+        assert averages["decode_count"] == 100
+        assert averages["decode_ms_avg"] == pytest.approx(50.5)
+        assert averages["resize_ms_avg"] is None
+        assert profiler.percentiles("decode")[95] == 96.0
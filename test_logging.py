@@ -0,0 +1,160 @@
+"""
+Testes para o pipeline de logging assíncrono do StructuredLogger.
+"""
+
+import json
+import logging
+import threading
+import time
+
+import pytest
+
+from visualizador_pecas_v8_1_COMPLETO import StructuredLogger
+from inventory_viewer.core import LogBuffer
+
+
+def make_record(level: int, msg: str = "x") -> logging.LogRecord:
+    return logging.LogRecord("teste", level, __file__, 0, msg, None, None)
+
+
+class BlockingHandler(logging.Handler):
+    """Handler que simula disco lento: segura a thread de escrita."""
+
+    def __init__(self, gate: threading.Event):
+        super().__init__()
+        self.gate = gate
+        self.records = []
+
+    def emit(self, record):
+        self.gate.wait(timeout=5)
+        self.records.append(record)
+
+
+class TestLogBuffer:
+    """Testes da política de descarte da fila limitada."""
+
+    @pytest.mark.unit
+    def test_drops_debug_first(self):
+        """Fila cheia descarta DEBUG enfileirado antes de perder um WARNING."""
+        buffer = LogBuffer(maxsize=3)
+        for level in (logging.INFO, logging.DEBUG, logging.INFO):
+            assert buffer.offer(make_record(level)) is None
+
+        dropped = buffer.offer(make_record(logging.WARNING))
+        assert dropped.levelno == logging.DEBUG
+        levels = [buffer.get_nowait().levelno for _ in range(3)]
+        assert levels == [logging.INFO, logging.INFO, logging.WARNING]
+
+    @pytest.mark.unit
+    def test_incoming_dropped_when_nothing_lower(self):
+        """Sem registro de nível menor, quem chega é descartado."""
+        buffer = LogBuffer(maxsize=2)
+        buffer.offer(make_record(logging.ERROR))
+        buffer.offer(make_record(logging.ERROR))
+        incoming = make_record(logging.DEBUG)
+        assert buffer.offer(incoming) is incoming
+        assert buffer.qsize() == 2
+
+    @pytest.mark.unit
+    def test_drop_new_policy(self):
+        """Política drop_new preserva a fila e perde o registro novo."""
+        buffer = LogBuffer(maxsize=1, policy="drop_new")
+        buffer.offer(make_record(logging.DEBUG))
+        incoming = make_record(logging.ERROR)
+        assert buffer.offer(incoming) is incoming
+        assert buffer.get_nowait().levelno == logging.DEBUG
+
+
+class TestAsyncLogging:
+    """Testes do StructuredLogger com escrita em background."""
+
+    @pytest.mark.unit
+    def test_records_reach_files_after_close(self, temp_dir):
+        """close() grava os registros pendentes no JSONL."""
+        logger = StructuredLogger("TestAsyncFiles", log_dir=str(temp_dir / "logs"))
+        logger.info("Primeiro", item=1)
+        logger.debug("Detalhe", item=2)
+        logger.close()
+
+        lines = (temp_dir / "logs" / "app_structured.jsonl").read_text(encoding="utf-8").splitlines()
+        messages = [json.loads(line)["message"] for line in lines]
+        assert messages == ["Primeiro", "Detalhe"]
+
+    @pytest.mark.unit
+    def test_slow_sink_does_not_block_callers(self, temp_dir):
+        """Com o disco travado, logar continua imediato e conta descartes."""
+        gate = threading.Event()
+        sink = BlockingHandler(gate)
+        logger = StructuredLogger("TestAsyncSlow", log_dir=str(temp_dir / "logs"), queue_size=8,
+                                  sinks=[sink])
+
+        start = time.perf_counter()
+        for i in range(200):
+            logger.debug("Ruído", i=i)
+        logger.warning("Importante")
+        elapsed = time.perf_counter() - start
+        assert elapsed < 1.0
+
+        dropped = logger.dropped_records()
+        assert dropped["DEBUG"] >= 190
+        assert "WARNING" not in dropped
+        assert logger.get_metrics_summary()["log_records_dropped"] == sum(dropped.values())
+
+        gate.set()
+        logger.close()
+        assert any(r.levelno == logging.WARNING for r in sink.records)
+
+    @pytest.mark.unit
+    def test_same_name_replaces_previous_pipeline(self, temp_dir):
+        """Nova instância com o mesmo nome encerra a thread da anterior."""
+        first = StructuredLogger("TestAsyncReuse", log_dir=str(temp_dir / "a"))
+        listener_thread = first.async_handler.listener._thread
+        second = StructuredLogger("TestAsyncReuse", log_dir=str(temp_dir / "b"))
+
+        assert not listener_thread.is_alive()
+        assert len(second.logger.handlers) == 1
+        second.close()
+
+
+class TestLevelGating:
+    """Testes de níveis desligados e serialização única."""
+
+    @pytest.mark.unit
+    def test_disabled_level_builds_nothing(self, temp_dir, monkeypatch):
+        """DEBUG desligado não monta registro nem chega aos handlers."""
+        logger = StructuredLogger("TestGating", log_dir=str(temp_dir / "logs"), level="INFO")
+        built = []
+        original = logger._build_record
+        monkeypatch.setattr(logger, "_build_record",
+                            lambda *a, **k: built.append(a[0]) or original(*a, **k))
+
+        logger.debug("Invisível")
+        logger.record_cache_event(True, "/raiz")
+        logger.record_ui_frames({"frames": 3})
+        logger.record_quarantine({"entries": 1})
+        logger.info("Visível")
+        assert built == ["INFO"]
+        assert logger.metrics["cache_hits"] == 1  # Métricas continuam contando
+        assert logger.metrics["ui_frames"] == {"frames": 3}
+        assert logger.metrics["quarantine"] == {"entries": 1}
+
+        logger.set_level("DEBUG")
+        logger.debug("Agora sim")
+        assert built == ["INFO", "DEBUG"]
+        logger.close()
+
+    @pytest.mark.unit
+    def test_single_serialization(self, temp_dir):
+        """Mensagem é texto simples; o JSONL traz os campos uma vez, com contexto."""
+        logger = StructuredLogger("TestSerialize", log_dir=str(temp_dir / "logs"))
+        received = []
+        logger.logger.addFilter(lambda record: received.append(record) or True)
+        logger.info("Busca", termo="ABC", pasta=temp_dir)
+        logger.close()
+
+        assert received[0].getMessage() == "Busca"
+        line = (temp_dir / "logs" / "app_structured.jsonl").read_text(encoding="utf-8").strip()
+        data = json.loads(line)
+        assert data["message"] == "Busca" and data["termo"] == "ABC"
+        assert data["pasta"] == str(temp_dir)  # Não serializável vira texto
+        assert data["session_id"] == logger.session_id and data["logger"] == "TestSerialize"
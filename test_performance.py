@@ -2,10 +2,17 @@
 Testes de performance e benchmarks.
 """
 
+import os
 import pytest
+import logging
 import time
+import tracemalloc
 from pathlib import Path
 
+from PIL import Image
+
+from visualizador_pecas_v8_1_COMPLETO import ImagePipeline, ParallelImageLoader, StructuredLogger
+
 
 class TestPerformance:
     """Testes de performance para validar otimizações."""
@@ -156,4 +163,83 @@ class TestPerformance:
                 cache_instance.invalidate(f"/test{i-100}")
         duration = time.time() - start
 
-        assert duration < 2.0, f"Cache thrashing muito lento: {duration:.2f}s"
\ No newline at end of file
+        assert duration < 2.0, f"Cache thrashing muito lento: {duration:.2f}s"
+
+class TestMemoryMappedReads:
+    """Pico de memória na leitura de originais grandes (mmap vs. buffer)."""
+
+    # Tamanho do corpus sintético; MMAP_CORPUS_MB=200 reproduz a medição completa
+    CORPUS_MB = int(os.environ.get("MMAP_CORPUS_MB", "32"))
+    FILE_SIDE = 1700  # ~8.3 MB por TIFF RGB sem compressão
+
+    @pytest.fixture
+    def corpus(self, temp_dir):
+        file_bytes = self.FILE_SIDE * self.FILE_SIDE * 3
+        count = max(1, self.CORPUS_MB * 1024 * 1024 // file_bytes)
+        pasta = temp_dir / "originais"
+        pasta.mkdir()
+        paths = []
+        for i in range(count):
+            path = pasta / f"original_{i:03d}.tif"
+            Image.frombytes("RGB", (self.FILE_SIDE, self.FILE_SIDE),
+                            os.urandom(file_bytes)).save(path)
+            paths.append(path)
+        return paths
+
+    @staticmethod
+    def peak_bytes(corpus, mmap_threshold):
+        pipeline = ImagePipeline(read_workers=2, decode_workers=1,
+                                 mmap_threshold=mmap_threshold)
+        loader = ParallelImageLoader(thumbnail_size=128, executor=pipeline.decode_executor)
+        tracemalloc.start()
+        try:
+            for path in corpus:
+                pipeline.submit(path, lambda data, p=path: loader.get_thumbnail(p, data)).result()
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+            pipeline.shutdown(wait=True)
+
+    @pytest.mark.slow
+    def test_mmap_avoids_heap_copy(self, corpus):
+        """Via mmap o arquivo não é copiado para o heap do Python."""
+        largest = max(p.stat().st_size for p in corpus)
+
+        buffered_peak = self.peak_bytes(corpus, mmap_threshold=0)
+        mapped_peak = self.peak_bytes(corpus, mmap_threshold=1)
+
+        assert buffered_peak >= largest
+        assert mapped_peak < largest / 4, (
+            f"Pico via mmap: {mapped_peak / 1e6:.1f}MB (buffer: {buffered_peak / 1e6:.1f}MB)")
+
+
+class TestLoggingOverhead:
+    """Custo por chamada do logger no thread de quem loga."""
+
+    CALLS = 20000
+
+    @staticmethod
+    def per_call_ns(fn, calls):
+        start = time.perf_counter_ns()
+        for i in range(calls):
+            fn(i)
+        return (time.perf_counter_ns() - start) / calls
+
+    @pytest.mark.slow
+    def test_disabled_vs_enabled_levels(self, temp_dir, record_property):
+        """Nível desligado custa uma comparação; ligado, só montar e enfileirar."""
+        # Sink nulo: mede o caller, não o disco
+        logger = StructuredLogger("TestLogBench", log_dir=str(temp_dir / "logs"),
+                                  queue_size=self.CALLS * 2, level="INFO",
+                                  sinks=[logging.NullHandler()])
+
+        disabled = self.per_call_ns(
+            lambda i: logger.record_cache_event(i % 2 == 0, "/raiz"), self.CALLS)
+        enabled = self.per_call_ns(
+            lambda i: logger.info("Bench", event_type="bench", item=i), self.CALLS)
+        logger.close()
+
+        # Aparecem no relatório (ex.: --junitxml) sem poluir a saída
+        record_property("log_disabled_ns_per_call", round(disabled))
+        record_property("log_enabled_ns_per_call", round(enabled))
+        assert disabled * 5 < enabled, f"desligado {disabled:.0f}ns vs ligado {enabled:.0f}ns"
@@ -7,7 +7,29 @@ from inventory_viewer.core import (
     ConfigManager,
     ThreadState,
     DirectoryCache,
+    ThumbnailCache,
+    ThumbnailAtlas,
+    CatalogIndex,
+    ImageQuarantine,
+    QuarantinedImageError,
+    TaskPriority,
+    TaskGroup,
+    PriorityExecutor,
+    ByteBudget,
+    ImagePipeline,
+    WorkerAutotuner,
+    ResultQueue,
+    QueueDrainer,
+    DecodeProfiler,
     ParallelImageLoader,
+    GridLayout,
+    LazyThumbnailLoader,
+    FullImageLoader,
+    TileDiskCache,
+    TilePyramid,
+    IOBudget,
+    IdlePrefetcher,
+    PerformanceMonitor,
     BuscadorService,
     ThreadManager,
 )